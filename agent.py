@@ -7,9 +7,16 @@ import os
 from dotenv import load_dotenv
 import asyncio
 import datetime
-import base64
 from pathlib import Path
 
+from cache_llm import envolver_com_cache, CacheMissError
+from limitador_taxa import limitar_taxa
+from replay_trace import exportar_trace
+from evidencias_stream import ExecucaoComEvidencias
+from planejador_tarefas import planejamento_ativo, explorar_em_paralelo
+from relatorio_mapreduce import dados_compactos
+from cliente_gemini_async import gerar_texto_gemini, fechar_cliente_compartilhado
+
 # Carrega as variáveis de ambiente do arquivo .env
 load_dotenv()
 
@@ -22,25 +29,10 @@ def salvar_evidencia(evidencias_dir, conteudo, nome_arquivo):
         f.write(conteudo)
     print(f"Evidência salva: {arquivo_evidencia}")
 
-def salvar_screenshot(evidencias_dir, screenshot_data, nome_arquivo):
-    """
-    Salva screenshot em arquivo PNG
-    """
-    if screenshot_data:
-        # Remove o prefixo data:image/png;base64, se existir
-        if ',' in screenshot_data:
-            screenshot_data = screenshot_data.split(',')[1]
-        
-        # Decodifica base64 e salva
-        screenshot_bytes = base64.b64decode(screenshot_data)
-        arquivo_screenshot = Path(evidencias_dir) / f"{nome_arquivo}.png"
-        with open(arquivo_screenshot, 'wb') as f:
-            f.write(screenshot_bytes)
-        print(f"Screenshot salvo: {arquivo_screenshot}")
-
-async def main():
+def configurar_llm():
     """
-    Função principal que executa o agente
+    Google Gemini com cache (se LLM_CACHE estiver ligado) e limite de GEMINI_RPM/GEMINI_TPM.
+    Também recria o mesmo LLM nos processos do planejador.
     """
     # Configura a variável de ambiente para a biblioteca google-genai
     api_key = os.getenv('GEMINI_API_KEY')
@@ -48,10 +40,17 @@ async def main():
         os.environ['GOOGLE_API_KEY'] = api_key
     
     # Importa o ChatGoogle após definir a variável de ambiente
-    from browser_use import Agent, ChatGoogle
+    from browser_use import ChatGoogle
+    return envolver_com_cache(limitar_taxa(ChatGoogle(model="gemini-2.0-flash-exp"), 'gemini'))
+
+async def main():
+    """
+    Função principal que executa o agente
+    """
+    from browser_use import Agent
     
     # Configura o LLM usando Google Gemini
-    llm = ChatGoogle(model="gemini-2.0-flash-exp")
+    llm = configurar_llm()
     
     # Define a tarefa que o agente deve executar
     task = ("Analise completamente a aplicação Bibliotech em https://bibliotechapp.vercel.app/login "
@@ -86,76 +85,57 @@ async def main():
             10. **SCORE GERAL:** Avaliação de 1-10 por aspecto e geral.
             """
     
+    # Com PLANEJADOR_TAREFAS ligado, cada funcionalidade é explorada por um agente próprio, em paralelo
+    if planejamento_ativo():
+        await explorar_em_paralelo(task, llm, prompt_relatorio, criar_llm=configurar_llm)
+        return
+    
     # Criar pasta de evidências com timestamp
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")  # 20250914_2331
     evidencias_dir = f"evidencias/teste_{timestamp}"
     os.makedirs(evidencias_dir, exist_ok=True)
     
-    # Cria o agente com a tarefa e o LLM
-    agent = Agent(task=task, llm=llm)
-    
-    # Executa o agente e captura o resultado
-    resultado = await agent.run()
-    
-    # Gera relatório detalhado usando o LLM
-    print("\nGerando relatório detalhado...")
-    relatorio_prompt = f"""
-{prompt_relatorio}
-
-DADOS DA EXECUÇÃO:
-- Tarefa: {task}
-- Resultado: {resultado}
-- Data/Hora: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-
-Por favor, gere um relatório completo baseado nos dados acima.
-"""
-    
-    # Gera o relatório usando o LLM
-    try:
-        # Usa o método correto para ChatGoogle
-        relatorio_resposta = await llm.ainvoke(relatorio_prompt)
-        relatorio_detalhado = relatorio_resposta.content
-    except Exception as e:
-        # Se falhar, usa o Google Generative AI diretamente
+    # Grava as evidências passo a passo enquanto o agente executa (stream, métricas, screenshots e recursos
+    # opcionais); na saída do bloco, mesmo com erro, as evidências são fechadas e renderizadas
+    async with ExecucaoComEvidencias(evidencias_dir, llm, task, f"evidencias_teste_{timestamp}",
+                                     f"relatorio_detalhado_{timestamp}", execucao='agent',
+                                     titulo='TESTE AUTOMATIZADO - BIBLIOTECH',
+                                     timestamp=timestamp, prompt_relatorio=prompt_relatorio) as execucao:
+        # Cria o agente com a tarefa e o LLM e executa
+        agent = Agent(task=task, llm=execucao.envolver_llm(llm))
+        resultado = await execucao.executar(agent)
+        
+        # Exporta o trace de ações para reexecução sem LLM (python replay_trace.py <trace>)
+        exportar_trace(resultado, Path(evidencias_dir) / f"trace_{timestamp}.json", task)
+        
+        # Gera relatório detalhado usando o LLM (resumos por funcionalidade + chamada final)
+        print("\nGerando relatório detalhado...")
+        
+        # Gera o relatório usando o LLM
         try:
-            import google.generativeai as genai
-            genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-            model = genai.GenerativeModel('gemini-1.5-flash')
-            response = model.generate_content(relatorio_prompt)
-            relatorio_detalhado = response.text
-        except Exception as e2:
-            relatorio_detalhado = f"Erro ao gerar relatório: {str(e2)}"
-    
-    # Salva evidências do teste
-    evidencia_conteudo = f"""
-TESTE AUTOMATIZADO - BIBLIOTECH
-Data/Hora: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-Timestamp: {timestamp}
-
-TAREFA EXECUTADA:
-{task}
-
-RESULTADO DA EXECUÇÃO:
-{resultado}
-
-RELATÓRIO DETALHADO:
-{relatorio_detalhado}
-
-PROMPT DE RELATÓRIO ORIGINAL:
-{prompt_relatorio}
-"""
-    
-    # Salva as evidências em arquivo txt
-    salvar_evidencia(evidencias_dir, evidencia_conteudo, f"evidencias_teste_{timestamp}")
-    
-    # Salva também apenas o relatório detalhado
-    salvar_evidencia(evidencias_dir, relatorio_detalhado, f"relatorio_detalhado_{timestamp}")
+            execucao.relatorio_detalhado = await execucao.relatorio.gerar(resultado, prompt_relatorio)
+        except CacheMissError:
+            # No modo replay nenhuma chamada de API pode ser feita
+            raise
+        except Exception as e:
+            # Se falhar, chama a API REST do Gemini diretamente (cliente assíncrono)
+            try:
+                execucao.relatorio_detalhado = await gerar_texto_gemini(
+                    f"{prompt_relatorio}\n\nDADOS DA EXECUÇÃO:\n{dados_compactos(resultado, task)}"
+                )
+            except Exception as e2:
+                execucao.relatorio_detalhado = f"Erro ao gerar relatório: {str(e2)}"
+        # Fecha o cliente REST compartilhado do fallback, se chegou a ser aberto
+        await fechar_cliente_compartilhado()
     
     print(f"\nTeste concluído! Evidências salvas em: {evidencias_dir}")
     print("Arquivos gerados:")
     print(f"- evidencias_teste_{timestamp}.txt")
     print(f"- relatorio_detalhado_{timestamp}.txt")
-    print(f"- Screenshots (se capturados)")
+    print(f"- trace_{timestamp}.json")
+    print(f"- passos.jsonl")
+    print(f"- metricas.json / metricas.prom")
+    print(f"- screenshots/ (manifesto.json)")
 
 if __name__ == "__main__":
     # Executa a função principal de forma assíncrona
@@ -7,9 +7,14 @@ import os
 from dotenv import load_dotenv
 import asyncio
 import datetime
-import base64
 from pathlib import Path
 
+from cache_llm import envolver_com_cache, CacheMissError
+from limitador_taxa import limitar_taxa
+from replay_trace import exportar_trace
+from evidencias_stream import ExecucaoComEvidencias
+from planejador_tarefas import planejamento_ativo, explorar_em_paralelo
+
 # Carrega as variáveis de ambiente do arquivo .env
 load_dotenv()
 load_dotenv('config.env')
@@ -23,22 +28,6 @@ def salvar_evidencia(evidencias_dir, conteudo, nome_arquivo):
         f.write(conteudo)
     print(f"Evidência salva: {arquivo_evidencia}")
 
-def salvar_screenshot(evidencias_dir, screenshot_data, nome_arquivo):
-    """
-    Salva screenshot em arquivo PNG
-    """
-    if screenshot_data:
-        # Remove o prefixo data:image/png;base64, se existir
-        if ',' in screenshot_data:
-            screenshot_data = screenshot_data.split(',')[1]
-        
-        # Decodifica base64 e salva
-        screenshot_bytes = base64.b64decode(screenshot_data)
-        arquivo_screenshot = Path(evidencias_dir) / f"{nome_arquivo}.png"
-        with open(arquivo_screenshot, 'wb') as f:
-            f.write(screenshot_bytes)
-        print(f"Screenshot salvo: {arquivo_screenshot}")
-
 def configurar_gpt():
     """
     Configura o OpenAI GPT exclusivamente
@@ -61,7 +50,8 @@ def configurar_gpt():
             temperature=0.7
         )
         print(f"✅ OpenAI GPT configurado com sucesso! Modelo: {modelo}")
-        return llm
+        # Chamadas de todos os agentes do processo dentro de OPENAI_RPM/OPENAI_TPM
+        return limitar_taxa(llm, 'openai')
         
     except ImportError:
         print("❌ Erro: ChatOpenAI não disponível")
@@ -71,14 +61,20 @@ def configurar_gpt():
         print(f"❌ Erro ao configurar OpenAI GPT: {e}")
         return None
 
+def configurar_llm():
+    """
+    OpenAI GPT com cache (se LLM_CACHE estiver ligado); também recria o LLM nos processos do planejador
+    """
+    return envolver_com_cache(configurar_gpt())
+
 async def main():
     """
     Função principal que executa o agente com OpenAI GPT
     """
     print("🚀 Iniciando agente Browser Use com OpenAI GPT...")
     
-    # Configura o OpenAI GPT
-    llm = configurar_gpt()
+    # Configura o OpenAI GPT (com cache se LLM_CACHE estiver ligado)
+    llm = configurar_llm()
     if not llm:
         print("❌ Não foi possível configurar o OpenAI GPT")
         return
@@ -118,6 +114,11 @@ async def main():
             10. **SCORE GERAL:** Avaliação de 1-10 por aspecto e geral.
             """
     
+    # Com PLANEJADOR_TAREFAS ligado, cada funcionalidade é explorada por um agente próprio, em paralelo
+    if planejamento_ativo():
+        await explorar_em_paralelo(task, llm, prompt_relatorio, criar_llm=configurar_llm)
+        return
+    
     # Criar pasta de evidências com timestamp
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     evidencias_dir = f"evidencias/teste_gpt_{timestamp}"
@@ -126,62 +127,39 @@ async def main():
     print(f"📁 Evidências serão salvas em: {evidencias_dir}")
     print(f"🎯 Tarefa: {task[:100]}...")
     
-    # Cria o agente com a tarefa e o LLM
-    agent = Agent(task=task, llm=llm)
-    
-    # Executa o agente e captura o resultado
-    resultado = await agent.run()
-    
-    # Gera relatório detalhado usando o LLM
-    print("\nGerando relatório detalhado...")
-    relatorio_prompt = f"""
-{prompt_relatorio}
-
-DADOS DA EXECUÇÃO:
-- Tarefa: {task}
-- Resultado: {resultado}
-- Data/Hora: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-
-Por favor, gere um relatório completo baseado nos dados acima.
-"""
-    
-    # Gera o relatório usando o LLM
-    try:
-        relatorio_resposta = await llm.ainvoke(relatorio_prompt)
-        relatorio_detalhado = relatorio_resposta.content
-    except Exception as e:
-        relatorio_detalhado = f"Erro ao gerar relatório: {str(e)}"
-    
-    # Salva evidências do teste
-    evidencia_conteudo = f"""
-TESTE AUTOMATIZADO - BIBLIOTECH COM OPENAI GPT
-Data/Hora: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-Timestamp: {timestamp}
-
-TAREFA EXECUTADA:
-{task}
-
-RESULTADO DA EXECUÇÃO:
-{resultado}
-
-RELATÓRIO DETALHADO:
-{relatorio_detalhado}
-
-PROMPT DE RELATÓRIO ORIGINAL:
-{prompt_relatorio}
-"""
-    
-    # Salva as evidências em arquivo txt
-    salvar_evidencia(evidencias_dir, evidencia_conteudo, f"evidencias_teste_gpt_{timestamp}")
-    
-    # Salva também apenas o relatório detalhado
-    salvar_evidencia(evidencias_dir, relatorio_detalhado, f"relatorio_detalhado_gpt_{timestamp}")
+    # Grava as evidências passo a passo enquanto o agente executa (stream, métricas, screenshots e recursos
+    # opcionais); na saída do bloco, mesmo com erro, as evidências são fechadas e renderizadas
+    async with ExecucaoComEvidencias(evidencias_dir, llm, task, f"evidencias_teste_gpt_{timestamp}",
+                                     f"relatorio_detalhado_gpt_{timestamp}", execucao='agentGPT',
+                                     titulo='TESTE AUTOMATIZADO - BIBLIOTECH COM OPENAI GPT',
+                                     timestamp=timestamp, prompt_relatorio=prompt_relatorio) as execucao:
+        # Cria o agente com a tarefa e o LLM e executa
+        agent = Agent(task=task, llm=execucao.envolver_llm(llm))
+        resultado = await execucao.executar(agent)
+        
+        # Exporta o trace de ações para reexecução sem LLM (python replay_trace.py <trace>)
+        exportar_trace(resultado, Path(evidencias_dir) / f"trace_gpt_{timestamp}.json", task)
+        
+        # Gera relatório detalhado usando o LLM (resumos por funcionalidade + chamada final)
+        print("\nGerando relatório detalhado...")
+        
+        # Gera o relatório usando o LLM
+        try:
+            execucao.relatorio_detalhado = await execucao.relatorio.gerar(resultado, prompt_relatorio)
+        except CacheMissError:
+            # No modo replay nenhuma chamada de API pode ser feita
+            raise
+        except Exception as e:
+            execucao.relatorio_detalhado = f"Erro ao gerar relatório: {str(e)}"
     
     print(f"\nTeste concluído! Evidências salvas em: {evidencias_dir}")
     print("Arquivos gerados:")
     print(f"- evidencias_teste_gpt_{timestamp}.txt")
     print(f"- relatorio_detalhado_gpt_{timestamp}.txt")
-    print(f"- Screenshots (se capturados)")
+    print(f"- trace_gpt_{timestamp}.json")
+    print(f"- passos.jsonl")
+    print(f"- metricas.json / metricas.prom")
+    print(f"- screenshots/ (manifesto.json)")
 
 if __name__ == "__main__":
     # Executa a função principal de forma assíncrona
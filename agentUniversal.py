@@ -4,6 +4,14 @@ import asyncio
 import datetime
 from pathlib import Path
 
+from cache_llm import envolver_com_cache, CacheMissError
+from limitador_taxa import limitar_taxa
+from roteador_llm import criar_roteador
+from replay_trace import exportar_trace
+from evidencias_stream import ExecucaoComEvidencias
+from relatorio_mapreduce import dados_compactos
+from cliente_gemini_async import gerar_texto_gemini, fechar_cliente_compartilhado
+
 # Carrega variáveis de ambiente
 load_dotenv()
 load_dotenv('config.env')  # Carrega também o arquivo de configuração
@@ -19,44 +27,61 @@ def configurar_llm():
     """
     modelo_padrao = os.getenv('DEFAULT_MODEL', 'gemini').lower()
     
-    if modelo_padrao == 'gpt':
-        return configurar_gpt()
+    if os.getenv('ROTEADOR_LLM', 'desligado').lower() == 'ligado':
+        # Gemini e OpenAI juntos, com hedging e disjuntor; DEFAULT_MODEL define o principal
+        provedores = [('gemini', configurar_gemini), ('gpt', configurar_gpt)]
+        if modelo_padrao == 'gpt':
+            provedores.reverse()
+        llm = criar_roteador([(nome, configurar()) for nome, configurar in provedores])
+    elif modelo_padrao == 'gpt':
+        llm = configurar_gpt()
     else:
-        return configurar_gemini()
+        llm = configurar_gemini()
+    
+    # Envolve com o cache de respostas se LLM_CACHE estiver ligado
+    return envolver_com_cache(llm)
 
 def configurar_gemini():
     """
     Configura o Google Gemini
     """
     api_key = os.getenv('GEMINI_API_KEY')
-    if not api_key or api_key == 'your_gemini_api_key_here':
+    # GEMINI_BASE_URL aponta para outro servidor compatível (por exemplo, servidor_llm_mock.py)
+    base_url = os.getenv('GEMINI_BASE_URL')
+    if not base_url and (not api_key or api_key == 'your_gemini_api_key_here'):
         print("❌ GEMINI_API_KEY não configurada no config.env")
         return None
     
-    os.environ['GOOGLE_API_KEY'] = api_key
+    os.environ['GOOGLE_API_KEY'] = api_key or 'local'
     from browser_use import ChatGoogle
     modelo = os.getenv('BROWSER_USE_MODEL', 'gemini-2.0-flash-exp')
+    if base_url:
+        print(f"🤖 Usando Google Gemini: {modelo} em {base_url}")
+        return limitar_taxa(ChatGoogle(model=modelo, http_options={'base_url': base_url}), 'gemini')
     print(f"🤖 Usando Google Gemini: {modelo}")
-    return ChatGoogle(model=modelo)
+    return limitar_taxa(ChatGoogle(model=modelo), 'gemini')
 
 def configurar_gpt():
     """
     Configura o OpenAI GPT
     """
     api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key or api_key == 'your_openai_api_key_here':
+    # OPENAI_BASE_URL aponta para outro servidor compatível (por exemplo, servidor_llm_mock.py)
+    base_url = os.getenv('OPENAI_BASE_URL') or None
+    if not base_url and (not api_key or api_key == 'your_openai_api_key_here'):
         print("❌ OPENAI_API_KEY não configurada no config.env")
         return None
     
     try:
         from browser_use import ChatOpenAI
         modelo = os.getenv('OPENAI_MODEL', 'gpt-4o')
-        print(f"🤖 Usando OpenAI GPT: {modelo}")
-        return ChatOpenAI(
+        print(f"🤖 Usando OpenAI GPT: {modelo}" + (f" em {base_url}" if base_url else ""))
+        return limitar_taxa(ChatOpenAI(
             model=modelo,
-            api_key=api_key,
+            api_key=api_key or 'local',
+            base_url=base_url,
             temperature=0.7
-        )
+        ), 'openai')
     except ImportError:
         print("❌ Erro: ChatOpenAI não disponível. Instale: pip install openai")
         return None
@@ -76,39 +101,33 @@ async def main():
     evidencias_dir = f"evidencias/teste_{timestamp}"
     os.makedirs(evidencias_dir, exist_ok=True)
     
-    agent = Agent(task=task, llm=llm)
-    resultado = await agent.run()
-    
-    relatorio_prompt = f"""Gere relatório conciso sobre teste no Bibliotech:
+    prompt_relatorio = """Gere relatório conciso sobre teste no Bibliotech:
 1. Ações executadas e status
 2. Funcionalidades testadas
 3. Problemas encontrados
 4. Score geral (1-10)
-5. Recomendações principais
-
-Dados: {resultado}"""
+5. Recomendações principais"""
     
-    try:
-        relatorio_resposta = await llm.ainvoke(relatorio_prompt)
-        relatorio_detalhado = relatorio_resposta.content
-    except Exception:
+    async with ExecucaoComEvidencias(evidencias_dir, llm, task, f"evidencias_teste_{timestamp}",
+                                     f"relatorio_detalhado_{timestamp}", execucao='agentUniversal',
+                                     titulo='TESTE BIBLIOTECH', timestamp=timestamp) as execucao:
+        agent = Agent(task=task, llm=execucao.envolver_llm(llm))
+        resultado = await execucao.executar(agent)
+        exportar_trace(resultado, Path(evidencias_dir) / f"trace_{timestamp}.json", task)
+        
         try:
-            import google.generativeai as genai
-            genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-            model = genai.GenerativeModel('gemini-1.5-flash')
-            response = model.generate_content(relatorio_prompt)
-            relatorio_detalhado = response.text
-        except Exception as e:
-            relatorio_detalhado = f"Erro ao gerar relatório: {str(e)}"
-    
-    evidencia_conteudo = f"""TESTE BIBLIOTECH - {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
-
-TAREFA: {task}
-RESULTADO: {resultado}
-RELATÓRIO: {relatorio_detalhado}"""
-    
-    salvar_evidencia(evidencias_dir, evidencia_conteudo, f"evidencias_teste_{timestamp}")
-    salvar_evidencia(evidencias_dir, relatorio_detalhado, f"relatorio_detalhado_{timestamp}")
+            execucao.relatorio_detalhado = await execucao.relatorio.gerar(resultado, prompt_relatorio)
+        except CacheMissError:
+            # No modo replay nenhuma chamada de API pode ser feita
+            raise
+        except Exception:
+            try:
+                execucao.relatorio_detalhado = await gerar_texto_gemini(
+                    f"{prompt_relatorio}\n\nDados:\n{dados_compactos(resultado, task)}")
+            except Exception as e:
+                execucao.relatorio_detalhado = f"Erro ao gerar relatório: {str(e)}"
+        # Fecha o cliente REST compartilhado do fallback, se chegou a ser aberto
+        await fechar_cliente_compartilhado()
     
     print(f"Teste concluído - Evidências: {evidencias_dir}")
 
@@ -0,0 +1,298 @@
+"""
+Benchmark offline do próprio projeto
+Roda agentes contra a réplica local do Bibliotech (bibliotech_local.py) com o modelo
+roteirizado (llm_roteirizado.py), sem rede nem APIs pagas, e mede passos por segundo,
+tempo total, pico de memória (RSS) e o tempo gasto gravando as evidências para 1, 4 e 16
+agentes simultâneos. Com --referencia, compara com um resultado anterior e acusa regressões.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import datetime
+import tempfile
+import threading
+from pathlib import Path
+
+# Sem telemetria e com menos log: o benchmark não deve acessar a rede nem medir o terminal
+os.environ.setdefault('ANONYMIZED_TELEMETRY', 'false')
+os.environ.setdefault('BROWSER_USE_LOGGING_LEVEL', 'warning')
+
+from dotenv import load_dotenv
+
+from bibliotech_local import iniciar_servidor, EMAIL_PADRAO, SENHA_PADRAO
+from llm_roteirizado import ChatRoteirizado
+from evidencias_stream import GravadorEvidencias, registro_de_fim, renderizar_arquivos, encadear_hooks
+from relatorio_incremental import RelatorioIncremental
+from screenshots_evidencias import PipelineScreenshots
+from instrumentacao import MetricasExecucao
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Carrega as variáveis de ambiente do arquivo .env
+load_dotenv()
+load_dotenv('config.env')
+
+TAREFA_BENCHMARK = ("Acesse a aplicação Bibliotech em {url}/login "
+                    f"Realize login com email: {EMAIL_PADRAO} e senha: {SENHA_PADRAO} "
+                    "Explore busca, empréstimo, devolução, reserva e perfil, e faça logout. "
+                    "Gere cenários de teste em formato Gherkin (Given-When-Then)")
+
+PROMPT_RELATORIO_BENCHMARK = """Gere relatório conciso sobre a exploração do Bibliotech:
+1. Ações executadas e status
+2. Cenários Gherkin
+3. Score geral (1-10)"""
+
+# Métricas comparadas com a referência: nome -> True se um valor maior for pior
+METRICAS_COMPARADAS = {
+    'passos_por_s': False,
+    'tempo_total_s': True,
+    'rss_pico_mb': True,
+    'escrita_evidencias_s': True,
+}
+
+
+class MedidorMemoria:
+    """
+    Amostra em uma thread o RSS do processo somado ao dos filhos (os navegadores) e guarda o pico.
+    Sem psutil, usa o ru_maxrss do próprio processo Python.
+    """
+
+    def __init__(self, intervalo_s=0.2):
+        self.intervalo_s = intervalo_s
+        self.pico = 0
+        self._parar = threading.Event()
+        self._thread = None
+
+    def _amostra(self):
+        if psutil is None:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        processo = psutil.Process()
+        total = processo.memory_info().rss
+        for filho in processo.children(recursive=True):
+            try:
+                total += filho.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+
+    def _medir(self):
+        while not self._parar.is_set():
+            self.pico = max(self.pico, self._amostra())
+            self._parar.wait(self.intervalo_s)
+
+    def __enter__(self):
+        self.pico = self._amostra()
+        self._thread = threading.Thread(target=self._medir, name='medidor-memoria', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        self._thread.join()
+
+
+class Cronometro:
+    """
+    Soma o tempo gasto em trechos e hooks de gravação das evidências
+    """
+
+    def __init__(self):
+        self.total_s = 0.0
+
+    def medir(self, hook):
+        async def medido(agent):
+            inicio = time.perf_counter()
+            try:
+                await hook(agent)
+            finally:
+                self.total_s += time.perf_counter() - inicio
+        return medido
+
+    async def __aenter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.total_s += time.perf_counter() - self._inicio
+
+
+async def executar_agente(indice, url_base, pasta, latencia_s=0.0, max_passos=30, headless=True):
+    """
+    Um agente completo, como em agent.py: execução, screenshots, métricas, relatório e evidências
+    """
+    from browser_use import Agent, BrowserSession
+
+    evidencias_dir = Path(pasta) / f"agente_{indice:02d}"
+    os.makedirs(evidencias_dir, exist_ok=True)
+    tarefa = TAREFA_BENCHMARK.format(url=url_base)
+    escrita = Cronometro()
+
+    gravador = GravadorEvidencias(evidencias_dir)
+    gravador.iniciar()
+    gravador.registrar({'tipo': 'inicio', 'titulo': f"BENCHMARK OFFLINE - AGENTE {indice}",
+                        'timestamp': datetime.datetime.now().strftime("%Y%m%d_%H%M%S"), 'tarefa': tarefa})
+
+    llm = ChatRoteirizado(url_base, latencia_s=latencia_s)
+    metricas = MetricasExecucao()
+    screenshots = PipelineScreenshots(evidencias_dir, gravador)
+    relatorio = RelatorioIncremental(metricas.envolver_llm(llm, fase='relatorio'), tarefa, ativo=False)
+
+    inicio = time.perf_counter()
+    agent = Agent(task=tarefa, llm=metricas.envolver_llm(llm),
+                  browser_session=BrowserSession(headless=headless, user_data_dir=None))
+    metricas.instrumentar_agente(agent)
+    resultado = await agent.run(max_steps=max_passos, on_step_start=metricas.iniciar_passo,
+                                on_step_end=encadear_hooks(escrita.medir(gravador.registrar_passo),
+                                                           metricas.registrar_passo,
+                                                           escrita.medir(screenshots.registrar_passo)))
+    agente_s = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    texto_relatorio = await relatorio.gerar(resultado, PROMPT_RELATORIO_BENCHMARK)
+    relatorio_s = time.perf_counter() - inicio
+
+    async with escrita:
+        gravador.registrar(registro_de_fim(resultado))
+        await screenshots.fechar()
+        gravador.registrar({'tipo': 'relatorio', 'texto': texto_relatorio})
+        gravador.registrar(metricas.salvar(evidencias_dir, execucao=f"benchmark_{indice}"))
+        await gravador.fechar(indexar=False)
+        renderizar_arquivos(gravador.caminho, "evidencias_benchmark", "relatorio_benchmark")
+
+    return {
+        'agente': indice,
+        'passos': resultado.number_of_steps(),
+        'sucesso': bool(resultado.is_successful()),
+        'agente_s': round(agente_s, 3),
+        'relatorio_s': round(relatorio_s, 3),
+        'escrita_evidencias_s': round(escrita.total_s, 3),
+    }
+
+
+async def medir_rodada(agentes, url_base, pasta, latencia_s=0.0, max_passos=30, headless=True):
+    """
+    Roda N agentes simultâneos e consolida as medidas da rodada
+    """
+    pasta_rodada = Path(pasta) / f"{agentes:02d}_agentes"
+    with MedidorMemoria() as memoria:
+        inicio = time.perf_counter()
+        resultados = await asyncio.gather(
+            *(executar_agente(i, url_base, pasta_rodada, latencia_s, max_passos, headless) for i in range(agentes)),
+            return_exceptions=True)
+        tempo_total = time.perf_counter() - inicio
+
+    falhas = [r for r in resultados if isinstance(r, BaseException)]
+    for erro in falhas:
+        print(f"⚠️ Agente falhou na rodada de {agentes}: {erro}")
+    concluidos = [r for r in resultados if not isinstance(r, BaseException)]
+    passos = sum(r['passos'] for r in concluidos)
+    escrita = sum(r['escrita_evidencias_s'] for r in concluidos)
+    return {
+        'agentes': agentes,
+        'concluidos': len(concluidos),
+        'sucesso': sum(1 for r in concluidos if r['sucesso']),
+        'passos': passos,
+        'tempo_total_s': round(tempo_total, 3),
+        'passos_por_s': round(passos / tempo_total, 3) if tempo_total else 0.0,
+        'rss_pico_mb': round(memoria.pico / 1024 / 1024, 1),
+        'escrita_evidencias_s': round(escrita / max(len(concluidos), 1), 3),
+        'relatorio_s': round(sum(r['relatorio_s'] for r in concluidos) / max(len(concluidos), 1), 3),
+        'por_agente': concluidos,
+    }
+
+
+def imprimir_resultados(rodadas):
+    print("\n📊 Benchmark offline")
+    print(f"{'agentes':>8} {'passos':>7} {'passos/s':>9} {'total (s)':>10} {'RSS pico (MB)':>14} "
+          f"{'evidências/agente (s)':>22} {'ok':>5}")
+    for r in rodadas:
+        print(f"{r['agentes']:>8} {r['passos']:>7} {r['passos_por_s']:>9} {r['tempo_total_s']:>10} "
+              f"{r['rss_pico_mb']:>14} {r['escrita_evidencias_s']:>22} {r['sucesso']:>2}/{r['agentes']:<2}")
+
+
+def comparar(rodadas, referencia, tolerancia):
+    """
+    Lista as métricas que pioraram mais que a tolerância (fração) em relação à referência
+    """
+    anteriores = {r['agentes']: r for r in referencia.get('rodadas', [])}
+    regressoes = []
+    for atual in rodadas:
+        anterior = anteriores.get(atual['agentes'])
+        if not anterior:
+            continue
+        for metrica, maior_e_pior in METRICAS_COMPARADAS.items():
+            antes, agora = anterior.get(metrica), atual.get(metrica)
+            if not antes or agora is None:
+                continue
+            variacao = (agora - antes) / antes
+            if (variacao if maior_e_pior else -variacao) > tolerancia:
+                regressoes.append(f"{atual['agentes']} agente(s): {metrica} {antes} → {agora} ({variacao:+.0%})")
+    return regressoes
+
+
+async def executar_benchmark(niveis, latencia_s=0.0, max_passos=30, headless=True, pasta=None):
+    servidor, url_base = iniciar_servidor()
+    print(f"📚 Bibliotech local em {url_base}")
+    pasta = Path(pasta or tempfile.mkdtemp(prefix='benchmark_bibliotech_'))
+    try:
+        rodadas = []
+        for agentes in niveis:
+            print(f"▶️  Rodada com {agentes} agente(s)")
+            rodadas.append(await medir_rodada(agentes, url_base, pasta, latencia_s, max_passos, headless))
+        return rodadas, pasta
+    finally:
+        servidor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline com o Bibliotech local e o modelo roteirizado")
+    parser.add_argument('--agentes', type=int, nargs='+', default=[1, 4, 16],
+                        help="Quantidades de agentes simultâneos (padrão: 1 4 16)")
+    parser.add_argument('--latencia-llm', type=float, default=0.0,
+                        help="Atraso simulado de cada resposta do modelo, em segundos")
+    parser.add_argument('--max-passos', type=int, default=30)
+    parser.add_argument('--com-janela', action='store_true', help="Abre os navegadores com janela")
+    parser.add_argument('--manter-evidencias', metavar='PASTA',
+                        help="Grava as evidências dos agentes nesta pasta em vez de uma pasta temporária")
+    parser.add_argument('--saida', default=None, help="Arquivo JSON do resultado (padrão: evidencias/benchmarks/)")
+    parser.add_argument('--referencia', help="Resultado anterior para comparar")
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help="Piora aceita em relação à referência (fração, padrão 0.2)")
+    args = parser.parse_args()
+
+    rodadas, pasta = asyncio.run(executar_benchmark(args.agentes, args.latencia_llm, args.max_passos,
+                                                    not args.com_janela, args.manter_evidencias))
+    if not args.manter_evidencias:
+        shutil.rmtree(pasta, ignore_errors=True)
+    imprimir_resultados(rodadas)
+
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    saida = Path(args.saida or Path('evidencias') / 'benchmarks' / f"benchmark_{timestamp}.json")
+    os.makedirs(saida.parent, exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump({'timestamp': timestamp, 'latencia_llm_s': args.latencia_llm, 'rodadas': rodadas},
+                  f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Resultado salvo em {saida}")
+
+    if args.referencia:
+        with open(args.referencia, encoding='utf-8') as f:
+            regressoes = comparar(rodadas, json.load(f), args.tolerancia)
+        if regressoes:
+            print("❌ Regressões em relação à referência:")
+            for linha in regressoes:
+                print(f"   - {linha}")
+            sys.exit(1)
+        print("✅ Nenhuma regressão em relação à referência")
+
+
+if __name__ == "__main__":
+    main()
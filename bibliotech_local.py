@@ -0,0 +1,281 @@
+"""
+Réplica local e simplificada do Bibliotech para benchmarks e testes sem rede
+Serve as telas de login, catálogo, empréstimo, devolução, reserva e perfil com o
+http.server da biblioteca padrão; o estado de cada usuário fica em memória, por cookie.
+"""
+
+import html
+import uuid
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+EMAIL_PADRAO = "thegoldengrace@gmail.com"
+SENHA_PADRAO = "123456"
+
+LIVROS = [
+    (1, "Dom Casmurro", "Machado de Assis"),
+    (2, "O Cortiço", "Aluísio Azevedo"),
+    (3, "Grande Sertão: Veredas", "João Guimarães Rosa"),
+    (4, "Vidas Secas", "Graciliano Ramos"),
+    (5, "Capitães da Areia", "Jorge Amado"),
+    (6, "A Hora da Estrela", "Clarice Lispector"),
+    (7, "Memórias Póstumas de Brás Cubas", "Machado de Assis"),
+    (8, "Macunaíma", "Mário de Andrade"),
+    (9, "O Quinze", "Rachel de Queiroz"),
+    (10, "Iracema", "José de Alencar"),
+    (11, "Quincas Borba", "Machado de Assis"),
+    (12, "Triste Fim de Policarpo Quaresma", "Lima Barreto"),
+]
+# Livros que começam emprestados por outro usuário (só podem ser reservados)
+INDISPONIVEIS = {3, 8, 12}
+
+ESTILO = ("body{font-family:sans-serif;margin:2em}nav a{margin-right:1em}"
+          "table{border-collapse:collapse}td,th{padding:.3em .8em;border-bottom:1px solid #ddd}"
+          ".aviso{color:#a00}.ok{color:#070}")
+
+
+class EstadoUsuario:
+    def __init__(self):
+        self.emprestimos = set()
+        self.reservas = set()
+        self.nome = "Leitor Bibliotech"
+        self.telefone = ""
+
+
+class Bibliotech:
+    """
+    Estado compartilhado do servidor: sessões abertas e usuários (um por sessão)
+    """
+
+    def __init__(self, email=EMAIL_PADRAO, senha=SENHA_PADRAO):
+        self.email = email
+        self.senha = senha
+        self.sessoes = {}
+        self.trava = threading.Lock()
+
+    def usuario(self, sessao):
+        with self.trava:
+            return self.sessoes.get(sessao)
+
+    def entrar(self, email, senha):
+        if email != self.email or senha != self.senha:
+            return None
+        sessao = uuid.uuid4().hex
+        with self.trava:
+            self.sessoes[sessao] = EstadoUsuario()
+        return sessao
+
+    def sair(self, sessao):
+        with self.trava:
+            self.sessoes.pop(sessao, None)
+
+
+def _pagina(titulo, corpo, logado=True, mensagem=None):
+    nav = ""
+    if logado:
+        nav = ('<nav><a id="menu-catalogo" href="/catalogo">Catálogo</a>'
+               '<a id="menu-emprestimos" href="/emprestimos">Meus empréstimos</a>'
+               '<a id="menu-perfil" href="/perfil">Perfil</a>'
+               '<a id="menu-sair" href="/logout">Sair</a></nav>')
+    if mensagem:
+        classe, texto = mensagem
+        nav += f'<p class="{classe}">{html.escape(texto)}</p>'
+    return (f'<!doctype html><html lang="pt-br"><head><meta charset="utf-8"><title>Bibliotech - {titulo}</title>'
+            f'<style>{ESTILO}</style></head><body>{nav}<h1>{titulo}</h1>{corpo}</body></html>')
+
+
+class ManipuladorBibliotech(BaseHTTPRequestHandler):
+    """
+    Rotas da réplica. Formulários aceitam GET e POST, para que um roteiro
+    possa navegar direto pela URL quando não encontrar o elemento na tela.
+    """
+
+    app = None
+    server_version = "BibliotechLocal/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self._atender()
+
+    def do_POST(self):
+        self._atender()
+
+    def _parametros(self):
+        url = urlsplit(self.path)
+        parametros = {k: v[0] for k, v in parse_qs(url.query).items()}
+        tamanho = int(self.headers.get('Content-Length') or 0)
+        if tamanho:
+            corpo = self.rfile.read(tamanho).decode('utf-8')
+            parametros.update({k: v[0] for k, v in parse_qs(corpo).items()})
+        return url.path.rstrip('/') or '/', parametros
+
+    def _sessao(self):
+        for parte in (self.headers.get('Cookie') or '').split(';'):
+            nome, _, valor = parte.strip().partition('=')
+            if nome == 'sessao':
+                return valor
+        return None
+
+    def _responder(self, conteudo, status=200, cabecalhos=None):
+        dados = conteudo.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(dados)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _redirecionar(self, destino, cabecalhos=None):
+        self._responder('', 303, {'Location': destino, **(cabecalhos or {})})
+
+    def _atender(self):
+        caminho, parametros = self._parametros()
+        sessao = self._sessao()
+        usuario = self.app.usuario(sessao) if sessao else None
+
+        if caminho in ('/', '/login'):
+            return self._login(parametros)
+        if usuario is None:
+            return self._redirecionar('/login')
+        if caminho == '/logout':
+            self.app.sair(sessao)
+            return self._redirecionar('/login', {'Set-Cookie': 'sessao=; Max-Age=0; Path=/'})
+
+        partes = caminho.strip('/').split('/')
+        if partes[0] == 'catalogo':
+            return self._catalogo(usuario, parametros)
+        if partes[0] == 'emprestimos':
+            return self._emprestimos(usuario)
+        if partes[0] == 'perfil':
+            return self._perfil(usuario, parametros)
+        if partes[0] in ('emprestar', 'devolver', 'reservar') and len(partes) == 2 and partes[1].isdigit():
+            return self._operacao(usuario, partes[0], int(partes[1]))
+        self._responder(_pagina("Página não encontrada", "<p>A página solicitada não existe.</p>"), 404)
+
+    def _login(self, parametros):
+        mensagem = None
+        if 'email' in parametros or 'senha' in parametros:
+            email, senha = parametros.get('email', ''), parametros.get('senha', '')
+            if not email or not senha:
+                mensagem = ('aviso', 'Preencha email e senha')
+            elif '@' not in email:
+                mensagem = ('aviso', 'Email inválido')
+            else:
+                sessao = self.app.entrar(email, senha)
+                if sessao:
+                    return self._redirecionar('/catalogo', {'Set-Cookie': f'sessao={sessao}; Path=/; HttpOnly'})
+                mensagem = ('aviso', 'Email ou senha incorretos')
+        corpo = ('<form id="form-login" method="post" action="/login">'
+                 '<p><label>Email <input id="email" name="email" type="email" placeholder="Email"></label></p>'
+                 '<p><label>Senha <input id="senha" name="senha" type="password" placeholder="Senha"></label></p>'
+                 '<button id="entrar" type="submit">Entrar</button></form>')
+        self._responder(_pagina("Login", corpo, logado=False, mensagem=mensagem))
+
+    def _catalogo(self, usuario, parametros):
+        busca = parametros.get('busca', '').strip().lower()
+        linhas = []
+        for codigo, titulo, autor in LIVROS:
+            if busca and busca not in titulo.lower() and busca not in autor.lower():
+                continue
+            if codigo in usuario.emprestimos:
+                situacao, acao = "Emprestado a você", ""
+            elif codigo in INDISPONIVEIS:
+                situacao = "Indisponível"
+                acao = (f'<a id="reservar-{codigo}" href="/reservar/{codigo}">Reservar</a>'
+                        if codigo not in usuario.reservas else "Reservado")
+            else:
+                situacao, acao = "Disponível", f'<a id="emprestar-{codigo}" href="/emprestar/{codigo}">Emprestar</a>'
+            linhas.append(f'<tr><td>{html.escape(titulo)}</td><td>{html.escape(autor)}</td>'
+                          f'<td>{situacao}</td><td>{acao}</td></tr>')
+        tabela = ''.join(linhas) or '<tr><td colspan="4">Nenhum livro encontrado</td></tr>'
+        corpo = ('<form id="form-busca" method="get" action="/catalogo">'
+                 f'<input id="busca" name="busca" placeholder="Buscar por título ou autor" value="{html.escape(busca)}">'
+                 '<button id="buscar" type="submit">Buscar</button></form>'
+                 f'<table><tr><th>Título</th><th>Autor</th><th>Situação</th><th></th></tr>{tabela}</table>')
+        self._responder(_pagina("Catálogo", corpo))
+
+    def _emprestimos(self, usuario):
+        titulos = {codigo: titulo for codigo, titulo, _ in LIVROS}
+        linhas = ''.join(f'<li>{html.escape(titulos[c])} <a id="devolver-{c}" href="/devolver/{c}">Devolver</a></li>'
+                         for c in sorted(usuario.emprestimos))
+        reservas = ''.join(f'<li>{html.escape(titulos[c])}</li>' for c in sorted(usuario.reservas))
+        corpo = (f'<h2>Empréstimos</h2><ul>{linhas or "<li>Nenhum empréstimo ativo</li>"}</ul>'
+                 f'<h2>Reservas</h2><ul>{reservas or "<li>Nenhuma reserva</li>"}</ul>')
+        self._responder(_pagina("Meus empréstimos", corpo))
+
+    def _perfil(self, usuario, parametros):
+        mensagem = None
+        if 'nome' in parametros:
+            if not parametros['nome'].strip():
+                mensagem = ('aviso', 'O nome é obrigatório')
+            else:
+                usuario.nome = parametros['nome'].strip()
+                usuario.telefone = parametros.get('telefone', '').strip()
+                mensagem = ('ok', 'Perfil atualizado')
+        corpo = ('<form id="form-perfil" method="post" action="/perfil">'
+                 f'<p>Email: {html.escape(self.app.email)}</p>'
+                 f'<p><label>Nome <input id="nome" name="nome" value="{html.escape(usuario.nome)}"></label></p>'
+                 f'<p><label>Telefone <input id="telefone" name="telefone" value="{html.escape(usuario.telefone)}">'
+                 '</label></p><button id="salvar" type="submit">Salvar</button></form>')
+        self._responder(_pagina("Perfil", corpo, mensagem=mensagem))
+
+    def _operacao(self, usuario, operacao, codigo):
+        if codigo not in {c for c, _, _ in LIVROS}:
+            return self._responder(_pagina("Livro não encontrado", "<p>Livro inexistente.</p>"), 404)
+        if operacao == 'emprestar':
+            if codigo in INDISPONIVEIS or codigo in usuario.emprestimos:
+                mensagem = ('aviso', 'Livro indisponível para empréstimo')
+            elif len(usuario.emprestimos) >= 3:
+                mensagem = ('aviso', 'Limite de 3 empréstimos atingido')
+            else:
+                usuario.emprestimos.add(codigo)
+                mensagem = ('ok', 'Empréstimo realizado')
+        elif operacao == 'devolver':
+            if codigo in usuario.emprestimos:
+                usuario.emprestimos.discard(codigo)
+                mensagem = ('ok', 'Livro devolvido')
+            else:
+                mensagem = ('aviso', 'Este livro não está emprestado a você')
+        else:
+            if codigo in INDISPONIVEIS and codigo not in usuario.reservas:
+                usuario.reservas.add(codigo)
+                mensagem = ('ok', 'Reserva registrada')
+            else:
+                mensagem = ('aviso', 'Reserva não permitida para este livro')
+        link = '/emprestimos' if operacao != 'reservar' else '/catalogo'
+        corpo = f'<p><a id="voltar" href="{link}">Voltar</a></p>'
+        titulo = {'emprestar': "Empréstimo", 'devolver': "Devolução", 'reservar': "Reserva"}[operacao]
+        self._responder(_pagina(titulo, corpo, mensagem=mensagem))
+
+
+def iniciar_servidor(host='127.0.0.1', porta=0, email=EMAIL_PADRAO, senha=SENHA_PADRAO):
+    """
+    Sobe a réplica em uma thread. Com porta=0, o sistema escolhe uma porta livre.
+    Retorna (servidor, url_base); encerre com servidor.shutdown().
+    """
+    manipulador = type('Manipulador', (ManipuladorBibliotech,), {'app': Bibliotech(email, senha)})
+    servidor = ThreadingHTTPServer((host, porta), manipulador)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name='bibliotech-local', daemon=True).start()
+    return servidor, f"http://{host}:{servidor.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Réplica local do Bibliotech")
+    parser.add_argument('--porta', type=int, default=8765)
+    args = parser.parse_args()
+    servidor, url = iniciar_servidor(porta=args.porta)
+    print(f"📚 Bibliotech local em {url}/login (Ctrl+C para encerrar)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
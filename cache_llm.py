@@ -0,0 +1,141 @@
+"""
+Cache em disco das respostas do LLM endereçado pelo conteúdo
+Chaveia cada resposta pelo hash de modelo, temperatura e mensagens e permite
+um modo replay que só responde a partir do cache (útil no CI, sem custo de API)
+"""
+
+import os
+import json
+import hashlib
+from pathlib import Path
+
+from envelope_llm import EnvelopeLLM
+
+MODOS_CACHE = ('desligado', 'ligado', 'replay')
+
+
+class CacheMissError(Exception):
+    """Resposta não encontrada no cache durante o modo replay"""
+
+
+def _serializar_mensagens(messages):
+    if isinstance(messages, str):
+        return messages
+    return [m.model_dump(mode='json') if hasattr(m, 'model_dump') else str(m) for m in messages]
+
+
+class LLMComCache(EnvelopeLLM):
+    """
+    Envelope de cache para ChatGoogle/ChatOpenAI.
+    As entradas ficam em <diretorio>/<hash[:2]>/<hash>.json e são removidas por
+    ordem de último uso (mtime) quando o total passa de limite_mb.
+    """
+
+    def __init__(self, llm, diretorio=None, limite_mb=None, modo='ligado'):
+        super().__init__(llm)
+        if modo not in MODOS_CACHE:
+            raise ValueError(f"Modo de cache inválido: {modo} (use {', '.join(MODOS_CACHE)})")
+        self.modo = modo
+        self.diretorio = Path(diretorio or os.getenv('LLM_CACHE_DIR', '.cache/llm'))
+        self.limite_bytes = int(float(limite_mb or os.getenv('LLM_CACHE_LIMITE_MB', '500')) * 1024 * 1024)
+        self.acertos = 0
+        self.faltas = 0
+        self._tamanho_total = None
+
+    def chave(self, messages, output_format=None):
+        """
+        Hash SHA-256 de modelo, temperatura, mensagens e formato de saída
+        """
+        conteudo = {
+            'modelo': getattr(self.llm, 'model', None),
+            'temperatura': getattr(self.llm, 'temperature', None),
+            'mensagens': _serializar_mensagens(messages),
+            'formato': output_format.model_json_schema() if output_format else None,
+        }
+        bruto = json.dumps(conteudo, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(bruto.encode('utf-8')).hexdigest()
+
+    def _caminho(self, chave):
+        return self.diretorio / chave[:2] / f"{chave}.json"
+
+    def _ler(self, chave):
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, encoding='utf-8') as f:
+                entrada = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        # Atualiza o mtime para a remoção por último uso
+        os.utime(caminho)
+        return entrada
+
+    def _gravar(self, chave, resposta, output_format):
+        completion = resposta.completion
+        entrada = {
+            'modelo': getattr(self.llm, 'model', None),
+            'estruturado': output_format is not None,
+            'completion': completion.model_dump(mode='json') if output_format else completion,
+            'thinking': getattr(resposta, 'thinking', None),
+        }
+        caminho = self._caminho(chave)
+        os.makedirs(caminho.parent, exist_ok=True)
+        temporario = caminho.with_suffix('.tmp')
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(entrada, f, ensure_ascii=False)
+        os.replace(temporario, caminho)
+        self._registrar_tamanho(caminho.stat().st_size)
+
+    def _registrar_tamanho(self, incremento):
+        if self._tamanho_total is None:
+            self._tamanho_total = sum(p.stat().st_size for p in self.diretorio.glob('*/*.json'))
+        else:
+            self._tamanho_total += incremento
+        if self._tamanho_total > self.limite_bytes:
+            self.evictar()
+
+    def evictar(self):
+        """
+        Remove as entradas usadas há mais tempo até ficar em 90% do limite
+        """
+        arquivos = sorted(self.diretorio.glob('*/*.json'), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in arquivos)
+        alvo = int(self.limite_bytes * 0.9)
+        for arquivo in arquivos:
+            if total <= alvo:
+                break
+            total -= arquivo.stat().st_size
+            arquivo.unlink(missing_ok=True)
+        self._tamanho_total = total
+
+    async def ainvoke(self, messages, output_format=None):
+        chave = self.chave(messages, output_format)
+        entrada = self._ler(chave)
+        if entrada is not None:
+            from browser_use.llm.views import ChatInvokeCompletion
+
+            self.acertos += 1
+            completion = entrada['completion']
+            if output_format is not None:
+                completion = output_format.model_validate(completion)
+            # Resposta do cache não consome tokens
+            return ChatInvokeCompletion(completion=completion, thinking=entrada.get('thinking'), usage=None)
+
+        self.faltas += 1
+        if self.modo == 'replay':
+            raise CacheMissError(f"Resposta não encontrada no cache (modo replay): {chave}")
+
+        resposta = await self.llm.ainvoke(messages, output_format)
+        self._gravar(chave, resposta, output_format)
+        return resposta
+
+
+def envolver_com_cache(llm, modo=None):
+    """
+    Envolve o LLM com o cache conforme LLM_CACHE (desligado, ligado ou replay).
+    Com o cache desligado, retorna o próprio LLM.
+    """
+    modo = (modo or os.getenv('LLM_CACHE', 'desligado')).lower()
+    if not llm or modo == 'desligado':
+        return llm
+    print(f"🗄️ Cache de respostas do LLM ativo (modo: {modo})")
+    return LLMComCache(llm, modo=modo)
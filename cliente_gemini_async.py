@@ -0,0 +1,141 @@
+"""
+Cliente assíncrono da API REST do Google Gemini
+Usa um httpx.AsyncClient com conexões keep-alive reaproveitadas, timeouts e novas
+tentativas com backoff exponencial, sem bloquear o event loop dos agentes.
+"""
+
+import os
+import random
+import asyncio
+import weakref
+from dotenv import load_dotenv
+
+import httpx
+
+# Carrega as variáveis de ambiente do arquivo .env
+load_dotenv()
+load_dotenv('config.env')
+
+# GEMINI_BASE_URL troca o servidor (por exemplo, pelo servidor_llm_mock.py) mantendo o caminho da API
+URL_BASE_GEMINI = (os.getenv('GEMINI_BASE_URL') or "https://generativelanguage.googleapis.com").rstrip('/') + "/v1beta"
+
+# Respostas que valem uma nova tentativa (limite de taxa e falhas temporárias do servidor)
+STATUS_REPETIVEIS = {429, 500, 502, 503, 504}
+
+
+class ErroGeminiREST(Exception):
+    """Falha definitiva de uma chamada à API REST do Gemini"""
+
+    def __init__(self, mensagem, status=None, resposta=None):
+        super().__init__(mensagem)
+        self.status = status
+        self.resposta = resposta
+
+
+class ClienteGeminiAsync:
+    """
+    Cliente REST do Gemini para ser usado com async with.
+    As conexões do pool são mantidas abertas entre as chamadas do mesmo cliente.
+    """
+
+    def __init__(self, api_key=None, modelo='gemini-1.5-flash', timeout_s=None, tentativas=None, backoff_s=1.0,
+                 max_conexoes=10):
+        self.api_key = api_key or os.getenv('GEMINI_API_KEY')
+        self.modelo = modelo
+        self.tentativas = tentativas or int(os.getenv('GEMINI_REST_TENTATIVAS', '3'))
+        self.backoff_s = backoff_s
+        timeout_s = timeout_s or float(os.getenv('GEMINI_REST_TIMEOUT_S', '60'))
+        self._cliente = httpx.AsyncClient(
+            base_url=URL_BASE_GEMINI,
+            headers={'Content-Type': 'application/json', 'X-goog-api-key': self.api_key or ''},
+            timeout=httpx.Timeout(timeout_s, connect=10.0),
+            limits=httpx.Limits(max_connections=max_conexoes, max_keepalive_connections=max_conexoes),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.fechar()
+
+    async def fechar(self):
+        await self._cliente.aclose()
+
+    @property
+    def fechado(self):
+        return self._cliente.is_closed
+
+    def _espera(self, tentativa, resposta=None):
+        # Respeita o Retry-After do servidor; senão, backoff exponencial com jitter
+        if resposta is not None and resposta.headers.get('Retry-After', '').isdigit():
+            return float(resposta.headers['Retry-After'])
+        return self.backoff_s * (2 ** tentativa) * (0.5 + random.random())
+
+    async def gerar_conteudo(self, dados, modelo=None):
+        """
+        POST models/<modelo>:generateContent com novas tentativas; retorna o JSON da resposta
+        """
+        if not self.api_key:
+            raise ErroGeminiREST("GEMINI_API_KEY não configurada")
+        caminho = f"/models/{modelo or self.modelo}:generateContent"
+
+        for tentativa in range(self.tentativas):
+            ultima = tentativa == self.tentativas - 1
+            try:
+                resposta = await self._cliente.post(caminho, json=dados)
+            except httpx.TransportError as e:
+                if ultima:
+                    raise ErroGeminiREST(f"Falha de conexão com a API do Gemini: {e}") from e
+                await asyncio.sleep(self._espera(tentativa))
+                continue
+
+            if resposta.status_code == 200:
+                return resposta.json()
+            if resposta.status_code not in STATUS_REPETIVEIS or ultima:
+                raise ErroGeminiREST(f"Erro na API do Gemini: {resposta.status_code}",
+                                     status=resposta.status_code, resposta=resposta.text)
+            await asyncio.sleep(self._espera(tentativa, resposta))
+
+    async def gerar_texto(self, prompt, modelo=None):
+        """
+        Gera texto a partir de um prompt simples
+        """
+        dados = {'contents': [{'parts': [{'text': prompt}]}]}
+        resultado = await self.gerar_conteudo(dados, modelo)
+        try:
+            return ''.join(p.get('text', '') for p in resultado['candidates'][0]['content']['parts'])
+        except (KeyError, IndexError) as e:
+            raise ErroGeminiREST(f"Resposta sem texto da API do Gemini: {resultado}") from e
+
+
+# Um cliente compartilhado por event loop: as conexões do httpx ficam presas ao loop em que foram abertas
+_compartilhados = weakref.WeakKeyDictionary()
+
+
+def cliente_compartilhado():
+    """
+    Cliente do event loop atual, criado na primeira chamada e reaproveitado (keep-alive) nas seguintes
+    """
+    loop = asyncio.get_running_loop()
+    cliente = _compartilhados.get(loop)
+    if cliente is None or cliente.fechado:
+        cliente = _compartilhados[loop] = ClienteGeminiAsync()
+    return cliente
+
+
+async def fechar_cliente_compartilhado():
+    """
+    Fecha o cliente compartilhado do event loop atual (no fim do main); sem cliente aberto, não faz nada
+    """
+    cliente = _compartilhados.pop(asyncio.get_running_loop(), None)
+    if cliente is not None:
+        await cliente.fechar()
+
+
+async def gerar_texto_gemini(prompt, modelo='gemini-1.5-flash', cliente=None):
+    """
+    Atalho para chamadas avulsas (por exemplo, o fallback do relatório). Sem cliente, usa o
+    cliente compartilhado do event loop, fechado com fechar_cliente_compartilhado().
+    """
+    cliente = cliente or cliente_compartilhado()
+    return await cliente.gerar_texto(prompt, modelo)
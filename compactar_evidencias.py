@@ -0,0 +1,404 @@
+"""
+Compactação, deduplicação e retenção das evidências
+Execuções mais antigas que N dias são guardadas em blobs endereçados pelo hash do conteúdo
+(em evidencias/.blobs), comprimidos com zstd (se disponível) ou gzip. Trechos repetidos
+entre execuções, como a tarefa e o prompt do relatório, são armazenados uma única vez.
+Os arquivos originais podem ser lidos ou restaurados a qualquer momento.
+"""
+
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import shutil
+import hashlib
+import argparse
+from contextlib import closing
+from pathlib import Path
+from dotenv import load_dotenv
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Carrega as variáveis de ambiente do arquivo .env
+load_dotenv()
+load_dotenv('config.env')
+
+RAIZ_EVIDENCIAS = Path('evidencias')
+PASTA_BLOBS = '.blobs'
+MANIFESTO = 'compactado.json.gz'
+EXTENSOES_TEXTO = {'.txt', '.json', '.jsonl', '.md'}
+ARQUIVOS_IGNORADOS = {'indice.sqlite3', 'indice.sqlite3-journal'}
+
+# Pontos de corte do texto em trechos: parágrafos (também dentro de strings JSON) e campos JSON
+CORTES = re.compile(r'(?<=\n\n)|(?<=\\n\\n)|(?<=", ")')
+# Trechos menores que isso ficam no próprio manifesto
+TAMANHO_MINIMO_BLOB = 256
+
+
+def _comprimir(dados):
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(dados), '.zst'
+    return gzip.compress(dados, compresslevel=9), '.gz'
+
+
+def _descomprimir(dados, sufixo):
+    if sufixo == '.zst':
+        if zstandard is None:
+            raise RuntimeError("Blob comprimido com zstd; instale o pacote zstandard para lê-lo")
+        return zstandard.ZstdDecompressor().decompress(dados)
+    if sufixo == '.gz':
+        return gzip.decompress(dados)
+    return dados
+
+
+class ArmazemBlobs:
+    """
+    Blobs endereçados pelo SHA-256 do conteúdo em <raiz>/.blobs/<hash[:2]>/<hash><sufixo>
+    """
+
+    def __init__(self, raiz=RAIZ_EVIDENCIAS):
+        self.pasta = Path(raiz) / PASTA_BLOBS
+
+    def _existente(self, chave):
+        for sufixo in ('.zst', '.gz', '.bin'):
+            caminho = self.pasta / chave[:2] / f"{chave}{sufixo}"
+            if caminho.exists():
+                return caminho
+        return None
+
+    def guardar(self, dados, comprimir=True):
+        """
+        Guarda os bytes (se ainda não existirem) e retorna (hash, bytes gravados)
+        """
+        chave = hashlib.sha256(dados).hexdigest()
+        if self._existente(chave):
+            return chave, 0
+        conteudo, sufixo = _comprimir(dados) if comprimir else (dados, '.bin')
+        caminho = self.pasta / chave[:2] / f"{chave}{sufixo}"
+        os.makedirs(caminho.parent, exist_ok=True)
+        temporario = caminho.with_name(caminho.name + '.tmp')
+        temporario.write_bytes(conteudo)
+        os.replace(temporario, caminho)
+        return chave, len(conteudo)
+
+    def ler(self, chave):
+        caminho = self._existente(chave)
+        if caminho is None:
+            raise FileNotFoundError(f"Blob {chave} não encontrado em {self.pasta}")
+        return _descomprimir(caminho.read_bytes(), caminho.suffix)
+
+    def coletar_lixo(self, referenciados):
+        """
+        Remove os blobs que nenhum manifesto referencia; retorna os bytes liberados
+        """
+        liberados = 0
+        for caminho in self.pasta.glob('*/*'):
+            if caminho.name.split('.')[0] not in referenciados:
+                liberados += caminho.stat().st_size
+                caminho.unlink()
+        return liberados
+
+
+def _trechos(texto):
+    """
+    Divide o texto em trechos sem perda (''.join(trechos) == texto). Partes pequenas vizinhas
+    são juntadas, mas nunca a uma parte grande, para que ela tenha o mesmo hash em toda execução.
+    """
+    trechos, atual = [], ''
+    for parte in CORTES.split(texto):
+        if len(parte) >= TAMANHO_MINIMO_BLOB:
+            if atual:
+                trechos.append(atual)
+                atual = ''
+            trechos.append(parte)
+            continue
+        atual += parte
+        if len(atual) >= TAMANHO_MINIMO_BLOB:
+            trechos.append(atual)
+            atual = ''
+    if atual:
+        trechos.append(atual)
+    return trechos
+
+
+def e_execucao(pasta):
+    """
+    Pasta de uma execução: tem o stream de passos, os arquivos .txt de evidência ou o manifesto
+    """
+    pasta = Path(pasta)
+    return (pasta / MANIFESTO).exists() or any(pasta.glob('*.jsonl')) or any(pasta.glob('*.txt'))
+
+
+def pastas_de_execucao(raiz=RAIZ_EVIDENCIAS):
+    """
+    Pastas de execução (testes, cenários de suítes, replays), fora da pasta de blobs
+    """
+    pastas = []
+    for pasta, subpastas, _ in os.walk(raiz):
+        subpastas[:] = [s for s in subpastas if s != PASTA_BLOBS]
+        if e_execucao(pasta):
+            pastas.append(Path(pasta))
+    return pastas
+
+
+def arquivos_da_execucao(pasta):
+    """
+    Arquivos da execução: os da própria pasta e os de subpastas que não são outras
+    execuções (como screenshots/)
+    """
+    arquivos = []
+    for item in sorted(Path(pasta).iterdir()):
+        if item.is_file() and item.name not in ARQUIVOS_IGNORADOS:
+            arquivos.append(item)
+        elif item.is_dir() and item.name != PASTA_BLOBS and not e_execucao(item):
+            arquivos.extend(sorted(p for p in item.rglob('*') if p.is_file()))
+    return arquivos
+
+
+def idade_dias(pasta):
+    mtimes = [p.stat().st_mtime for p in arquivos_da_execucao(pasta) if p.name != MANIFESTO]
+    if compactada(pasta):
+        # Idade dos arquivos originais, não da compactação
+        mtimes += [e['mtime'] for e in ler_manifesto(pasta)['arquivos'].values()]
+    return (time.time() - max(mtimes)) / 86400 if mtimes else 0
+
+
+def tamanho(pasta):
+    return sum(p.stat().st_size for p in arquivos_da_execucao(pasta))
+
+
+def compactada(pasta):
+    return (Path(pasta) / MANIFESTO).exists()
+
+
+def ler_manifesto(pasta):
+    with gzip.open(Path(pasta) / MANIFESTO, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compactar_execucao(pasta, armazem):
+    """
+    Substitui os arquivos da execução pelo manifesto e pelos blobs. Retorna (bytes antes, bytes gravados).
+    """
+    pasta = Path(pasta)
+    arquivos = [a for a in arquivos_da_execucao(pasta) if a.name != MANIFESTO]
+    # Arquivos novos de uma execução já compactada entram no manifesto existente
+    anteriores = ler_manifesto(pasta)['arquivos'] if compactada(pasta) else {}
+    manifesto = {'versao': 1, 'compactado_em': time.strftime('%Y-%m-%dT%H:%M:%S'), 'arquivos': anteriores}
+    antes = gravados = 0
+
+    for arquivo in arquivos:
+        dados = arquivo.read_bytes()
+        antes += len(dados)
+        entrada = {'tamanho': len(dados), 'mtime': arquivo.stat().st_mtime, 'partes': []}
+        texto = None
+        if arquivo.suffix in EXTENSOES_TEXTO:
+            try:
+                texto = dados.decode('utf-8')
+            except UnicodeDecodeError:
+                pass
+        if texto is None:
+            # Binários (screenshots) já são comprimidos: só deduplicados
+            chave, bytes_novos = armazem.guardar(dados, comprimir=False)
+            entrada['partes'].append({'h': chave})
+            gravados += bytes_novos
+        else:
+            for trecho in _trechos(texto):
+                if len(trecho) < TAMANHO_MINIMO_BLOB:
+                    entrada['partes'].append({'t': trecho})
+                    continue
+                chave, bytes_novos = armazem.guardar(trecho.encode('utf-8'))
+                entrada['partes'].append({'h': chave})
+                gravados += bytes_novos
+        manifesto['arquivos'][arquivo.relative_to(pasta).as_posix()] = entrada
+
+    temporario = pasta / (MANIFESTO + '.tmp')
+    with gzip.open(temporario, 'wt', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False)
+    os.replace(temporario, pasta / MANIFESTO)
+    gravados += (pasta / MANIFESTO).stat().st_size
+
+    # Só remove os originais depois que o manifesto está gravado
+    for arquivo in arquivos:
+        arquivo.unlink()
+    for subpasta in sorted((p for p in pasta.iterdir() if p.is_dir() and not e_execucao(p)), reverse=True):
+        if not any(subpasta.rglob('*.*')):
+            shutil.rmtree(subpasta)
+    return antes, gravados
+
+
+def ler_arquivo(pasta, nome, armazem=None):
+    """
+    Conteúdo (bytes) de um arquivo de uma execução, compactada ou não
+    """
+    pasta = Path(pasta)
+    if not compactada(pasta) or (pasta / nome).exists():
+        return (pasta / nome).read_bytes()
+    armazem = armazem or ArmazemBlobs()
+    entrada = ler_manifesto(pasta)['arquivos'].get(nome)
+    if entrada is None:
+        raise FileNotFoundError(f"{nome} não está em {pasta}")
+    partes = []
+    for parte in entrada['partes']:
+        partes.append(parte['t'].encode('utf-8') if 't' in parte else armazem.ler(parte['h']))
+    return b''.join(partes)
+
+
+def restaurar_execucao(pasta, armazem=None):
+    """
+    Recria os arquivos originais e remove o manifesto
+    """
+    pasta = Path(pasta)
+    armazem = armazem or ArmazemBlobs()
+    manifesto = ler_manifesto(pasta)
+    for nome, entrada in manifesto['arquivos'].items():
+        destino = pasta / nome
+        os.makedirs(destino.parent, exist_ok=True)
+        destino.write_bytes(ler_arquivo(pasta, nome, armazem))
+        os.utime(destino, (entrada['mtime'], entrada['mtime']))
+    (pasta / MANIFESTO).unlink()
+    return list(manifesto['arquivos'])
+
+
+def blobs_da_execucao(pasta):
+    """
+    Hashes dos blobs referenciados pelo manifesto de uma execução compactada
+    """
+    if not compactada(pasta):
+        return set()
+    return {p['h'] for entrada in ler_manifesto(pasta)['arquivos'].values() for p in entrada['partes'] if 'h' in p}
+
+
+def _remover_execucao(pasta):
+    from indice_evidencias import conectar, id_execucao
+
+    for arquivo in arquivos_da_execucao(pasta):
+        arquivo.unlink()
+    for subpasta in (p for p in Path(pasta).iterdir() if p.is_dir() and not e_execucao(p)):
+        if not any(subpasta.rglob('*.*')):
+            shutil.rmtree(subpasta)
+    if not any(Path(pasta).iterdir()):
+        Path(pasta).rmdir()
+
+    # Tira a execução do índice das evidências
+    execucao = id_execucao(Path(pasta) / 'passos.jsonl')
+    # O with da conexão só confirma a transação; o closing fecha o arquivo do índice
+    with closing(conectar()) as conexao, conexao:
+        conexao.execute("DELETE FROM passos WHERE execucao = ?", (execucao,))
+        conexao.execute("DELETE FROM execucoes WHERE execucao = ?", (execucao,))
+        conexao.execute("DELETE FROM impressoes WHERE execucao = ?", (execucao,))
+
+
+def aplicar_politica(raiz=RAIZ_EVIDENCIAS, compactar_apos_dias=7, manter_dias=None, limite_mb=None, simular=False):
+    """
+    Remove execuções além da retenção (idade e tamanho total), compacta as mais antigas
+    que compactar_apos_dias e apaga os blobs que ficaram sem referência
+    """
+    armazem = ArmazemBlobs(raiz)
+    execucoes = sorted(((idade_dias(p), p) for p in pastas_de_execucao(raiz)), key=lambda e: -e[0])
+    resumo = {'removidas': [], 'compactadas': [], 'bytes_antes': 0, 'bytes_depois': 0, 'blobs_liberados': 0}
+
+    # Retenção por idade
+    for idade, pasta in list(execucoes):
+        if manter_dias is not None and idade > manter_dias:
+            resumo['removidas'].append(str(pasta))
+            execucoes.remove((idade, pasta))
+            if not simular:
+                _remover_execucao(pasta)
+
+    # Retenção por tamanho total (as mais antigas saem primeiro)
+    if limite_mb is not None:
+        tamanhos_blobs = {c.name.split('.')[0]: c.stat().st_size for c in armazem.pasta.glob('*/*')}
+        # Quantas execuções restantes usam cada blob: os bytes de um blob só saem do total com a última delas
+        referencias = {}
+        for _, pasta in execucoes:
+            for chave in blobs_da_execucao(pasta):
+                referencias[chave] = referencias.get(chave, 0) + 1
+        # Blobs sem referência não contam: a coleta de lixo no final os remove
+        total = sum(tamanho(p) for _, p in execucoes) + sum(tamanhos_blobs.get(c, 0) for c in referencias)
+        limite = limite_mb * 1024 * 1024
+        for idade, pasta in list(execucoes):
+            if total <= limite:
+                break
+            total -= tamanho(pasta)
+            for chave in blobs_da_execucao(pasta):
+                referencias[chave] -= 1
+                if not referencias[chave]:
+                    total -= tamanhos_blobs.get(chave, 0)
+            resumo['removidas'].append(str(pasta))
+            execucoes.remove((idade, pasta))
+            if not simular:
+                _remover_execucao(pasta)
+
+    for idade, pasta in execucoes:
+        if idade < compactar_apos_dias or (compactada(pasta) and len(arquivos_da_execucao(pasta)) == 1):
+            continue
+        resumo['compactadas'].append(str(pasta))
+        if not simular:
+            antes, depois = compactar_execucao(pasta, armazem)
+            resumo['bytes_antes'] += antes
+            resumo['bytes_depois'] += depois
+
+    if not simular:
+        referenciados = set()
+        for pasta in pastas_de_execucao(raiz):
+            referenciados.update(blobs_da_execucao(pasta))
+        resumo['blobs_liberados'] = armazem.coletar_lixo(referenciados)
+    return resumo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compacta e aplica a retenção das evidências")
+    subcomandos = parser.add_subparsers(dest='comando')
+
+    compactar = subcomandos.add_parser('compactar', help="Compacta as execuções antigas e aplica a retenção (padrão)")
+    compactar.add_argument('--dias', type=float, default=float(os.getenv('EVIDENCIAS_COMPACTAR_APOS_DIAS', '7')),
+                           help="Compacta execuções mais antigas que N dias")
+    compactar.add_argument('--manter-dias', type=float, default=os.getenv('EVIDENCIAS_RETENCAO_DIAS') or None,
+                           help="Remove execuções mais antigas que N dias")
+    compactar.add_argument('--limite-mb', type=float, default=os.getenv('EVIDENCIAS_LIMITE_MB') or None,
+                           help="Remove as execuções mais antigas até o total ficar abaixo do limite")
+    compactar.add_argument('--simular', action='store_true', help="Só mostra o que seria feito")
+
+    ler = subcomandos.add_parser('ler', help="Mostra um arquivo de uma execução compactada")
+    ler.add_argument('pasta', help="Pasta da execução (ex.: evidencias/teste_20250914_233100)")
+    ler.add_argument('arquivo', nargs='?', help="Arquivo a exibir; sem ele, lista os arquivos")
+
+    restaurar = subcomandos.add_parser('restaurar', help="Recria os arquivos originais de uma execução")
+    restaurar.add_argument('pasta')
+
+    args = parser.parse_args()
+    if args.comando == 'ler':
+        if not args.arquivo:
+            nomes = ler_manifesto(args.pasta)['arquivos'] if compactada(args.pasta) else [
+                a.relative_to(args.pasta).as_posix() for a in arquivos_da_execucao(args.pasta)]
+            print('\n'.join(nomes))
+            return
+        sys.stdout.buffer.write(ler_arquivo(args.pasta, args.arquivo))
+        return
+    if args.comando == 'restaurar':
+        arquivos = restaurar_execucao(args.pasta)
+        print(f"♻️ {len(arquivos)} arquivos restaurados em {args.pasta}")
+        return
+
+    if args.comando is None:
+        args = compactar.parse_args([])
+    resumo = aplicar_politica(
+        compactar_apos_dias=args.dias,
+        manter_dias=float(args.manter_dias) if args.manter_dias is not None else None,
+        limite_mb=float(args.limite_mb) if args.limite_mb is not None else None,
+        simular=args.simular,
+    )
+    prefixo = "🔎 (simulação) " if args.simular else ""
+    print(f"{prefixo}🗜️ {len(resumo['compactadas'])} execuções compactadas, {len(resumo['removidas'])} removidas")
+    if resumo['bytes_antes']:
+        print(f"   {resumo['bytes_antes'] / 1024:.0f} KB -> {resumo['bytes_depois'] / 1024:.0f} KB "
+              f"(blobs liberados: {resumo['blobs_liberados'] / 1024:.0f} KB)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""
+Daemon de agentes do Browser Use
+Inicia uma vez (variáveis de ambiente, import do browser_use, cliente do LLM e um pool de
+navegadores já abertos) e depois executa as tarefas recebidas por um socket Unix ou por
+uma pasta de spool, devolvendo o status e a pasta de evidências de cada uma.
+
+Uso:
+    python daemon_agentes.py iniciar --navegadores 2 --url-inicial https://bibliotechapp.vercel.app/login
+    python daemon_agentes.py enviar "Acesse https://example.com e me diga o título"
+    python daemon_agentes.py enviar --spool --sem-esperar "..."   # sem socket (por exemplo, no Windows)
+    python daemon_agentes.py estado
+    python daemon_agentes.py parar
+"""
+
+import os
+import re
+import json
+import time
+import socket
+import signal
+import asyncio
+import argparse
+import datetime
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Carrega as variáveis de ambiente do arquivo .env
+load_dotenv()
+load_dotenv('config.env')
+
+SOCKET_DAEMON = Path(os.getenv('DAEMON_SOCKET', '.cache/daemon_agentes.sock'))
+SPOOL_DAEMON = Path(os.getenv('DAEMON_SPOOL', '.cache/spool'))
+SOCKET_DISPONIVEL = hasattr(socket, 'AF_UNIX')
+
+
+def _nome_seguro(nome):
+    return re.sub(r'[^\w-]+', '_', nome).strip('_')[:40] or 'tarefa'
+
+
+def validar_pedido(pedido):
+    """
+    Mensagem de erro de um pedido de tarefa inválido, ou None se ele puder ir para a fila
+    """
+    if not isinstance(pedido, dict):
+        return "Pedido inválido: envie um objeto JSON por linha"
+    tarefa = pedido.get('tarefa')
+    if not isinstance(tarefa, str) or not tarefa.strip():
+        return "Pedido sem 'tarefa': envie o texto da tarefa"
+    if pedido.get('nome') is not None and not isinstance(pedido['nome'], str):
+        return "'nome' deve ser um texto"
+    max_passos = pedido.get('max_passos')
+    if max_passos is not None and (isinstance(max_passos, bool) or not isinstance(max_passos, int) or max_passos < 1):
+        return "'max_passos' deve ser um inteiro positivo"
+    return None
+
+
+class DaemonAgentes:
+    """
+    Fila de tarefas atendida por um trabalhador para cada navegador do pool.
+    Cada tarefa roda como um cenário do executor_cenarios.py, com as mesmas evidências.
+    """
+
+    def __init__(self, navegadores=2, max_passos=100, headless=None, url_inicial=None,
+                 caminho_socket=SOCKET_DAEMON, pasta_spool=SPOOL_DAEMON):
+        self.navegadores = max(1, navegadores)
+        self.max_passos = max_passos
+        self.headless = headless
+        self.url_inicial = url_inicial
+        self.caminho_socket = Path(caminho_socket)
+        self.spool = Path(pasta_spool)
+        self.fila = asyncio.Queue()
+        self.parar = asyncio.Event()
+        self.llm = None
+        self.pool = None
+        self.pasta = None
+        self._contador = 0
+        self._respostas_spool = set()
+        self._estado = {'na_fila': 0, 'em_execucao': 0, 'concluidas': 0, 'falhas': 0}
+
+    async def iniciar(self):
+        # Import pesado feito uma única vez, na subida do daemon
+        from executor_cenarios import PoolNavegadores
+        from agentUniversal import configurar_llm
+
+        inicio = time.monotonic()
+        self.llm = configurar_llm()
+        if not self.llm:
+            raise RuntimeError("Não foi possível configurar nenhum modelo de IA")
+        self.pool = PoolNavegadores(self.navegadores, headless=self.headless)
+        await self.pool.aquecer(self.url_inicial)
+        self.pasta = Path(f"evidencias/daemon_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        os.makedirs(self.pasta, exist_ok=True)
+        print(f"🔥 Daemon pronto em {time.monotonic() - inicio:.1f}s com {self.navegadores} navegador(es)")
+        print(f"📁 Evidências serão salvas em: {self.pasta}")
+
+    def enfileirar(self, pedido):
+        """
+        Coloca a tarefa (já validada por validar_pedido) na fila e retorna (id, futuro com o status final)
+        """
+        self._contador += 1
+        identificador = f"{self._contador:04d}_{_nome_seguro(pedido.get('nome') or pedido['tarefa'][:30])}"
+        futuro = asyncio.get_running_loop().create_future()
+        self.fila.put_nowait((identificador, pedido, futuro))
+        self._estado['na_fila'] += 1
+        return identificador, futuro
+
+    async def _trabalhador(self):
+        from executor_cenarios import executar_cenario
+
+        while True:
+            identificador, pedido, futuro = await self.fila.get()
+            self._estado['na_fila'] -= 1
+            self._estado['em_execucao'] += 1
+            try:
+                status = await executar_cenario(identificador, pedido['tarefa'], self.llm, self.pool, self.pasta,
+                                                pedido.get('max_passos') or self.max_passos)
+            except Exception as e:
+                status = {'cenario': identificador, 'status': 'erro', 'erro': str(e)}
+            self._estado['em_execucao'] -= 1
+            self._estado['concluidas'] += 1
+            self._estado['falhas'] += status.get('status') != 'sucesso'
+            status['id'] = identificador
+            if not futuro.done():
+                futuro.set_result(status)
+            self.fila.task_done()
+
+    def estado(self):
+        return {**self._estado, 'navegadores': self.navegadores, 'pasta': str(self.pasta)}
+
+    async def _atender(self, leitor, escritor):
+        """
+        Uma linha JSON por pedido: {"acao": "tarefa"|"estado"|"parar", "tarefa": ..., "esperar": true}
+        """
+        try:
+            while linha := await leitor.readline():
+                try:
+                    pedido = json.loads(linha)
+                    acao = pedido.get('acao', 'tarefa')
+                    if acao == 'estado':
+                        resposta = self.estado()
+                    elif acao == 'parar':
+                        self.parar.set()
+                        resposta = {'status': 'parando'}
+                    elif erro := validar_pedido(pedido):
+                        resposta = {'status': 'erro', 'erro': erro}
+                    else:
+                        identificador, futuro = self.enfileirar(pedido)
+                        resposta = await futuro if pedido.get('esperar', True) else {'id': identificador,
+                                                                                       'status': 'na_fila'}
+                except (json.JSONDecodeError, AttributeError):
+                    resposta = {'status': 'erro', 'erro': 'Pedido inválido: envie um objeto JSON por linha'}
+                escritor.write(json.dumps(resposta, ensure_ascii=False).encode('utf-8') + b'\n')
+                await escritor.drain()
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+    async def _vigiar_spool(self, intervalo_s=0.5):
+        """
+        Pedidos gravados em <spool>/entrada/*.json; o status final vai para <spool>/saida/<arquivo>
+        """
+        entrada, processando, saida = (self.spool / nome for nome in ('entrada', 'processando', 'saida'))
+        for pasta in (entrada, processando, saida):
+            pasta.mkdir(parents=True, exist_ok=True)
+        # Pedidos que ficaram pela metade em uma execução anterior voltam para a fila
+        for arquivo in processando.glob('*.json'):
+            arquivo.replace(entrada / arquivo.name)
+
+        while not self.parar.is_set():
+            for arquivo in sorted(entrada.glob('*.json'), key=lambda a: a.stat().st_mtime):
+                destino = processando / arquivo.name
+                arquivo.replace(destino)
+                try:
+                    pedido = json.loads(destino.read_text(encoding='utf-8'))
+                except json.JSONDecodeError as e:
+                    erro = f"Pedido inválido: {e}"
+                else:
+                    erro = validar_pedido(pedido)
+                if erro:
+                    (saida / arquivo.name).write_text(json.dumps({'status': 'erro', 'erro': erro}, ensure_ascii=False),
+                                                      encoding='utf-8')
+                    destino.unlink()
+                    continue
+                _, futuro = self.enfileirar(pedido)
+                tarefa = asyncio.create_task(self._responder_spool(futuro, destino, saida / arquivo.name))
+                self._respostas_spool.add(tarefa)
+                tarefa.add_done_callback(self._respostas_spool.discard)
+            try:
+                await asyncio.wait_for(self.parar.wait(), intervalo_s)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _responder_spool(self, futuro, pedido, resposta):
+        status = await futuro
+        temporario = resposta.with_suffix('.tmp')
+        temporario.write_text(json.dumps(status, ensure_ascii=False, indent=2), encoding='utf-8')
+        temporario.replace(resposta)
+        pedido.unlink(missing_ok=True)
+
+    async def executar(self):
+        await self.iniciar()
+        loop = asyncio.get_running_loop()
+        for sinal in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sinal, self.parar.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        trabalhadores = [asyncio.create_task(self._trabalhador()) for _ in range(self.navegadores)]
+        spool = asyncio.create_task(self._vigiar_spool())
+        servidor = None
+        if SOCKET_DISPONIVEL:
+            self.caminho_socket.parent.mkdir(parents=True, exist_ok=True)
+            self.caminho_socket.unlink(missing_ok=True)
+            servidor = await asyncio.start_unix_server(self._atender, path=str(self.caminho_socket))
+            print(f"🔌 Aguardando tarefas em {self.caminho_socket} e {self.spool / 'entrada'}")
+        else:
+            print(f"🔌 Aguardando tarefas em {self.spool / 'entrada'} (socket Unix indisponível neste sistema)")
+
+        try:
+            await self.parar.wait()
+            print("🛑 Encerrando: concluindo as tarefas já recebidas...")
+            if servidor:
+                servidor.close()
+            await spool
+            await self.fila.join()
+            await asyncio.gather(*self._respostas_spool)
+        finally:
+            for tarefa in trabalhadores:
+                tarefa.cancel()
+            if servidor:
+                self.caminho_socket.unlink(missing_ok=True)
+            await self.pool.fechar()
+        print(f"✅ Daemon encerrado: {self._estado['concluidas']} tarefa(s) executada(s)")
+
+
+async def enviar_pedido(pedido, caminho_socket=SOCKET_DAEMON):
+    """
+    Envia um pedido ao daemon pelo socket e retorna a resposta (o status final, se esperar)
+    """
+    leitor, escritor = await asyncio.open_unix_connection(str(caminho_socket), limit=2 ** 20)
+    try:
+        escritor.write(json.dumps(pedido, ensure_ascii=False).encode('utf-8') + b'\n')
+        await escritor.drain()
+        return json.loads(await leitor.readline())
+    finally:
+        escritor.close()
+
+
+async def enviar_por_spool(pedido, esperar=True, pasta_spool=SPOOL_DAEMON, intervalo_s=0.5):
+    """
+    Grava o pedido na pasta de spool; com esperar, aguarda o arquivo de saída
+    """
+    nome = f"{time.time_ns()}_{_nome_seguro(pedido.get('nome') or 'tarefa')}.json"
+    entrada = Path(pasta_spool) / 'entrada'
+    entrada.mkdir(parents=True, exist_ok=True)
+    temporario = entrada / (nome + '.tmp')
+    temporario.write_text(json.dumps(pedido, ensure_ascii=False), encoding='utf-8')
+    temporario.replace(entrada / nome)
+    resposta = Path(pasta_spool) / 'saida' / nome
+    if not esperar:
+        return {'status': 'na_fila', 'saida': str(resposta)}
+    while not resposta.exists():
+        await asyncio.sleep(intervalo_s)
+    return json.loads(resposta.read_text(encoding='utf-8'))
+
+
+def ler_argumentos():
+    parser = argparse.ArgumentParser(description="Daemon com navegadores e LLM já inicializados")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    iniciar = comandos.add_parser('iniciar', help="Sobe o daemon")
+    iniciar.add_argument('--navegadores', type=int, default=int(os.getenv('MAX_CONCORRENCIA', '3')),
+                         help="Navegadores mantidos abertos (e tarefas simultâneas)")
+    iniciar.add_argument('--max-passos', type=int, default=int(os.getenv('MAX_PASSOS', '100')))
+    iniciar.add_argument('--url-inicial', help="Página já carregada em cada navegador ao subir")
+    iniciar.add_argument('--headless', action='store_true', help="Executa os navegadores sem interface")
+
+    enviar = comandos.add_parser('enviar', help="Envia uma tarefa ao daemon")
+    enviar.add_argument('tarefa')
+    enviar.add_argument('--nome', help="Nome da pasta de evidências da tarefa")
+    enviar.add_argument('--max-passos', type=int)
+    enviar.add_argument('--sem-esperar', action='store_true', help="Só enfileira, sem aguardar o resultado")
+    enviar.add_argument('--spool', action='store_true', help="Usa a pasta de spool em vez do socket")
+
+    comandos.add_parser('estado', help="Mostra as tarefas na fila, em execução e concluídas")
+    comandos.add_parser('parar', help="Encerra o daemon depois das tarefas recebidas")
+    return parser.parse_args()
+
+
+async def main():
+    args = ler_argumentos()
+
+    if args.comando == 'iniciar':
+        daemon = DaemonAgentes(args.navegadores, args.max_passos, True if args.headless else None, args.url_inicial)
+        await daemon.executar()
+        return
+
+    if args.comando == 'enviar':
+        pedido = {'acao': 'tarefa', 'tarefa': args.tarefa, 'nome': args.nome, 'max_passos': args.max_passos,
+                  'esperar': not args.sem_esperar}
+        if args.spool or not SOCKET_DISPONIVEL:
+            resposta = await enviar_por_spool(pedido, esperar=not args.sem_esperar)
+        else:
+            resposta = await enviar_pedido(pedido)
+    else:
+        resposta = await enviar_pedido({'acao': args.comando})
+    print(json.dumps(resposta, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except (ConnectionRefusedError, FileNotFoundError):
+        print(f"❌ Daemon não está em execução (socket {SOCKET_DAEMON}). Inicie com: python daemon_agentes.py iniciar")
@@ -0,0 +1,265 @@
+"""
+Diferenças entre execuções da mesma tarefa: o que mudou desde a última execução verde
+Cada execução indexada ganha uma impressão digital (sequência normalizada de ações, páginas visitadas,
+erros e status final) na tabela impressoes do índice das evidências; a comparação só lê essas linhas.
+    python diff_execucoes.py                          # última execução (ou suíte) contra a última verde
+    python diff_execucoes.py suite_20250921_101010 --json
+O código de saída é 1 quando há regressão (para o CI) e 0 caso contrário.
+"""
+
+import os
+import re
+import sys
+import json
+import difflib
+import hashlib
+import argparse
+from urllib.parse import urlsplit
+from dotenv import load_dotenv
+
+from indice_evidencias import conectar, atualizar_indice, CAMINHO_INDICE
+
+# Carrega as variáveis de ambiente do arquivo .env
+load_dotenv()
+load_dotenv('config.env')
+
+# Inflação de passos só conta a partir desta diferença absoluta (evita 2 -> 3 passos virar regressão)
+MINIMO_PASSOS_A_MAIS = 2
+
+# Trechos voláteis das URLs e dos erros: ids numéricos, uuids, hashes e textos entre aspas
+_ID_NA_URL = re.compile(r'^(\d+|[0-9a-f]{8}-[0-9a-f-]{27,}|[0-9a-f]{16,}|[A-Za-z0-9_-]{20,})$', re.IGNORECASE)
+_ENTRE_ASPAS = re.compile(r'''(['"]).*?\1''')
+_NUMEROS = re.compile(r'\d+(\.\d+)?')
+_ESPACOS = re.compile(r'\s+')
+
+
+def normalizar_url(url):
+    """
+    host + caminho, sem query nem fragmento e com os segmentos que parecem ids trocados por :id
+    """
+    if not url or url.startswith(('about:', 'chrome:', 'data:')):
+        return None
+    partes = urlsplit(url)
+    segmentos = [(':id' if _ID_NA_URL.match(s) else s) for s in partes.path.split('/') if s]
+    return f"{partes.netloc.lower()}/{'/'.join(segmentos)}"
+
+
+def normalizar_erro(erro):
+    """
+    Primeira linha do erro, sem números nem textos entre aspas, para o mesmo erro casar entre execuções
+    """
+    linha = str(erro).strip().splitlines()[0] if str(erro).strip() else ''
+    linha = _NUMEROS.sub('N', _ENTRE_ASPAS.sub('…', linha))
+    return _ESPACOS.sub(' ', linha)[:160]
+
+
+def normalizar_acao(acao):
+    """
+    Nome da ação; nas navegações, com a URL normalizada. Índices de elemento e textos digitados mudam
+    a cada execução e ficam de fora.
+    """
+    nome, parametros = next(iter(acao.items()))
+    if isinstance(parametros, dict) and parametros.get('url'):
+        return f"{nome} {normalizar_url(parametros['url'])}"
+    return nome
+
+
+def chave_da_tarefa(inicio):
+    """
+    Execuções com o mesmo título e a mesma tarefa são comparáveis entre si
+    """
+    texto = f"{inicio.get('titulo', '')}\n{inicio.get('tarefa', '')}"
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()[:16]
+
+
+def impressao_digital(registros):
+    """
+    Impressão digital de uma execução a partir dos registros do passos.jsonl
+    """
+    inicio = next((r for r in registros if r.get('tipo') == 'inicio'), {})
+    fim = next((r for r in reversed(registros) if r.get('tipo') == 'fim'), {})
+    passos = [r for r in registros if r.get('tipo') == 'passo']
+
+    acoes = [normalizar_acao(a) for r in passos for a in r.get('acoes', [])]
+    paginas = sorted({p for p in (normalizar_url(r.get('url')) for r in passos) if p})
+    erros = {normalizar_erro(res['error']) for r in passos for res in r.get('resultados', []) if res.get('error')}
+    erros.update(normalizar_erro(e) for e in fim.get('erros', []) if e)
+    erros = sorted(e for e in erros if e)
+    status = fim.get('status', 'interrompido')
+
+    assinatura = hashlib.sha1(json.dumps([acoes, paginas, erros, status]).encode('utf-8')).hexdigest()[:16]
+    return {'chave': chave_da_tarefa(inicio), 'assinatura': assinatura,
+            'acoes': acoes, 'paginas': paginas, 'erros': erros}
+
+
+def _carregar(conexao, execucao):
+    linha = conexao.execute(
+        """SELECT i.execucao, i.chave, i.assinatura, i.acoes, i.paginas, i.erros, e.status, e.passos, e.inicio
+           FROM impressoes i JOIN execucoes e USING (execucao) WHERE i.execucao = ?""", (execucao,)).fetchone()
+    if not linha:
+        return None
+    colunas = ('execucao', 'chave', 'assinatura', 'acoes', 'paginas', 'erros', 'status', 'passos', 'inicio')
+    impressao = dict(zip(colunas, linha))
+    for campo in ('acoes', 'paginas', 'erros'):
+        impressao[campo] = json.loads(impressao[campo])
+    return impressao
+
+
+def ultima_verde(conexao, chave, antes_de, ignorar=()):
+    """
+    Execução mais recente com sucesso da mesma tarefa, anterior à execução comparada
+    """
+    for (execucao,) in conexao.execute(
+            """SELECT i.execucao FROM impressoes i JOIN execucoes e USING (execucao)
+               WHERE i.chave = ? AND e.status = 'sucesso' AND COALESCE(e.inicio, '') < COALESCE(?, '')
+               ORDER BY e.inicio DESC LIMIT 10""", (chave, antes_de)):
+        if execucao not in ignorar:
+            return execucao
+    return None
+
+
+def _resumo_sequencia(base, atual, limite=10):
+    """
+    Trechos da sequência de ações que mudaram, no formato do difflib (- base, + atual)
+    """
+    trechos = []
+    for operacao, i1, i2, j1, j2 in difflib.SequenceMatcher(None, base, atual, autojunk=False).get_opcodes():
+        if operacao == 'equal':
+            continue
+        trechos.append({'posicao': i1, 'removidas': base[i1:i2], 'adicionadas': atual[j1:j2]})
+        if len(trechos) >= limite:
+            break
+    return trechos
+
+
+def comparar(execucao, base=None, tolerancia_passos=None, conexao=None):
+    """
+    Compara uma execução com a base (padrão: última execução verde da mesma tarefa).
+    Retorna um dicionário serializável; 'regressao' indica se o CI deve falhar.
+    """
+    if tolerancia_passos is None:
+        tolerancia_passos = float(os.getenv('DIFF_TOLERANCIA_PASSOS', '0.25'))
+    fechar = conexao is None
+    conexao = conexao or conectar()
+    try:
+        atual = _carregar(conexao, execucao)
+        if atual is None:
+            return {'execucao': execucao, 'base': None, 'regressao': False, 'alertas': [],
+                    'aviso': 'execução sem impressão digital no índice (sem passos.jsonl?)'}
+        base = base or ultima_verde(conexao, atual['chave'], atual['inicio'], ignorar={execucao})
+        anterior = _carregar(conexao, base) if base else None
+    finally:
+        if fechar:
+            conexao.close()
+
+    diferenca = {'execucao': execucao, 'status': atual['status'], 'passos': atual['passos'],
+                 'base': base, 'regressao': False, 'alertas': []}
+    if anterior is None:
+        diferenca['aviso'] = 'nenhuma execução verde anterior da mesma tarefa para comparar'
+        return diferenca
+    diferenca.update(status_base=anterior['status'], passos_base=anterior['passos'],
+                     identica=atual['assinatura'] == anterior['assinatura'])
+    if diferenca['identica']:
+        return diferenca
+
+    erros_base, paginas_base = set(anterior['erros']), set(anterior['paginas'])
+    diferenca.update(
+        erros_novos=[e for e in atual['erros'] if e not in erros_base],
+        erros_resolvidos=sorted(erros_base - set(atual['erros'])),
+        paginas_novas=[p for p in atual['paginas'] if p not in paginas_base],
+        paginas_ausentes=sorted(paginas_base - set(atual['paginas'])),
+        sequencia=_resumo_sequencia(anterior['acoes'], atual['acoes']),
+    )
+
+    alertas = diferenca['alertas']
+    if atual['status'] != anterior['status']:
+        alertas.append(f"status: {anterior['status']} -> {atual['status']}")
+    if diferenca['erros_novos']:
+        alertas.append(f"{len(diferenca['erros_novos'])} erros novos")
+    if diferenca['paginas_ausentes']:
+        alertas.append(f"{len(diferenca['paginas_ausentes'])} páginas não visitadas")
+    passos_base, passos = anterior['passos'] or 0, atual['passos'] or 0
+    if passos - passos_base >= MINIMO_PASSOS_A_MAIS and passos > passos_base * (1 + tolerancia_passos):
+        alertas.append(f"passos: {passos_base} -> {passos} (+{(passos / max(passos_base, 1) - 1) * 100:.0f}%)")
+    diferenca['regressao'] = bool(alertas)
+    if diferenca['paginas_novas']:
+        # Página nova não é regressão por si só, mas aparece no relatório
+        alertas.append(f"{len(diferenca['paginas_novas'])} páginas novas")
+    return diferenca
+
+
+def execucoes_recentes(conexao, padroes=None):
+    """
+    Execuções a comparar: as que começam com algum dos padrões ou, sem padrões, a última execução
+    (todos os cenários, se ela fizer parte de uma suíte)
+    """
+    if padroes:
+        encontradas = []
+        for padrao in padroes:
+            encontradas += [e for (e,) in conexao.execute(
+                "SELECT execucao FROM execucoes WHERE execucao = ? OR execucao LIKE ? ORDER BY execucao",
+                (padrao, padrao.rstrip('/') + '/%'))]
+        return list(dict.fromkeys(encontradas))
+    ultima = conexao.execute("SELECT execucao FROM execucoes ORDER BY inicio DESC LIMIT 1").fetchone()
+    if not ultima:
+        return []
+    if '/' not in ultima[0]:
+        return [ultima[0]]
+    grupo = ultima[0].rsplit('/', 1)[0]
+    return [e for (e,) in conexao.execute(
+        "SELECT execucao FROM execucoes WHERE execucao LIKE ? ORDER BY execucao", (grupo + '/%',))]
+
+
+def imprimir_diferenca(diferenca):
+    icone = '❌' if diferenca['regressao'] else ('✅' if diferenca.get('identica') or not diferenca['alertas'] else '⚠️')
+    print(f"{icone} {diferenca['execucao']} ({diferenca.get('status')}, {diferenca.get('passos')} passos)")
+    if not diferenca['base']:
+        print(f"   {diferenca.get('aviso')}")
+        return
+    print(f"   base: {diferenca['base']} ({diferenca['status_base']}, {diferenca['passos_base']} passos)")
+    if diferenca['identica']:
+        print("   mesma sequência de ações, páginas, erros e status")
+        return
+    for alerta in diferenca['alertas']:
+        print(f"   - {alerta}")
+    for erro in diferenca['erros_novos'][:5]:
+        print(f"     + erro: {erro}")
+    for pagina in diferenca['paginas_ausentes'][:5]:
+        print(f"     - página: {pagina}")
+    for pagina in diferenca['paginas_novas'][:5]:
+        print(f"     + página: {pagina}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara execuções com a última execução verde da mesma tarefa")
+    parser.add_argument('execucoes', nargs='*',
+                        help="Execuções ou suítes (ex.: teste_20250921_101010, suite_20250921_101010); "
+                             "padrão: a última execução")
+    parser.add_argument('--base', help="Execução usada como base no lugar da última verde")
+    parser.add_argument('--tolerancia-passos', type=float,
+                        help="Aumento relativo de passos tolerado (padrão: DIFF_TOLERANCIA_PASSOS ou 0.25)")
+    parser.add_argument('--json', action='store_true', help="Saída em JSON (para o CI)")
+    args = parser.parse_args()
+
+    conexao = conectar()
+    atualizar_indice(conexao=conexao)
+    execucoes = execucoes_recentes(conexao, args.execucoes)
+    if not execucoes:
+        print(f"❌ Nenhuma execução encontrada em {CAMINHO_INDICE}")
+        conexao.close()
+        return 2
+    diferencas = [comparar(e, args.base, args.tolerancia_passos, conexao) for e in execucoes]
+    conexao.close()
+
+    regressao = any(d['regressao'] for d in diferencas)
+    if args.json:
+        json.dump({'regressao': regressao, 'execucoes': diferencas}, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        for diferenca in diferencas:
+            imprimir_diferenca(diferenca)
+        print(f"\n{'❌ Regressão' if regressao else '✅ Sem regressão'} em {len(diferencas)} execuções")
+    return 1 if regressao else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+Estado incremental do DOM entre os passos do agente (opcional, DOM_INCREMENTAL=ligado)
+O Browser Use envia a cada passo a lista completa de elementos interativos da página. Neste modo,
+enquanto a página (aba + URL) é a mesma do passo anterior, só os elementos novos ou alterados vão
+completos; os que não mudaram viram uma referência curta (índice, tag e rótulo) e os removidos são
+listados no cabeçalho. Na navegação, na troca de aba e a cada DOM_INCREMENTAL_COMPLETO_A_CADA
+passos, o modelo volta a receber a lista completa.
+"""
+
+import os
+import re
+from dotenv import load_dotenv
+
+# Carrega as variáveis de ambiente do arquivo .env
+load_dotenv()
+load_dotenv('config.env')
+
+# [12]<button ...>, *[12]<a ...>, |SCROLL+12]<div ...>, com tabulações e prefixo de shadow DOM opcionais
+RE_ELEMENTO = re.compile(r'^(\t*)((?:\|SHADOW\(\w+\)\|)?\*?(?:\[|\|SCROLL\+))(\d+)\]<([\w-]+)(.*)$')
+RE_ROTULO = re.compile(r'\b(?:aria-label|placeholder|title|name|id|value)=(.+?)(?= [\w-]+=| />|$)')
+
+
+def dom_incremental_ativo():
+    return os.getenv('DOM_INCREMENTAL', 'desligado').lower() == 'ligado'
+
+
+def dividir_em_blocos(texto, selector_map):
+    """
+    Divide o DOM serializado em blocos: cada elemento interativo com as linhas que o seguem até o próximo.
+    Retorna [(chave, índice, linhas)]; a chave é o backend_node_id do elemento (estável na mesma página).
+    """
+    blocos = []
+    chave, indice, linhas = 'inicio', None, []
+    for linha in texto.split('\n'):
+        encontrado = RE_ELEMENTO.match(linha)
+        if encontrado:
+            if linhas:
+                blocos.append((chave, indice, linhas))
+            indice = int(encontrado.group(3))
+            no = selector_map.get(indice)
+            chave = getattr(no, 'backend_node_id', None) or f"{encontrado.group(4)}{encontrado.group(5)}"
+            linhas = []
+        linhas.append(linha)
+    if linhas:
+        blocos.append((chave, indice, linhas))
+    return blocos
+
+
+def _conteudo(linhas):
+    # O índice e a marca de novo (*) mudam sem o elemento mudar; não entram na comparação
+    primeira = RE_ELEMENTO.sub(lambda m: f"{m.group(1)}<{m.group(4)}{m.group(5)}", linhas[0])
+    return '\n'.join([primeira] + linhas[1:])
+
+
+def referencia_curta(indice, linhas, limite=40):
+    """
+    [12]<a> Emprestar  — índice, tag e o primeiro texto ou rótulo do elemento
+    """
+    encontrado = RE_ELEMENTO.match(linhas[0])
+    profundidade, tag, atributos = encontrado.group(1), encontrado.group(4), encontrado.group(5)
+    texto = next((l.strip() for l in linhas[1:] if l.strip() and not l.strip().startswith(('<', '|'))), '')
+    if not texto:
+        rotulo = RE_ROTULO.search(atributos)
+        texto = rotulo.group(1) if rotulo else ''
+    if len(texto) > limite:
+        texto = texto[:limite - 1] + '…'
+    return f"{profundidade}[{indice}]<{tag}> {texto}".rstrip()
+
+
+class DomIncremental:
+    """
+    Instalado no agente, troca a lista de elementos do prompt pela versão incremental.
+    Guarda, por aba, os blocos do passo anterior para a comparação.
+    """
+
+    def __init__(self, ativo=None, completo_a_cada=None, economia_minima=0.2):
+        self.ativo = dom_incremental_ativo() if ativo is None else ativo
+        self.completo_a_cada = completo_a_cada or int(os.getenv('DOM_INCREMENTAL_COMPLETO_A_CADA', '8'))
+        self.economia_minima = economia_minima
+        self._abas = {}
+        self.passos_completos = 0
+        self.passos_incrementais = 0
+        self.caracteres_completos = 0
+        self.caracteres_enviados = 0
+
+    def instalar(self, agent):
+        """
+        Envolve o create_state_messages do agente; sem DOM_INCREMENTAL ligado, não faz nada
+        """
+        if not self.ativo:
+            return agent
+        gerenciador = agent._message_manager
+        original = gerenciador.create_state_messages
+
+        def create_state_messages(*args, **kwargs):
+            resumo = kwargs['browser_state_summary'] if 'browser_state_summary' in kwargs else args[0]
+            self._substituir_representacao(resumo)
+            return original(*args, **kwargs)
+
+        gerenciador.create_state_messages = create_state_messages
+        return agent
+
+    def _chave_aba(self, resumo):
+        aba = next((t for t in resumo.tabs if t.url == resumo.url and t.title == resumo.title), None)
+        return getattr(aba, 'target_id', None) or resumo.url
+
+    def _substituir_representacao(self, resumo):
+        dom_state = resumo.dom_state
+        original = dom_state.llm_representation
+        chave_aba = self._chave_aba(resumo)
+        calculado = {}
+
+        def llm_representation(include_attributes=None):
+            # Pode ser chamada mais de uma vez no mesmo passo; a comparação só avança na primeira
+            chave = tuple(include_attributes or ())
+            if chave not in calculado:
+                texto = original(include_attributes=include_attributes)
+                calculado[chave] = self.representar(chave_aba, resumo.url, texto, dom_state.selector_map)
+            return calculado[chave]
+
+        dom_state.llm_representation = llm_representation
+
+    def representar(self, chave_aba, url, texto, selector_map):
+        """
+        Texto enviado ao modelo: o DOM completo ou a versão incremental em relação ao passo anterior da aba
+        """
+        blocos = dividir_em_blocos(texto, selector_map)
+        anterior = self._abas.get(chave_aba)
+        passos_desde_completo = anterior['passos_desde_completo'] + 1 if anterior else 0
+        self._abas[chave_aba] = {'url': url, 'blocos': {c: _conteudo(l) for c, _, l in blocos},
+                                 'rotulos': {c: referencia_curta(i, l).strip() for c, i, l in blocos if i is not None},
+                                 'passos_desde_completo': passos_desde_completo}
+        self.caracteres_completos += len(texto)
+
+        if not anterior or anterior['url'] != url or passos_desde_completo >= self.completo_a_cada:
+            return self._completo(chave_aba, texto)
+
+        saida, novos, alterados, iguais = [], [], [], 0
+        for chave, indice, linhas in blocos:
+            anterior_conteudo = anterior['blocos'].get(chave)
+            if anterior_conteudo == _conteudo(linhas):
+                if indice is not None:
+                    saida.append(referencia_curta(indice, linhas))
+                    iguais += 1
+                continue
+            if indice is not None:
+                (alterados if anterior_conteudo is not None else novos).append(f"[{indice}]")
+            saida.extend(linhas)
+        removidos = [anterior['rotulos'][c] for c in anterior['blocos'] if c in anterior['rotulos']
+                     and c not in self._abas[chave_aba]['blocos']]
+
+        cabecalho = (f"(DOM incremental: mesma página do passo anterior. {iguais} elementos sem mudança aparecem "
+                     "resumidos como [índice]<tag> rótulo e continuam clicáveis pelo índice. "
+                     f"Novos: {', '.join(novos) or 'nenhum'}. Alterados: {', '.join(alterados) or 'nenhum'}. "
+                     f"Removidos: {'; '.join(removidos[:10]) or 'nenhum'}"
+                     f"{f' e mais {len(removidos) - 10}' if len(removidos) > 10 else ''}.)")
+        incremental = cabecalho + '\n' + '\n'.join(saida)
+        if len(incremental) > len(texto) * (1 - self.economia_minima):
+            return self._completo(chave_aba, texto)
+
+        self.passos_incrementais += 1
+        self.caracteres_enviados += len(incremental)
+        return incremental
+
+    def _completo(self, chave_aba, texto):
+        self._abas[chave_aba]['passos_desde_completo'] = 0
+        self.passos_completos += 1
+        self.caracteres_enviados += len(texto)
+        return texto
+
+    def registro(self):
+        """
+        Registro para o stream de evidências com a economia de caracteres do modo incremental
+        """
+        economia = 1 - self.caracteres_enviados / self.caracteres_completos if self.caracteres_completos else 0.0
+        print(f"🧩 DOM incremental: {self.passos_incrementais} passo(s) incrementais, {self.passos_completos} "
+              f"completo(s), {economia:.0%} menos caracteres de DOM no prompt")
+        return {'tipo': 'dom_incremental', 'passos_incrementais': self.passos_incrementais,
+                'passos_completos': self.passos_completos, 'caracteres_completos': self.caracteres_completos,
+                'caracteres_enviados': self.caracteres_enviados, 'economia': round(economia, 3)}
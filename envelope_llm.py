@@ -0,0 +1,24 @@
+"""
+Base comum para os envelopes (wrappers) dos modelos de linguagem
+Repassa ao LLM original tudo o que o envelope não sobrescreve
+"""
+
+
+class EnvelopeLLM:
+    """
+    Envolve um ChatGoogle/ChatOpenAI mantendo a mesma interface (model, provider,
+    name, ainvoke...), para poder ser passado direto ao Agent do browser_use.
+    """
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    def __getattr__(self, nome):
+        # Só chamado para atributos que o envelope não tem: model, provider, temperature...
+        if nome.startswith('__') or 'llm' not in self.__dict__:
+            raise AttributeError(nome)
+        return getattr(self.__dict__['llm'], nome)
+
+    async def ainvoke(self, messages, output_format=None):
+        return await self.llm.ainvoke(messages, output_format)
+
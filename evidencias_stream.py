@@ -0,0 +1,326 @@
+"""
+Gravação contínua das evidências, um registro JSON por passo do agente
+Os passos são anexados em passos.jsonl enquanto o agente executa, e os arquivos
+evidencias_*.txt e relatorio_detalhado_*.txt são renderizados a partir desse stream
+"""
+
+import json
+import asyncio
+import datetime
+from pathlib import Path
+
+CAMPOS_RESULTADO = {'is_done', 'success', 'error', 'extracted_content', 'long_term_memory'}
+
+
+def registro_do_passo(item, posicao):
+    """
+    Converte um AgentHistory em um registro serializável
+    """
+    saida = item.model_output
+    metadata = item.metadata
+    return {
+        'tipo': 'passo',
+        'passo': metadata.step_number if metadata else posicao,
+        'inicio': metadata.step_start_time if metadata else None,
+        'fim': metadata.step_end_time if metadata else None,
+        'duracao_s': round(metadata.duration_seconds, 3) if metadata else None,
+        'url': item.state.url,
+        'titulo': item.state.title,
+        'avaliacao': saida.evaluation_previous_goal if saida else None,
+        'objetivo': saida.next_goal if saida else None,
+        'acoes': [acao.model_dump(exclude_none=True) for acao in saida.action] if saida else [],
+        'resultados': [r.model_dump(include=CAMPOS_RESULTADO, exclude_none=True) for r in item.result],
+        'screenshot': item.state.screenshot_path,
+    }
+
+
+class GravadorEvidencias:
+    """
+    Escritor assíncrono com buffer para o stream de evidências.
+    registrar() só enfileira o registro; uma tarefa em segundo plano junta o que
+    estiver na fila e anexa ao arquivo em uma thread, sem bloquear o event loop.
+    """
+
+    def __init__(self, evidencias_dir, nome='passos', tamanho_lote=50):
+        self.caminho = Path(evidencias_dir) / f"{nome}.jsonl"
+        self.tamanho_lote = tamanho_lote
+        self._fila = asyncio.Queue()
+        self._tarefa = None
+        self._passos_gravados = 0
+
+    async def __aenter__(self):
+        self.iniciar()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.fechar()
+
+    def iniciar(self):
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        if self._tarefa is None:
+            self._tarefa = asyncio.create_task(self._escrever())
+
+    def registrar(self, registro):
+        registro.setdefault('registrado_em', datetime.datetime.now().isoformat(timespec='milliseconds'))
+        self._fila.put_nowait(registro)
+
+    async def registrar_passo(self, agent):
+        """
+        Hook para Agent.run(on_step_end=...): grava os itens novos do histórico do agente
+        """
+        historico = agent.history.history
+        for posicao in range(self._passos_gravados, len(historico)):
+            self.registrar(registro_do_passo(historico[posicao], posicao))
+        self._passos_gravados = len(historico)
+
+    async def _escrever(self):
+        fim = False
+        while not fim:
+            lote = [await self._fila.get()]
+            while not self._fila.empty() and len(lote) < self.tamanho_lote:
+                lote.append(self._fila.get_nowait())
+            if None in lote:
+                fim = True
+                lote = [r for r in lote if r is not None]
+            if lote:
+                await asyncio.to_thread(self._anexar, lote)
+
+    def _anexar(self, lote):
+        with open(self.caminho, 'a', encoding='utf-8') as f:
+            for registro in lote:
+                f.write(json.dumps(registro, ensure_ascii=False, default=str) + '\n')
+
+    async def fechar(self, indexar=True):
+        """
+        Grava o que ainda estiver na fila, encerra o escritor e atualiza o índice das evidências
+        """
+        if self._tarefa is None:
+            return
+        self._fila.put_nowait(None)
+        await self._tarefa
+        self._tarefa = None
+
+        if indexar:
+            from indice_evidencias import indexar_execucao
+            try:
+                await asyncio.to_thread(indexar_execucao, self.caminho)
+            except Exception as e:
+                print(f"⚠️ Não foi possível atualizar o índice das evidências: {e}")
+
+
+def encadear_hooks(*hooks):
+    """
+    Junta vários hooks de passo em um só, para o on_step_end do Agent.run (None é ignorado)
+    """
+    hooks = [h for h in hooks if h is not None]
+
+    async def hook(agent):
+        for h in hooks:
+            await h(agent)
+    return hook
+
+
+def ler_stream(caminho):
+    """
+    Lê os registros do stream, ignorando uma última linha truncada (processo interrompido)
+    """
+    registros = []
+    with open(caminho, encoding='utf-8') as f:
+        for linha in f:
+            try:
+                registros.append(json.loads(linha))
+            except json.JSONDecodeError:
+                continue
+    return registros
+
+
+def _formatar_acao(acao):
+    nome, parametros = next(iter(acao.items()))
+    if isinstance(parametros, dict):
+        parametros = ', '.join(f"{k}={v!r}" for k, v in parametros.items())
+    return f"{nome}({parametros})"
+
+
+def renderizar_passos(registros):
+    """
+    Texto legível com a sequência de passos do stream
+    """
+    linhas = []
+    for r in registros:
+        if r.get('tipo') == 'progresso':
+            # Eventos do monitor_progresso.py: dica enviada ao agente ou execução interrompida
+            linhas.append(f"  Monitor de progresso: {r['acao']} ({r['motivo']}, {r['passos']} passos: {r['acoes']})")
+            continue
+        if r.get('tipo') != 'passo':
+            continue
+        duracao = f" ({r['duracao_s']}s)" if r.get('duracao_s') is not None else ''
+        linhas.append(f"Passo {r['passo']}{duracao} - {r.get('url') or ''}")
+        if r.get('objetivo'):
+            linhas.append(f"  Objetivo: {r['objetivo']}")
+        for acao in r.get('acoes', []):
+            linhas.append(f"  Ação: {_formatar_acao(acao)}")
+        for resultado in r.get('resultados', []):
+            if resultado.get('error'):
+                linhas.append(f"  Erro: {resultado['error']}")
+            elif resultado.get('extracted_content'):
+                linhas.append(f"  Resultado: {resultado['extracted_content']}")
+    return '\n'.join(linhas)
+
+
+def renderizar_arquivos(caminho_stream, nome_evidencia, nome_relatorio):
+    """
+    Gera evidencias_*.txt e relatorio_detalhado_*.txt a partir do stream.
+    Retorna os caminhos dos dois arquivos.
+    """
+    caminho_stream = Path(caminho_stream)
+    registros = ler_stream(caminho_stream)
+    inicio = next((r for r in registros if r.get('tipo') == 'inicio'), {})
+    fim = next((r for r in reversed(registros) if r.get('tipo') == 'fim'), {})
+    relatorio = next((r['texto'] for r in reversed(registros) if r.get('tipo') == 'relatorio'), '')
+
+    status = fim.get('status', 'interrompido')
+    conteudo = f"""
+{inicio.get('titulo', 'TESTE AUTOMATIZADO - BIBLIOTECH')}
+Data/Hora: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
+Timestamp: {inicio.get('timestamp', '')}
+
+TAREFA EXECUTADA:
+{inicio.get('tarefa', '')}
+
+RESULTADO DA EXECUÇÃO:
+{renderizar_passos(registros)}
+
+Status final: {status}
+Resultado final: {fim.get('resultado_final') or ''}
+
+RELATÓRIO DETALHADO:
+{relatorio}
+"""
+    if inicio.get('prompt_relatorio'):
+        conteudo += f"""
+PROMPT DE RELATÓRIO ORIGINAL:
+{inicio['prompt_relatorio']}
+"""
+
+    arquivo_evidencia = caminho_stream.parent / f"{nome_evidencia}.txt"
+    arquivo_relatorio = caminho_stream.parent / f"{nome_relatorio}.txt"
+    arquivo_evidencia.write_text(conteudo, encoding='utf-8')
+    arquivo_relatorio.write_text(relatorio, encoding='utf-8')
+    print(f"Evidência salva: {arquivo_evidencia}")
+    print(f"Evidência salva: {arquivo_relatorio}")
+    return arquivo_evidencia, arquivo_relatorio
+
+
+def registro_de_fim(resultado):
+    """
+    Registro final com o status da execução do agente
+    """
+    sucesso = resultado.is_successful()
+    return {
+        'tipo': 'fim',
+        'status': 'sucesso' if sucesso else ('falha' if sucesso is False else 'incompleto'),
+        'passos': resultado.number_of_steps(),
+        'duracao_s': round(resultado.total_duration_seconds(), 3),
+        'resultado_final': resultado.final_result(),
+        'erros': [e for e in resultado.errors() if e],
+    }
+
+
+class ExecucaoComEvidencias:
+    """
+    Uma execução do agente com as evidências completas: stream de passos, métricas, DOM incremental,
+    histórico em disco, monitor de progresso, relatório incremental e screenshots.
+    Na saída do bloco, registra o relatório, as métricas e os registros dos recursos, fecha o stream e
+    renderiza os arquivos; se algo falhar antes do registro de fim, ele é gravado com o erro.
+
+        async with ExecucaoComEvidencias(evidencias_dir, llm, tarefa, nome_evidencia, nome_relatorio,
+                                         titulo='TESTE BIBLIOTECH') as execucao:
+            agent = Agent(task=tarefa, llm=execucao.envolver_llm(llm))
+            resultado = await execucao.executar(agent)
+            execucao.relatorio_detalhado = await execucao.relatorio.gerar(resultado, prompt)
+    """
+
+    def __init__(self, evidencias_dir, llm, tarefa, nome_evidencia, nome_relatorio, execucao=None, **inicio):
+        # Importados aqui: relatorio_incremental depende deste módulo
+        from instrumentacao import MetricasExecucao
+        from dom_incremental import DomIncremental
+        from historico_em_disco import HistoricoEmDisco
+        from monitor_progresso import MonitorProgresso
+        from relatorio_incremental import RelatorioIncremental
+        from screenshots_evidencias import PipelineScreenshots
+
+        self.evidencias_dir = Path(evidencias_dir)
+        self.nomes_arquivos = (nome_evidencia, nome_relatorio)
+        self.execucao = execucao
+        inicio.setdefault('timestamp', datetime.datetime.now().strftime("%Y%m%d_%H%M%S"))
+        self._inicio = {'tipo': 'inicio', **inicio, 'tarefa': tarefa}
+
+        self.gravador = GravadorEvidencias(self.evidencias_dir)
+        self.metricas = MetricasExecucao()
+        self.dom_incremental = DomIncremental()
+        self.historico = HistoricoEmDisco(self.evidencias_dir)
+        self.monitor = MonitorProgresso(self.gravador)
+        self.relatorio = RelatorioIncremental(self.metricas.envolver_llm(llm, fase='relatorio'), tarefa)
+        self.screenshots = PipelineScreenshots(self.evidencias_dir, self.gravador)
+        # Recursos opcionais (ativo + registro()) com um registro no fim do stream
+        self.recursos = [self.dom_incremental, self.historico]
+        self.resultado = None
+        self.relatorio_detalhado = None
+        self._screenshots_fechados = False
+
+    async def __aenter__(self):
+        self.gravador.iniciar()
+        self.gravador.registrar(self._inicio)
+        return self
+
+    def envolver_llm(self, llm):
+        """
+        LLM do agente com as métricas de latência, tokens e custo por passo
+        """
+        return self.metricas.envolver_llm(llm)
+
+    async def executar(self, agent, on_step_start=None, **kwargs):
+        """
+        agent.run com os hooks de evidência; on_step_start recebe um hook extra (por exemplo, o perfil rápido).
+        Grava o registro de fim e fecha os screenshots antes de retornar o resultado.
+        """
+        self.metricas.instrumentar_agente(agent)
+        self.dom_incremental.instalar(agent)
+        self.historico.instalar(agent)
+        self.monitor.instalar(agent)
+        resultado = await agent.run(
+            on_step_start=encadear_hooks(self.metricas.iniciar_passo, on_step_start),
+            on_step_end=encadear_hooks(self.gravador.registrar_passo, self.metricas.registrar_passo,
+                                       self.relatorio.registrar_passo, self.screenshots.registrar_passo,
+                                       self.monitor.registrar_passo),
+            **kwargs)
+        self.resultado = resultado
+        self.gravador.registrar(self.monitor.ajustar_fim(registro_de_fim(resultado)))
+        await self._fechar_screenshots()
+        return resultado
+
+    async def _fechar_screenshots(self):
+        if not self._screenshots_fechados:
+            self._screenshots_fechados = True
+            await self.screenshots.fechar()
+
+    async def __aexit__(self, tipo, erro, rastreamento):
+        if erro is not None:
+            self.relatorio.cancelar()
+            if self.resultado is None:
+                # Fecha o stream com o registro de fim dos passos já executados
+                status = 'erro' if isinstance(erro, Exception) else 'interrompido'
+                self.gravador.registrar({'tipo': 'fim', 'status': status,
+                                         'resultado_final': f"Erro ao executar o agente: {type(erro).__name__}: {erro}"})
+                print(f"❌ Execução do agente falhou ({status}): {erro}")
+        await self._fechar_screenshots()
+
+        if self.relatorio_detalhado is not None:
+            self.gravador.registrar({'tipo': 'relatorio', 'texto': self.relatorio_detalhado})
+        self.gravador.registrar(self.metricas.salvar(self.evidencias_dir, execucao=self.execucao))
+        for recurso in self.recursos:
+            if recurso.ativo:
+                self.gravador.registrar(recurso.registro())
+        await self.gravador.fechar()
+        renderizar_arquivos(self.gravador.caminho, *self.nomes_arquivos)
+        return False
@@ -0,0 +1,421 @@
+"""
+Executor de múltiplos cenários do Browser Use em paralelo
+Roda uma lista de tarefas como agentes concorrentes sobre um pool limitado de navegadores
+"""
+
+import os
+import copy
+import json
+import multiprocessing
+import argparse
+from dotenv import load_dotenv
+import asyncio
+import datetime
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from agentUniversal import configurar_llm
+from cache_llm import CacheMissError
+from sessao_autenticada import obter_snapshot, aplicar_snapshot
+from replay_trace import exportar_trace
+from evidencias_stream import ExecucaoComEvidencias
+from perfil_rapido import PerfilRapido
+
+# Carrega as variáveis de ambiente do arquivo .env
+load_dotenv()
+load_dotenv('config.env')
+
+URL_BIBLIOTECH = "https://bibliotechapp.vercel.app/login"
+EMAIL_BIBLIOTECH = "thegoldengrace@gmail.com"
+SENHA_BIBLIOTECH = "123456"
+LOGIN_BIBLIOTECH = f"Realize login com email: {EMAIL_BIBLIOTECH} e senha: {SENHA_BIBLIOTECH} "
+# Substitui o passo de login quando o agente começa com a sessão já autenticada
+SESSAO_BIBLIOTECH = ("A sessão já está autenticada; só se a tela de login for exibida, "
+                     f"realize login com email: {EMAIL_BIBLIOTECH} e senha: {SENHA_BIBLIOTECH} ")
+
+# Cenários da exploração do Bibliotech, um por funcionalidade
+CENARIOS_BIBLIOTECH = {
+    'login': (f"Acesse a aplicação Bibliotech em {URL_BIBLIOTECH} "
+              "Teste o fluxo de login: credenciais válidas (email: thegoldengrace@gmail.com e senha: 123456), "
+              "senha incorreta, email inválido e campos vazios. Teste também o logout. "
+              "Gere cenários de teste em formato Gherkin (Given-When-Then) positivos e negativos para o Login "),
+    'busca': (f"Acesse a aplicação Bibliotech em {URL_BIBLIOTECH} " + LOGIN_BIBLIOTECH +
+              "Explore o catálogo: buscar livros, filtrar, ordenar e paginar. "
+              "Gere cenários de teste em formato Gherkin (Given-When-Then) positivos e negativos para a Busca de Livros "),
+    'emprestimo': (f"Acesse a aplicação Bibliotech em {URL_BIBLIOTECH} " + LOGIN_BIBLIOTECH +
+                   "Explore o fluxo de empréstimo de livros e a tela de meus empréstimos. "
+                   "Gere cenários de teste em formato Gherkin (Given-When-Then) positivos e negativos para o Empréstimo "),
+    'devolucao': (f"Acesse a aplicação Bibliotech em {URL_BIBLIOTECH} " + LOGIN_BIBLIOTECH +
+                  "Explore o fluxo de devolução de livros emprestados. "
+                  "Gere cenários de teste em formato Gherkin (Given-When-Then) positivos e negativos para a Devolução "),
+    'reserva': (f"Acesse a aplicação Bibliotech em {URL_BIBLIOTECH} " + LOGIN_BIBLIOTECH +
+                "Explore o fluxo de reserva de livros indisponíveis. "
+                "Gere cenários de teste em formato Gherkin (Given-When-Then) positivos e negativos para a Reserva "),
+    'perfil': (f"Acesse a aplicação Bibliotech em {URL_BIBLIOTECH} " + LOGIN_BIBLIOTECH +
+               "Explore o perfil do usuário: visualização e edição dos dados. "
+               "Gere cenários de teste em formato Gherkin (Given-When-Then) positivos e negativos para o Perfil "),
+}
+
+PROMPT_RELATORIO_CENARIO = """Gere relatório conciso sobre o cenário '{nome}' testado no Bibliotech:
+1. Ações executadas e status
+2. Funcionalidades testadas
+3. Problemas encontrados
+4. Cenários Gherkin (positivos e negativos)
+5. Score geral (1-10)"""
+
+
+class PoolNavegadores:
+    """
+    Pool limitado de sessões de navegador reaproveitadas entre os cenários.
+    As sessões são criadas sob demanda até o tamanho máximo e mantidas vivas
+    (keep_alive) para que o próximo cenário não pague a inicialização do Chromium.
+    """
+
+    def __init__(self, tamanho, headless=None):
+        self.tamanho = max(1, tamanho)
+        self.headless = headless
+        self._livres = asyncio.Queue()
+        self._sessoes = []
+        self._perfis = {}
+
+    def _criar_sessao(self):
+        from browser_use import BrowserSession
+        # Com PERFIL_RAPIDO ligado, cada sessão bloqueia imagens, fontes, mídia e analytics
+        perfil = PerfilRapido()
+        sessao = BrowserSession(headless=self.headless, keep_alive=True, **perfil.argumentos())
+        self._perfis[id(sessao)] = perfil
+        return sessao
+
+    def perfil(self, sessao):
+        return self._perfis[id(sessao)]
+
+    async def adquirir(self):
+        if self._livres.empty() and len(self._sessoes) < self.tamanho:
+            sessao = self._criar_sessao()
+            self._sessoes.append(sessao)
+            return sessao
+        return await self._livres.get()
+
+    async def liberar(self, sessao):
+        # Limpa os cookies para que um cenário não herde a sessão do anterior
+        try:
+            await sessao.clear_cookies()
+        except Exception as e:
+            print(f"⚠️ Não foi possível limpar os cookies da sessão: {e}")
+        self._livres.put_nowait(sessao)
+
+    @asynccontextmanager
+    async def sessao(self, storage_state=None):
+        sessao = await self.adquirir()
+        try:
+            if storage_state:
+                await aplicar_snapshot(sessao, storage_state)
+            yield sessao
+        finally:
+            await self.liberar(sessao)
+
+    async def aquecer(self, url=None):
+        """
+        Abre de uma vez todas as sessões que faltam no pool e, com url, já carrega essa página,
+        para que nenhum cenário pague a inicialização do Chromium
+        """
+        novas = [self._criar_sessao() for _ in range(self.tamanho - len(self._sessoes))]
+        self._sessoes.extend(novas)
+        await asyncio.gather(*(self._preparar(sessao, url) for sessao in novas))
+        for sessao in novas:
+            self._livres.put_nowait(sessao)
+
+    async def _preparar(self, sessao, url):
+        try:
+            await sessao.start()
+            await self.perfil(sessao).aplicar(sessao)
+            if url:
+                from browser_use.browser.events import NavigateToUrlEvent
+                await sessao.event_bus.dispatch(NavigateToUrlEvent(url=url))
+        except Exception as e:
+            print(f"⚠️ Não foi possível aquecer a sessão do navegador: {e}")
+
+    async def fechar(self):
+        for sessao in self._sessoes:
+            try:
+                await sessao.kill()
+            except Exception as e:
+                print(f"⚠️ Erro ao fechar navegador: {e}")
+        self._sessoes.clear()
+        for perfil in self._perfis.values():
+            perfil.liberar()
+        self._perfis.clear()
+
+
+def llm_por_agente(llm):
+    """
+    Cria uma cópia rasa do LLM para cada agente.
+    O Agent registra o ainvoke do LLM no seu próprio contador de tokens; com uma
+    cópia por agente, a contagem de um cenário não se mistura com a dos outros.
+    """
+    return copy.copy(llm)
+
+
+async def gerar_relatorio(relatorio, resultado, prompt):
+    """
+    Gera um relatório em texto com o LLM configurado, resumindo o histórico por funcionalidade
+    """
+    try:
+        return await relatorio.gerar(resultado, prompt)
+    except CacheMissError:
+        # No modo replay nenhuma chamada de API pode ser feita: o cenário falha em vez de passar sem relatório
+        raise
+    except Exception as e:
+        return f"Erro ao gerar relatório: {str(e)}"
+
+
+async def executar_cenario(nome, tarefa, llm, pool, pasta_suite, max_passos=100, storage_state=None):
+    """
+    Executa um cenário em uma sessão do pool e salva suas evidências.
+    Com storage_state, o navegador começa com a sessão autenticada do snapshot.
+    """
+    from browser_use import Agent
+
+    evidencias_dir = Path(pasta_suite) / f"cenario_{nome}"
+    os.makedirs(evidencias_dir, exist_ok=True)
+
+    inicio = time.monotonic()
+    status = {'cenario': nome, 'pasta': str(evidencias_dir)}
+    if storage_state:
+        tarefa = tarefa.replace(LOGIN_BIBLIOTECH, SESSAO_BIBLIOTECH)
+    print(f"▶️  Iniciando cenário '{nome}'")
+
+    execucao = ExecucaoComEvidencias(evidencias_dir, llm, tarefa, f"evidencias_{nome}", f"relatorio_detalhado_{nome}",
+                                     execucao=nome, titulo=f"TESTE BIBLIOTECH - CENÁRIO {nome.upper()}")
+    try:
+        async with execucao:
+            async with pool.sessao(storage_state) as navegador:
+                perfil = pool.perfil(navegador)
+                perfil.zerar()
+                execucao.recursos.append(perfil)
+                agent = Agent(task=tarefa, llm=execucao.envolver_llm(llm_por_agente(llm)), browser_session=navegador)
+                resultado = await execucao.executar(agent, on_step_start=perfil.registrar_passo, max_steps=max_passos)
+            exportar_trace(resultado, evidencias_dir / f"trace_{nome}.json", tarefa)
+
+            # O relatório é gerado depois de devolver o navegador ao pool
+            execucao.relatorio_detalhado = await gerar_relatorio(execucao.relatorio, resultado,
+                                                                 PROMPT_RELATORIO_CENARIO.format(nome=nome))
+    except Exception as e:
+        status.update(status='erro', erro=str(e), duracao_s=round(time.monotonic() - inicio, 2))
+        print(f"❌ Cenário '{nome}' falhou: {e}")
+        return status
+
+    status.update(
+        status='travado' if execucao.monitor.travado else ('sucesso' if resultado.is_successful() else 'falha'),
+        passos=resultado.number_of_steps(),
+        duracao_s=round(time.monotonic() - inicio, 2),
+    )
+    print(f"✅ Cenário '{nome}' concluído em {status['duracao_s']}s ({status['status']})")
+    return status
+
+
+async def executar_lote(cenarios, llm, pasta_suite, concorrencia=3, max_passos=100, headless=None, snapshot=None):
+    """
+    Executa os cenários na pasta da suíte com um pool de navegadores próprio; retorna o status de cada um
+    """
+    pool = PoolNavegadores(concorrencia, headless=headless)
+    try:
+        return await asyncio.gather(*[
+            executar_cenario(nome, tarefa, llm, pool, pasta_suite, max_passos,
+                             storage_state=snapshot if LOGIN_BIBLIOTECH in tarefa else None)
+            for nome, tarefa in cenarios.items()
+        ])
+    finally:
+        await pool.fechar()
+
+
+def dividir_em_shards(cenarios, processos, concorrencia=None):
+    """
+    Distribui os cenários entre os processos alternadamente, mantendo a ordem dentro de cada shard.
+    Cada processo precisa de ao menos um navegador, então não há mais shards que a concorrência.
+    """
+    limite = min(processos, len(cenarios), concorrencia or processos)
+    shards = [{} for _ in range(max(1, limite))]
+    for posicao, (nome, tarefa) in enumerate(cenarios.items()):
+        shards[posicao % len(shards)][nome] = tarefa
+    return shards
+
+
+def repartir_concorrencia(concorrencia, shards):
+    """
+    Navegadores de cada shard, somando exatamente a concorrência total (os primeiros shards,
+    que recebem os cenários que sobram na divisão, ficam com os navegadores que sobram)
+    """
+    base, sobra = divmod(max(concorrencia, len(shards)), len(shards))
+    return [base + (1 if posicao < sobra else 0) for posicao in range(len(shards))]
+
+
+def _executar_shard(cenarios, pasta_suite, concorrencia, max_passos, headless, snapshot, criar_llm=None):
+    """
+    Ponto de entrada de cada processo: LLM, event loop e navegadores próprios.
+    criar_llm (função de módulo, para poder ir ao processo) recria o LLM de quem chamou;
+    sem ela, o LLM vem do DEFAULT_MODEL.
+    """
+    llm = (criar_llm or configurar_llm)()
+    if not llm:
+        return [{'cenario': nome, 'status': 'erro', 'erro': "Não foi possível configurar nenhum modelo de IA"}
+                for nome in cenarios]
+    return asyncio.run(executar_lote(cenarios, llm, Path(pasta_suite), concorrencia, max_passos, headless, snapshot))
+
+
+async def executar_em_processos(cenarios, processos, pasta_suite, concorrencia=3, max_passos=100, headless=None,
+                                snapshot=None, criar_llm=None):
+    """
+    Divide os cenários entre processos (um event loop e um pool de navegadores em cada) para usar
+    vários núcleos. A concorrência é o total de navegadores, repartido entre os processos.
+    """
+    shards = dividir_em_shards(cenarios, processos, concorrencia)
+    concorrencias = repartir_concorrencia(concorrencia, shards)
+    print(f"🧩 {len(shards)} processos com {', '.join(map(str, concorrencias))} navegador(es)")
+
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=len(shards), mp_context=multiprocessing.get_context('spawn')) as executor:
+        por_shard = await asyncio.gather(*[
+            loop.run_in_executor(executor, _executar_shard, shard, str(pasta_suite), concorrencia_shard, max_passos,
+                                 headless, snapshot, criar_llm)
+            for shard, concorrencia_shard in zip(shards, concorrencias)
+        ], return_exceptions=True)
+
+    resultados = {}
+    for shard, resultado in zip(shards, por_shard):
+        if isinstance(resultado, BaseException):
+            print(f"❌ Processo falhou com os cenários {', '.join(shard)}: {resultado}")
+            resultado = [{'cenario': nome, 'status': 'erro', 'erro': f"Processo falhou: {resultado}"} for nome in shard]
+        resultados.update((status['cenario'], status) for status in resultado)
+    return [resultados[nome] for nome in cenarios]
+
+
+def consolidar_suite(pasta_suite, resultados):
+    """
+    Soma as métricas dos cenários e junta os relatórios em relatorio_suite.txt na pasta da suíte
+    """
+    totais = {'passos': 0, 'tokens_prompt': 0, 'tokens_resposta': 0, 'custo': 0.0}
+    partes = []
+    for status in resultados:
+        pasta = Path(status.get('pasta', ''))
+        arquivo_metricas = pasta / 'metricas.json'
+        if arquivo_metricas.exists():
+            with open(arquivo_metricas, encoding='utf-8') as f:
+                metricas = json.load(f)
+            for chave in totais:
+                totais[chave] += metricas.get(chave) or 0
+        arquivo_relatorio = pasta / f"relatorio_detalhado_{status['cenario']}.txt"
+        relatorio = arquivo_relatorio.read_text(encoding='utf-8') if arquivo_relatorio.exists() else \
+            status.get('erro', 'Relatório não gerado')
+        partes.append(f"{'=' * 80}\nCENÁRIO {status['cenario'].upper()} - {status['status']} "
+                      f"({status.get('duracao_s', '?')}s)\n{'=' * 80}\n{relatorio.strip()}\n")
+    totais['custo'] = round(totais['custo'], 6)
+
+    sucesso = sum(1 for r in resultados if r['status'] == 'sucesso')
+    cabecalho = (f"RELATÓRIO DA SUÍTE - BIBLIOTECH\nCenários: {len(resultados)} ({sucesso} com sucesso)\n"
+                 f"Passos: {totais['passos']} | Tokens: {totais['tokens_prompt']}+{totais['tokens_resposta']} | "
+                 f"Custo estimado: US$ {totais['custo']:.4f}\n\n")
+    (Path(pasta_suite) / "relatorio_suite.txt").write_text(cabecalho + '\n'.join(partes), encoding='utf-8')
+    return totais
+
+
+async def executar_cenarios(cenarios, llm=None, concorrencia=3, max_passos=100, headless=None, login_unico=False,
+                            processos=1, criar_llm=None):
+    """
+    Executa os cenários concorrentemente, limitados pelo tamanho do pool de navegadores.
+    Com login_unico, o login é feito uma vez e os cenários que dependem dele começam
+    autenticados pelo snapshot da sessão. Com processos > 1, os cenários são divididos
+    entre processos e as evidências de todos ficam na mesma pasta da suíte; cada processo
+    recria o LLM com criar_llm (padrão: configurar_llm, pelo DEFAULT_MODEL).
+    Retorna a pasta da suíte e a lista com o status de cada cenário.
+    """
+    llm = llm or configurar_llm()
+    if not llm:
+        print("❌ Não foi possível configurar nenhum modelo de IA")
+        return None, []
+
+    snapshot = None
+    if login_unico:
+        snapshot = await obter_snapshot(llm_por_agente(llm), URL_BIBLIOTECH, EMAIL_BIBLIOTECH, SENHA_BIBLIOTECH,
+                                        headless=headless)
+        if not snapshot:
+            print("⚠️ Seguindo sem sessão reaproveitada: cada cenário fará o próprio login")
+
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    pasta_suite = Path(f"evidencias/suite_{timestamp}")
+    os.makedirs(pasta_suite, exist_ok=True)
+
+    print(f"🚀 Executando {len(cenarios)} cenários com concorrência {concorrencia}")
+    print(f"📁 Evidências serão salvas em: {pasta_suite}")
+
+    inicio = time.monotonic()
+    if processos > 1 and len(cenarios) > 1 and concorrencia > 1:
+        resultados = await executar_em_processos(cenarios, processos, pasta_suite, concorrencia, max_passos,
+                                                 headless, snapshot, criar_llm)
+    else:
+        processos = 1
+        resultados = await executar_lote(cenarios, llm, pasta_suite, concorrencia, max_passos, headless, snapshot)
+
+    resumo = {
+        'timestamp': timestamp,
+        'concorrencia': concorrencia,
+        'processos': processos,
+        'login_unico': bool(snapshot),
+        'duracao_total_s': round(time.monotonic() - inicio, 2),
+        'totais': consolidar_suite(pasta_suite, resultados),
+        'cenarios': resultados,
+    }
+    with open(pasta_suite / "resumo_suite.json", 'w', encoding='utf-8') as f:
+        json.dump(resumo, f, ensure_ascii=False, indent=2)
+
+    print(f"\nSuíte concluída em {resumo['duracao_total_s']}s - Evidências: {pasta_suite}")
+    for r in resultados:
+        print(f"- {r['cenario']}: {r['status']} ({r.get('duracao_s', '?')}s)")
+    return pasta_suite, resultados
+
+
+def ler_argumentos():
+    parser = argparse.ArgumentParser(description="Executa cenários do Bibliotech em paralelo")
+    parser.add_argument('cenarios', nargs='*',
+                        help=f"Cenários a executar (padrão: todos). Disponíveis: {', '.join(CENARIOS_BIBLIOTECH)}")
+    parser.add_argument('--tarefas', help="Arquivo JSON com um objeto {nome: tarefa} a executar no lugar dos cenários padrão")
+    parser.add_argument('--concorrencia', type=int, default=int(os.getenv('MAX_CONCORRENCIA', '3')),
+                        help="Número máximo de navegadores simultâneos")
+    parser.add_argument('--max-passos', type=int, default=int(os.getenv('MAX_PASSOS', '100')),
+                        help="Número máximo de passos por agente")
+    parser.add_argument('--headless', action='store_true', help="Executa os navegadores sem interface")
+    parser.add_argument('--login-unico', action='store_true',
+                        help="Faz login uma vez e reaproveita a sessão autenticada nos demais cenários")
+    parser.add_argument('--processos', type=int, default=int(os.getenv('PROCESSOS', '1')),
+                        help="Divide os cenários entre processos para usar vários núcleos (0 = um por núcleo)")
+    return parser.parse_args()
+
+
+async def main():
+    args = ler_argumentos()
+
+    if args.tarefas:
+        with open(args.tarefas, encoding='utf-8') as f:
+            cenarios = json.load(f)
+    else:
+        cenarios = CENARIOS_BIBLIOTECH
+    if args.cenarios:
+        desconhecidos = [c for c in args.cenarios if c not in cenarios]
+        if desconhecidos:
+            print(f"❌ Cenários desconhecidos: {', '.join(desconhecidos)}")
+            return
+        cenarios = {nome: cenarios[nome] for nome in args.cenarios}
+
+    await executar_cenarios(
+        cenarios,
+        concorrencia=args.concorrencia,
+        max_passos=args.max_passos,
+        headless=True if args.headless else None,
+        login_unico=args.login_unico,
+        processos=args.processos or os.cpu_count() or 1,
+    )
+
+if __name__ == "__main__":
+    asyncio.run(main())
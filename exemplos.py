@@ -1,71 +1,173 @@
 """
 Exemplos de uso do Browser Use com diferentes tarefas
+Sem argumentos, mostra o menu; com nomes ou padrões (glob), executa os exemplos em lote:
+    python exemplos.py --todos
+    python exemplos.py pesquisa_* github --concorrencia 2 --json resultados.json
 """
 
 from browser_use import Agent, ChatGoogle
 from dotenv import load_dotenv
+import os
+import sys
+import json
+import time
+import fnmatch
 import asyncio
+import argparse
 
 load_dotenv()
+load_dotenv('config.env')
+
+# nome: (descrição, tarefa), na ordem do menu
+EXEMPLOS = {
+    'pesquisa_google': ("Pesquisa no Google",
+                        "Pesquise por 'Python automation' no Google e me diga os primeiros 3 resultados"),
+    'noticias': ("Buscar notícias",
+                 "Vá até o site de notícias e encontre a manchete principal de tecnologia"),
+    'github': ("Navegar no GitHub",
+               "Acesse o GitHub e encontre os 5 repositórios mais populares relacionados a 'browser automation'"),
+    'criptomoedas': ("Verificar criptomoedas",
+                     "Encontre o preço atual do Bitcoin e Ethereum"),
+    'show_hn': ("Verificar Show HN",
+                "Encontre o post número 1 no Show HN"),
+}
+
+async def executar_exemplo(nome, llm=None, browser_session=None, max_passos=100):
+    """Executa um exemplo; sem llm, cria o ChatGoogle padrão e, sem browser_session, um navegador próprio"""
+    llm = llm or ChatGoogle(model="gemini-2.0-flash-exp")
+    agent = Agent(task=EXEMPLOS[nome][1], llm=llm, browser_session=browser_session)
+    return await agent.run(max_steps=max_passos)
 
 async def exemplo_pesquisa_google():
     """Exemplo: Pesquisar no Google"""
-    llm = ChatGoogle(model="gemini-2.0-flash-exp")
-    task = "Pesquise por 'Python automation' no Google e me diga os primeiros 3 resultados"
-    agent = Agent(task=task, llm=llm)
-    await agent.run()
+    return await executar_exemplo('pesquisa_google')
 
 async def exemplo_noticias():
     """Exemplo: Buscar notícias"""
-    llm = ChatGoogle(model="gemini-2.0-flash-exp")
-    task = "Vá até o site de notícias e encontre a manchete principal de tecnologia"
-    agent = Agent(task=task, llm=llm)
-    await agent.run()
+    return await executar_exemplo('noticias')
 
 async def exemplo_github():
     """Exemplo: Navegar no GitHub"""
-    llm = ChatGoogle(model="gemini-2.0-flash-exp")
-    task = "Acesse o GitHub e encontre os 5 repositórios mais populares relacionados a 'browser automation'"
-    agent = Agent(task=task, llm=llm)
-    await agent.run()
+    return await executar_exemplo('github')
 
 async def exemplo_criptomoedas():
     """Exemplo: Verificar preços de criptomoedas"""
-    llm = ChatGoogle(model="gemini-2.0-flash-exp")
-    task = "Encontre o preço atual do Bitcoin e Ethereum"
-    agent = Agent(task=task, llm=llm)
-    await agent.run()
+    return await executar_exemplo('criptomoedas')
 
 async def exemplo_show_hn():
     """Exemplo: Verificar Show HN"""
-    llm = ChatGoogle(model="gemini-2.0-flash-exp")
-    task = "Encontre o post número 1 no Show HN"
-    agent = Agent(task=task, llm=llm)
-    await agent.run()
+    return await executar_exemplo('show_hn')
+
+def selecionar_exemplos(padroes):
+    """Nomes dos exemplos que casam com algum dos padrões (nome exato ou glob, como pesquisa_*)"""
+    selecionados = [nome for nome in EXEMPLOS if any(fnmatch.fnmatch(nome, p) for p in padroes)]
+    desconhecidos = [p for p in padroes if not any(fnmatch.fnmatch(nome, p) for nome in EXEMPLOS)]
+    return selecionados, desconhecidos
+
+async def _executar_no_pool(nome, llm, pool, max_passos):
+    """Executa um exemplo em uma sessão do pool e retorna a linha da tabela de resultados"""
+    from cache_llm import CacheMissError
+    from executor_cenarios import llm_por_agente
+    from instrumentacao import MetricasExecucao
+
+    inicio = time.monotonic()
+    metricas = MetricasExecucao()
+    linha = {'exemplo': nome}
+    try:
+        async with pool.sessao() as navegador:
+            resultado = await executar_exemplo(nome, metricas.envolver_llm(llm_por_agente(llm)), navegador, max_passos)
+        sucesso = resultado.is_successful()
+        linha.update(status='sucesso' if sucesso else ('falha' if sucesso is False else 'incompleto'),
+                     passos=resultado.number_of_steps(), resultado=resultado.final_result())
+    except CacheMissError:
+        # No modo replay nenhuma chamada de API pode ser feita: o lote para em vez de seguir com uma linha de erro
+        raise
+    except Exception as e:
+        linha.update(status='erro', passos=0, erro=f"{type(e).__name__}: {e}")
+    resumo = metricas.resumo()
+    linha.update(duracao_s=round(time.monotonic() - inicio, 2), tokens=resumo['tokens_prompt'] + resumo['tokens_resposta'],
+                 custo=resumo['custo'])
+    print(f"{'✅' if linha['status'] == 'sucesso' else '❌'} {nome}: {linha['status']} em {linha['duracao_s']}s")
+    return linha
+
+async def executar_em_lote(nomes, concorrencia=3, max_passos=100, headless=None):
+    """Executa os exemplos concorrentemente com um único LLM e um pool de navegadores compartilhados"""
+    from agentUniversal import configurar_llm
+    from executor_cenarios import PoolNavegadores
+
+    llm = configurar_llm()
+    if not llm:
+        print("❌ Não foi possível configurar nenhum modelo de IA")
+        return []
+
+    print(f"🚀 Executando {len(nomes)} exemplos com concorrência {concorrencia}")
+    pool = PoolNavegadores(min(concorrencia, len(nomes)), headless=headless)
+    try:
+        return await asyncio.gather(*[_executar_no_pool(nome, llm, pool, max_passos) for nome in nomes])
+    finally:
+        await pool.fechar()
+
+def imprimir_tabela(linhas):
+    """Tabela de resumo: status, passos, duração e tokens de cada exemplo"""
+    colunas = [('exemplo', 'Exemplo'), ('status', 'Status'), ('passos', 'Passos'), ('duracao_s', 'Duração (s)'),
+               ('tokens', 'Tokens')]
+    larguras = {chave: max(len(titulo), *(len(str(l.get(chave, ''))) for l in linhas)) for chave, titulo in colunas}
+    print()
+    print('  '.join(titulo.ljust(larguras[chave]) for chave, titulo in colunas))
+    print('  '.join('-' * larguras[chave] for chave, _ in colunas))
+    for linha in linhas:
+        print('  '.join(str(linha.get(chave, '')).ljust(larguras[chave]) for chave, _ in colunas).rstrip())
+    sucesso = sum(1 for l in linhas if l['status'] == 'sucesso')
+    print(f"\n{sucesso}/{len(linhas)} com sucesso | {sum(l['tokens'] for l in linhas)} tokens")
+
+def ler_argumentos():
+    parser = argparse.ArgumentParser(description="Exemplos do Browser Use (sem argumentos, abre o menu)")
+    parser.add_argument('exemplos', nargs='*',
+                        help=f"Nomes ou padrões dos exemplos a executar em lote. Disponíveis: {', '.join(EXEMPLOS)}")
+    parser.add_argument('--todos', action='store_true', help="Executa todos os exemplos em lote")
+    parser.add_argument('--concorrencia', type=int, default=int(os.getenv('MAX_CONCORRENCIA', '3')),
+                        help="Número máximo de navegadores simultâneos")
+    parser.add_argument('--max-passos', type=int, default=int(os.getenv('MAX_PASSOS', '100')),
+                        help="Número máximo de passos por exemplo")
+    parser.add_argument('--headless', action='store_true', help="Executa os navegadores sem interface")
+    parser.add_argument('--json', metavar='ARQUIVO', help="Grava os resultados em JSON (para o CI)")
+    return parser.parse_args()
+
+async def main_lote(args):
+    """Modo em lote: retorna o código de saída (1 se algum exemplo não terminou com sucesso)"""
+    nomes, desconhecidos = selecionar_exemplos(['*'] if args.todos else args.exemplos)
+    if desconhecidos:
+        print(f"❌ Nenhum exemplo corresponde a: {', '.join(desconhecidos)}")
+        return 2
+
+    inicio = time.monotonic()
+    linhas = await executar_em_lote(nomes, args.concorrencia, args.max_passos, True if args.headless else None)
+    if not linhas:
+        return 1
+    imprimir_tabela(linhas)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'duracao_total_s': round(time.monotonic() - inicio, 2), 'exemplos': linhas},
+                      f, ensure_ascii=False, indent=2)
+        print(f"📄 Resultados salvos em: {args.json}")
+    return 0 if all(l['status'] == 'sucesso' for l in linhas) else 1
 
 async def main():
     """Menu de exemplos"""
     print("Escolha um exemplo para executar:")
-    print("1. Pesquisa no Google")
-    print("2. Buscar notícias")
-    print("3. Navegar no GitHub")
-    print("4. Verificar criptomoedas")
-    print("5. Verificar Show HN")
-    
-    escolha = input("Digite o número da opção (1-5): ")
-    
-    if escolha == "1":
-        await exemplo_pesquisa_google()
-    elif escolha == "2":
-        await exemplo_noticias()
-    elif escolha == "3":
-        await exemplo_github()
-    elif escolha == "4":
-        await exemplo_criptomoedas()
-    elif escolha == "5":
-        await exemplo_show_hn()
+    for numero, (descricao, _) in enumerate(EXEMPLOS.values(), start=1):
+        print(f"{numero}. {descricao}")
+
+    escolha = input(f"Digite o número da opção (1-{len(EXEMPLOS)}): ")
+
+    if escolha.isdigit() and 1 <= int(escolha) <= len(EXEMPLOS):
+        await executar_exemplo(list(EXEMPLOS)[int(escolha) - 1])
     else:
         print("Opção inválida!")
 
 if __name__ == "__main__":
+    args = ler_argumentos()
+    if args.todos or args.exemplos:
+        sys.exit(asyncio.run(main_lote(args)))
     asyncio.run(main())
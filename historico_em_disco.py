@@ -0,0 +1,159 @@
+"""
+Histórico do agente com memória limitada (opcional, HISTORICO_EM_DISCO=ligado)
+O AgentHistoryList devolvido pelo agent.run() guarda todos os ActionResult, conteúdos extraídos e saídas
+do modelo até o fim da execução, e explorações de horas crescem sem limite na memória. Aqui só os últimos
+HISTORICO_JANELA passos ficam em memória: os anteriores vão para historico_agente.jsonl na pasta de
+evidências e são relidos sob demanda. O relatório, o trace e os hooks percorrem o histórico como antes.
+"""
+
+import os
+import json
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Carrega as variáveis de ambiente do arquivo .env
+load_dotenv()
+load_dotenv('config.env')
+
+
+def historico_em_disco_ativo():
+    return os.getenv('HISTORICO_EM_DISCO', 'desligado').lower() == 'ligado'
+
+
+def _reconstruir(dados, modelo_saida):
+    """
+    AgentHistory a partir da linha do log, como no AgentHistoryList.load_from_file
+    """
+    from browser_use.agent.views import AgentHistory
+
+    dados['model_output'] = modelo_saida.model_validate(dados['model_output']) if dados['model_output'] else None
+    if 'interacted_element' not in dados['state']:
+        dados['state']['interacted_element'] = None
+    return AgentHistory.model_validate(dados)
+
+
+class ListaEmDisco(list):
+    """
+    Lista de AgentHistory em que só os últimos `janela` itens ficam em memória.
+    As posições antigas guardam None e o deslocamento da linha no log; índice, fatia e
+    iteração releem do disco, então len(), historico[-1] e historico[n:] continuam valendo.
+    """
+
+    def __init__(self, caminho, janela):
+        super().__init__()
+        self.caminho = Path(caminho)
+        self.janela = max(1, janela)
+        # posição -> (deslocamento no log, classe do model_output para revalidar as ações)
+        self._em_disco = {}
+        self.bytes_em_disco = 0
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self.caminho.write_bytes(b'')
+
+    def append(self, item):
+        super().append(item)
+        posicao = len(self) - 1 - self.janela
+        if posicao >= 0 and posicao not in self._em_disco:
+            self._despejar(posicao)
+
+    def extend(self, itens):
+        for item in itens:
+            self.append(item)
+
+    def _despejar(self, posicao):
+        item = list.__getitem__(self, posicao)
+        linha = (json.dumps(item.model_dump(), ensure_ascii=False, default=str) + '\n').encode('utf-8')
+        with open(self.caminho, 'ab') as f:
+            f.write(linha)
+        self._em_disco[posicao] = (self.bytes_em_disco, type(item.model_output) if item.model_output else None)
+        self.bytes_em_disco += len(linha)
+        list.__setitem__(self, posicao, None)
+
+    def _ler(self, posicao, arquivo):
+        deslocamento, modelo_saida = self._em_disco[posicao]
+        arquivo.seek(deslocamento)
+        return _reconstruir(json.loads(arquivo.readline()), modelo_saida)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return list(self._percorrer(range(*indice.indices(len(self)))))
+        posicao = indice + len(self) if indice < 0 else indice
+        if posicao not in self._em_disco:
+            return list.__getitem__(self, indice)
+        with open(self.caminho, 'rb') as arquivo:
+            return self._ler(posicao, arquivo)
+
+    def __setitem__(self, indice, item):
+        if isinstance(indice, slice):
+            raise TypeError("ListaEmDisco não aceita atribuição por fatia")
+        self._em_disco.pop(indice + len(self) if indice < 0 else indice, None)
+        list.__setitem__(self, indice, item)
+
+    def __iadd__(self, itens):
+        self.extend(itens)
+        return self
+
+    def clear(self):
+        super().clear()
+        self._em_disco.clear()
+        self.bytes_em_disco = 0
+        self.caminho.write_bytes(b'')
+
+    def _sem_deslocamento(self, *args, **kwargs):
+        # As posições em _em_disco são absolutas: remover, inserir ou reordenar itens as desalinharia
+        raise TypeError("ListaEmDisco só aceita itens novos no fim (append/extend) ou troca por índice")
+
+    pop = insert = remove = sort = reverse = __delitem__ = __imul__ = _sem_deslocamento
+
+    def _percorrer(self, posicoes):
+        """
+        Itera as posições abrindo o log uma única vez; itens antigos são lidos um de cada vez
+        """
+        arquivo = None
+        try:
+            for posicao in posicoes:
+                if posicao in self._em_disco:
+                    arquivo = arquivo or open(self.caminho, 'rb')
+                    yield self._ler(posicao, arquivo)
+                else:
+                    yield list.__getitem__(self, posicao)
+        finally:
+            if arquivo:
+                arquivo.close()
+
+    def __iter__(self):
+        return self._percorrer(range(len(self)))
+
+    def __reversed__(self):
+        return self._percorrer(range(len(self) - 1, -1, -1))
+
+    def __repr__(self):
+        return f"ListaEmDisco({len(self)} passos, {len(self._em_disco)} em {self.caminho})"
+
+
+class HistoricoEmDisco:
+    """
+    Troca a lista do agent.history por uma ListaEmDisco antes do agent.run()
+    """
+
+    def __init__(self, evidencias_dir, ativo=None, janela=None):
+        self.ativo = historico_em_disco_ativo() if ativo is None else ativo
+        self.janela = janela or int(os.getenv('HISTORICO_JANELA', '20'))
+        self.caminho = Path(evidencias_dir) / 'historico_agente.jsonl'
+        self.lista = None
+
+    def instalar(self, agent):
+        if not self.ativo:
+            return
+        self.lista = ListaEmDisco(self.caminho, self.janela)
+        self.lista.extend(agent.history.history)
+        agent.history.history = self.lista
+
+    def registro(self):
+        """
+        Registro para o stream de evidências com quantos passos foram para o disco
+        """
+        em_disco = len(self.lista._em_disco) if self.lista is not None else 0
+        bytes_em_disco = self.lista.bytes_em_disco if self.lista is not None else 0
+        print(f"💾 Histórico em disco: {em_disco} passos ({bytes_em_disco / 1024:.0f} KB) fora da memória")
+        return {'tipo': 'historico_em_disco', 'janela': self.janela, 'passos_em_disco': em_disco,
+                'bytes_em_disco': bytes_em_disco, 'arquivo': str(self.caminho)}
@@ -0,0 +1,232 @@
+"""
+Índice SQLite das evidências com consultas rápidas pela linha de comando
+Cada execução salva é indexada a partir do seu passos.jsonl, sem reprocessar os arquivos de texto
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import argparse
+from pathlib import Path
+
+from evidencias_stream import ler_stream
+
+CAMINHO_INDICE = Path(os.getenv('INDICE_EVIDENCIAS', 'evidencias/indice.sqlite3'))
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS execucoes (
+    execucao TEXT PRIMARY KEY,
+    pasta TEXT NOT NULL,
+    titulo TEXT,
+    tarefa TEXT,
+    status TEXT,
+    passos INTEGER,
+    duracao_s REAL,
+    inicio TEXT,
+    fim TEXT,
+    tokens_prompt INTEGER,
+    tokens_resposta INTEGER,
+    custo REAL,
+    tamanho_stream INTEGER
+);
+CREATE TABLE IF NOT EXISTS passos (
+    execucao TEXT NOT NULL,
+    passo INTEGER NOT NULL,
+    acao TEXT,
+    url TEXT,
+    erro TEXT,
+    duracao_s REAL,
+    tokens INTEGER,
+    PRIMARY KEY (execucao, passo, acao)
+);
+CREATE TABLE IF NOT EXISTS impressoes (
+    execucao TEXT PRIMARY KEY,
+    chave TEXT NOT NULL,
+    assinatura TEXT NOT NULL,
+    acoes TEXT,
+    paginas TEXT,
+    erros TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_impressoes_chave ON impressoes (chave);
+CREATE INDEX IF NOT EXISTS idx_passos_acao ON passos (acao);
+CREATE INDEX IF NOT EXISTS idx_passos_erro ON passos (execucao) WHERE erro IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_execucoes_status ON execucoes (status);
+"""
+
+# Consultas prontas para os painéis; {filtro} recebe o --filtro da linha de comando
+CONSULTAS = {
+    'resumo': """SELECT COUNT(*) AS execucoes, ROUND(AVG(passos), 1) AS media_passos,
+                        ROUND(AVG(duracao_s), 1) AS media_duracao_s,
+                        SUM(status = 'sucesso') AS sucessos, SUM(status != 'sucesso') AS falhas,
+                        SUM(tokens_prompt) AS tokens_prompt, SUM(tokens_resposta) AS tokens_resposta
+                 FROM execucoes WHERE 1 = 1 {filtro}""",
+    'execucoes': """SELECT execucao, status, passos, duracao_s, inicio FROM execucoes
+                    WHERE 1 = 1 {filtro} ORDER BY inicio DESC LIMIT 50""",
+    'falhas': """SELECT execucao, status, passos, pasta FROM execucoes
+                 WHERE status != 'sucesso' {filtro} ORDER BY inicio DESC""",
+    'erros': """SELECT execucao, passo, acao, url, erro FROM passos
+                WHERE erro IS NOT NULL {filtro} ORDER BY execucao DESC, passo""",
+    'acoes': """SELECT acao, COUNT(*) AS vezes, SUM(erro IS NOT NULL) AS erros,
+                       ROUND(AVG(duracao_s), 2) AS media_duracao_s
+                FROM passos WHERE 1 = 1 {filtro} GROUP BY acao ORDER BY vezes DESC""",
+}
+
+# Execuções cuja pasta, tarefa, ação ou URL de algum passo contenham o texto do filtro
+FILTRO_EXECUCAO = """AND execucao IN (
+    SELECT execucao FROM execucoes WHERE execucao LIKE :filtro OR tarefa LIKE :filtro
+    UNION SELECT execucao FROM passos WHERE acao LIKE :filtro OR url LIKE :filtro)"""
+
+
+def conectar(caminho=None):
+    caminho = Path(caminho or CAMINHO_INDICE)
+    os.makedirs(caminho.parent, exist_ok=True)
+    # timeout: vários processos (executor_cenarios.py --processos) podem indexar ao mesmo tempo
+    conexao = sqlite3.connect(caminho, timeout=30)
+    conexao.executescript(ESQUEMA)
+    return conexao
+
+
+def id_execucao(caminho_stream):
+    """
+    Identificador da execução: caminho da pasta relativo a evidencias/
+    """
+    pasta = Path(caminho_stream).resolve().parent
+    partes = pasta.parts
+    if 'evidencias' in partes:
+        return '/'.join(partes[partes.index('evidencias') + 1:])
+    return pasta.name
+
+
+def indexar_execucao(caminho_stream, conexao=None):
+    """
+    Indexa (ou reindexa) uma execução a partir do seu passos.jsonl
+    """
+    from diff_execucoes import impressao_digital
+
+    caminho_stream = Path(caminho_stream)
+    fechar = conexao is None
+    conexao = conexao or conectar()
+    registros = ler_stream(caminho_stream)
+    execucao = id_execucao(caminho_stream)
+
+    inicio = next((r for r in registros if r.get('tipo') == 'inicio'), {})
+    fim = next((r for r in reversed(registros) if r.get('tipo') == 'fim'), {})
+    metricas = next((r for r in reversed(registros) if r.get('tipo') == 'metricas'), {})
+    passos = [r for r in registros if r.get('tipo') == 'passo']
+    impressao = impressao_digital(registros)
+    tokens_por_passo = {p['passo']: p['tokens'] for p in metricas.get('passos_metricas', [])}
+
+    linhas_passos = []
+    for r in passos:
+        erros = [res['error'] for res in r.get('resultados', []) if res.get('error')]
+        acoes = [next(iter(a)) for a in r.get('acoes', [])] or [None]
+        for acao in dict.fromkeys(acoes):
+            linhas_passos.append((execucao, r['passo'], acao, r.get('url'), erros[0] if erros else None,
+                                  r.get('duracao_s'), r.get('tokens', tokens_por_passo.get(r['passo']))))
+
+    with conexao:
+        conexao.execute("DELETE FROM passos WHERE execucao = ?", (execucao,))
+        conexao.execute(
+            "INSERT OR REPLACE INTO execucoes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (execucao, str(caminho_stream.parent), inicio.get('titulo'), inicio.get('tarefa'),
+             fim.get('status', 'interrompido'), len(passos), fim.get('duracao_s'),
+             inicio.get('registrado_em'), fim.get('registrado_em'),
+             metricas.get('tokens_prompt'), metricas.get('tokens_resposta'), metricas.get('custo'),
+             caminho_stream.stat().st_size),
+        )
+        conexao.executemany("INSERT OR REPLACE INTO passos VALUES (?, ?, ?, ?, ?, ?, ?)", linhas_passos)
+        # Impressão digital usada pelo diff_execucoes.py
+        conexao.execute(
+            "INSERT OR REPLACE INTO impressoes VALUES (?, ?, ?, ?, ?, ?)",
+            (execucao, impressao['chave'], impressao['assinatura'], json.dumps(impressao['acoes'], ensure_ascii=False),
+             json.dumps(impressao['paginas'], ensure_ascii=False), json.dumps(impressao['erros'], ensure_ascii=False)),
+        )
+
+    if fechar:
+        conexao.close()
+    return execucao
+
+
+def atualizar_indice(raiz='evidencias', conexao=None):
+    """
+    Indexa apenas os streams novos ou que mudaram de tamanho desde a última indexação
+    """
+    fechar = conexao is None
+    conexao = conexao or conectar()
+    # Execuções indexadas antes da tabela impressoes são reindexadas uma vez
+    conhecidos = dict(conexao.execute(
+        "SELECT pasta, tamanho_stream FROM execucoes WHERE execucao IN (SELECT execucao FROM impressoes)"))
+    novos = 0
+    for caminho in sorted(Path(raiz).rglob('passos.jsonl')):
+        if conhecidos.get(str(caminho.parent)) == caminho.stat().st_size:
+            continue
+        indexar_execucao(caminho, conexao)
+        novos += 1
+    if fechar:
+        conexao.close()
+    return novos
+
+
+def consultar(sql, parametros=(), conexao=None):
+    fechar = conexao is None
+    conexao = conexao or conectar()
+    cursor = conexao.execute(sql, parametros)
+    colunas = [c[0] for c in cursor.description] if cursor.description else []
+    linhas = cursor.fetchall()
+    if fechar:
+        conexao.close()
+    return colunas, linhas
+
+
+def imprimir_tabela(colunas, linhas):
+    if not colunas:
+        return
+    textos = [[('' if v is None else str(v)) for v in linha] for linha in linhas]
+    larguras = [min(60, max([len(c)] + [len(t[i]) for t in textos])) for i, c in enumerate(colunas)]
+    print('  '.join(c.ljust(larguras[i]) for i, c in enumerate(colunas)))
+    print('  '.join('-' * l for l in larguras))
+    for t in textos:
+        print('  '.join(v[:larguras[i]].ljust(larguras[i]) for i, v in enumerate(t)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consulta o índice das evidências")
+    parser.add_argument('consulta', nargs='?', default='resumo',
+                        help=f"Consulta pronta ({', '.join(CONSULTAS)}), 'sql' ou 'reindexar'")
+    parser.add_argument('sql', nargs='?', help="Comando SQL quando a consulta for 'sql'")
+    parser.add_argument('--filtro', help="Restringe às execuções cuja pasta, tarefa, ação ou URL contenham o texto "
+                                         "(ex.: --filtro login)")
+    parser.add_argument('--json', action='store_true', help="Saída em JSON")
+    args = parser.parse_args()
+
+    conexao = conectar()
+    if args.consulta == 'reindexar':
+        # Força a releitura dos streams; execuções compactadas mantêm o que já foi indexado
+        conexao.execute("UPDATE execucoes SET tamanho_stream = NULL")
+        conexao.commit()
+    novos = atualizar_indice(conexao=conexao)
+    if args.consulta == 'reindexar':
+        print(f"🗂️ {novos} execuções indexadas em {CAMINHO_INDICE}")
+        return
+
+    if args.consulta == 'sql':
+        if not args.sql:
+            parser.error("informe o comando SQL")
+        sql, parametros = args.sql, ()
+    elif args.consulta in CONSULTAS:
+        sql = CONSULTAS[args.consulta].format(filtro=FILTRO_EXECUCAO if args.filtro else '')
+        parametros = {'filtro': f"%{args.filtro}%"} if args.filtro else ()
+    else:
+        parser.error(f"consulta desconhecida: {args.consulta}")
+
+    colunas, linhas = consultar(sql, parametros, conexao)
+    conexao.close()
+    if args.json:
+        json.dump([dict(zip(colunas, l)) for l in linhas], sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        imprimir_tabela(colunas, linhas)
+
+if __name__ == "__main__":
+    main()
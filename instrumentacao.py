@@ -0,0 +1,294 @@
+"""
+Instrumentação da execução: latência por passo, chamadas ao LLM, tokens e custo estimado
+Separa o tempo de cada passo entre LLM, leitura do estado do navegador (DOM/screenshot),
+ações no navegador e o restante (nosso código), grava metricas.json na pasta da execução
+e, opcionalmente, um arquivo no formato texto do Prometheus/OpenMetrics.
+"""
+
+import os
+import re
+import json
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+
+from envelope_llm import EnvelopeLLM
+from limitador_taxa import faixa
+
+# Carrega as variáveis de ambiente do arquivo .env
+load_dotenv()
+load_dotenv('config.env')
+
+# Preço estimado em dólares por milhão de tokens (entrada, saída), pelo prefixo do modelo
+CUSTO_POR_MILHAO = {
+    'gemini-2.5-pro': (1.25, 10.00),
+    'gemini-2.5-flash': (0.30, 2.50),
+    'gemini-2.0-flash': (0.10, 0.40),
+    'gemini-1.5-pro': (1.25, 5.00),
+    'gemini-1.5-flash': (0.075, 0.30),
+    'gpt-4o-mini': (0.15, 0.60),
+    'gpt-4o': (2.50, 10.00),
+    'gpt-4.1-mini': (0.40, 1.60),
+    'gpt-4.1': (2.00, 8.00),
+}
+
+
+def custos_modelos():
+    """
+    Tabela de custos, com os valores de CUSTOS_MODELOS (JSON {"modelo": [entrada, saida]}) por cima
+    """
+    custos = dict(CUSTO_POR_MILHAO)
+    if os.getenv('CUSTOS_MODELOS'):
+        custos.update({m: tuple(v) for m, v in json.loads(os.getenv('CUSTOS_MODELOS')).items()})
+    return custos
+
+
+def custo_estimado(modelo, tokens_prompt, tokens_resposta, custos=None):
+    custos = custos or custos_modelos()
+    # O prefixo mais longo vence (gpt-4o-mini antes de gpt-4o)
+    for prefixo in sorted(custos, key=len, reverse=True):
+        if (modelo or '').startswith(prefixo):
+            entrada, saida = custos[prefixo]
+            return (tokens_prompt * entrada + tokens_resposta * saida) / 1_000_000
+    return None
+
+
+def _percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+class LLMInstrumentado(EnvelopeLLM):
+    """
+    Envelope que mede cada chamada ao LLM e registra tokens e custo nas métricas
+    """
+
+    def __init__(self, llm, metricas, fase):
+        super().__init__(llm)
+        self.metricas = metricas
+        self.fase = fase
+
+    async def ainvoke(self, messages, output_format=None):
+        inicio = time.monotonic()
+        chamada = {'fase': self.fase, 'passo': self.metricas.passo_atual if self.fase == 'agente' else None,
+                   'modelo': getattr(self.llm, 'model', None), 'provedor': getattr(self.llm, 'provider', None)}
+        try:
+            # A fase define a faixa de prioridade no limitador de taxa do provedor
+            with faixa(self.fase):
+                resposta = await self.llm.ainvoke(messages, output_format)
+        except Exception as e:
+            chamada.update(latencia_s=round(time.monotonic() - inicio, 3), erro=f"{type(e).__name__}: {e}")
+            self.metricas.chamadas_llm.append(chamada)
+            raise
+        uso = getattr(resposta, 'usage', None)
+        # Respostas do cache (usage=None) não consomem tokens
+        tokens_prompt = uso.prompt_tokens if uso else 0
+        tokens_resposta = uso.completion_tokens if uso else 0
+        chamada.update(latencia_s=round(time.monotonic() - inicio, 3), tokens_prompt=tokens_prompt,
+                       tokens_resposta=tokens_resposta,
+                       custo=custo_estimado(chamada['modelo'], tokens_prompt, tokens_resposta, self.metricas.custos))
+        self.metricas.chamadas_llm.append(chamada)
+        return resposta
+
+
+class MetricasExecucao:
+    """
+    Coleta as métricas de uma execução do agente.
+    Use envolver_llm() no LLM do Agent e do relatório, instrumentar_agente() no Agent e
+    os hooks iniciar_passo/registrar_passo em Agent.run(on_step_start=..., on_step_end=...).
+    """
+
+    def __init__(self):
+        self.custos = custos_modelos()
+        self.chamadas_llm = []
+        self.passos = []
+        self.passo_atual = None
+        self._tempos = {}
+        self._passos_vistos = 0
+        self._inicio = time.monotonic()
+
+    def envolver_llm(self, llm, fase='agente'):
+        return LLMInstrumentado(llm, self, fase)
+
+    def _cronometrar(self, componente, funcao):
+        async def cronometrada(*args, **kwargs):
+            inicio = time.monotonic()
+            try:
+                return await funcao(*args, **kwargs)
+            finally:
+                tempos = self._tempos.setdefault(self.passo_atual, {})
+                tempos[componente] = tempos.get(componente, 0.0) + time.monotonic() - inicio
+        return cronometrada
+
+    def instrumentar_agente(self, agent):
+        """
+        Mede a leitura do estado do navegador e a execução das ações de cada passo
+        """
+        agent._prepare_context = self._cronometrar('estado_navegador_s', agent._prepare_context)
+        agent.multi_act = self._cronometrar('acoes_navegador_s', agent.multi_act)
+        return agent
+
+    async def iniciar_passo(self, agent):
+        """
+        Hook para Agent.run(on_step_start=...)
+        """
+        self.passo_atual = agent.state.n_steps
+
+    async def registrar_passo(self, agent):
+        """
+        Hook para Agent.run(on_step_end=...): fecha as métricas dos passos novos do histórico
+        """
+        historico = agent.history.history
+        for posicao in range(self._passos_vistos, len(historico)):
+            item = historico[posicao]
+            passo = item.metadata.step_number if item.metadata else posicao
+            chamadas = [c for c in self.chamadas_llm if c['fase'] == 'agente' and c['passo'] == passo]
+            tempos = self._tempos.get(passo, {})
+            duracao = item.metadata.duration_seconds if item.metadata else None
+            llm_s = sum(c['latencia_s'] for c in chamadas)
+            metricas_passo = {
+                'passo': passo,
+                'duracao_s': round(duracao, 3) if duracao is not None else None,
+                'llm_s': round(llm_s, 3),
+                'estado_navegador_s': round(tempos.get('estado_navegador_s', 0.0), 3),
+                'acoes_navegador_s': round(tempos.get('acoes_navegador_s', 0.0), 3),
+                'chamadas_llm': len(chamadas),
+                'tokens_prompt': sum(c.get('tokens_prompt', 0) for c in chamadas),
+                'tokens_resposta': sum(c.get('tokens_resposta', 0) for c in chamadas),
+                'acoes': [nome for acao in (item.model_output.action if item.model_output else [])
+                          for nome in acao.model_dump(exclude_none=True)],
+            }
+            metricas_passo['tokens'] = metricas_passo['tokens_prompt'] + metricas_passo['tokens_resposta']
+            if duracao is not None:
+                # O que sobra do passo é o nosso código (hooks, histórico, mensagens)
+                medido = llm_s + metricas_passo['estado_navegador_s'] + metricas_passo['acoes_navegador_s']
+                metricas_passo['outros_s'] = round(max(0.0, duracao - medido), 3)
+            self.passos.append(metricas_passo)
+        self._passos_vistos = len(historico)
+
+    def resumo(self):
+        """
+        Totais da execução, por componente, por fase e por modelo
+        """
+        por_modelo = {}
+        for c in self.chamadas_llm:
+            modelo = por_modelo.setdefault(c['modelo'] or 'desconhecido', {
+                'provedor': c['provedor'], 'chamadas': 0, 'erros': 0, 'tokens_prompt': 0, 'tokens_resposta': 0,
+                'custo': 0.0, 'latencias': []})
+            modelo['chamadas'] += 1
+            modelo['erros'] += 1 if c.get('erro') else 0
+            modelo['tokens_prompt'] += c.get('tokens_prompt', 0)
+            modelo['tokens_resposta'] += c.get('tokens_resposta', 0)
+            modelo['custo'] += c.get('custo') or 0.0
+            modelo['latencias'].append(c['latencia_s'])
+        for modelo in por_modelo.values():
+            latencias = modelo.pop('latencias')
+            modelo.update(custo=round(modelo['custo'], 6), latencia_p50_s=_percentil(latencias, 0.5),
+                          latencia_p95_s=_percentil(latencias, 0.95))
+
+        por_fase = {}
+        for c in self.chamadas_llm:
+            fase = por_fase.setdefault(c['fase'], {'chamadas': 0, 'llm_s': 0.0, 'tokens': 0})
+            fase['chamadas'] += 1
+            fase['llm_s'] = round(fase['llm_s'] + c['latencia_s'], 3)
+            fase['tokens'] += c.get('tokens_prompt', 0) + c.get('tokens_resposta', 0)
+
+        def total(campo):
+            return round(sum(p.get(campo) or 0 for p in self.passos), 3)
+
+        custos = [c['custo'] for c in self.chamadas_llm if c.get('custo') is not None]
+        return {
+            'duracao_total_s': round(time.monotonic() - self._inicio, 3),
+            'passos': len(self.passos),
+            'tempo_passos_s': total('duracao_s'),
+            'llm_s': total('llm_s'),
+            'estado_navegador_s': total('estado_navegador_s'),
+            'acoes_navegador_s': total('acoes_navegador_s'),
+            'outros_s': total('outros_s'),
+            'tokens_prompt': sum(c.get('tokens_prompt', 0) for c in self.chamadas_llm),
+            'tokens_resposta': sum(c.get('tokens_resposta', 0) for c in self.chamadas_llm),
+            'custo': round(sum(custos), 6) if custos else None,
+            'por_fase': por_fase,
+            'por_modelo': por_modelo,
+        }
+
+    def registro(self):
+        """
+        Registro 'metricas' para o stream de evidências (lido pelo índice das evidências)
+        """
+        return {'tipo': 'metricas', **self.resumo(),
+                'passos_metricas': [{'passo': p['passo'], 'tokens': p['tokens']} for p in self.passos]}
+
+    def salvar(self, evidencias_dir, execucao=None):
+        """
+        Grava metricas.json (e metricas.prom) na pasta da execução e, com METRICAS_PROMETHEUS_DIR,
+        grava bibliotech_agente_<execucao>.prom para o textfile collector do node_exporter.
+        execucao é um nome estável (o script ou o cenário): cada nome tem um arquivo, substituído a cada
+        execução, e o momento da execução vai no valor de bibliotech_execucao_fim_segundos.
+        Retorna o registro para o stream de evidências.
+        """
+        evidencias_dir = Path(evidencias_dir)
+        execucao = execucao or 'agente'
+        resumo = self.resumo()
+        with open(evidencias_dir / 'metricas.json', 'w', encoding='utf-8') as f:
+            json.dump({**resumo, 'passos_detalhe': self.passos, 'chamadas_llm': self.chamadas_llm},
+                      f, ensure_ascii=False, indent=2)
+
+        texto = formatar_openmetrics(resumo, execucao, fim_s=time.time())
+        (evidencias_dir / 'metricas.prom').write_text(texto, encoding='utf-8')
+        pasta_prometheus = os.getenv('METRICAS_PROMETHEUS_DIR')
+        if pasta_prometheus:
+            destino = Path(pasta_prometheus) / f"bibliotech_agente_{re.sub(r'[^A-Za-z0-9_.-]', '_', execucao)}.prom"
+            os.makedirs(destino.parent, exist_ok=True)
+            # O collector só lê *.prom: o arquivo aparece completo, pelo rename
+            temporario = destino.with_name(f"{destino.name}.{os.getpid()}.tmp")
+            temporario.write_text(texto, encoding='utf-8')
+            os.replace(temporario, destino)
+
+        custo = f"US$ {resumo['custo']:.4f}" if resumo['custo'] is not None else "custo desconhecido"
+        print(f"⏱️ {resumo['passos']} passos em {resumo['tempo_passos_s']}s: LLM {resumo['llm_s']}s, "
+              f"estado do navegador {resumo['estado_navegador_s']}s, ações {resumo['acoes_navegador_s']}s, "
+              f"outros {resumo['outros_s']}s | tokens {resumo['tokens_prompt']}+{resumo['tokens_resposta']} ({custo})")
+        return self.registro()
+
+
+def formatar_openmetrics(resumo, execucao, fim_s=None):
+    """
+    Resumo no formato texto do OpenMetrics (aceito pelo textfile collector do Prometheus)
+    """
+    def rotulos(**valores):
+        return '{' + ','.join(f'{k}="{str(v).replace(chr(34), "")}"' for k, v in valores.items()) + '}'
+
+    familias = {
+        'bibliotech_execucao_fim_segundos': ('Momento em que a execução terminou (Unix)', []),
+        'bibliotech_passos': ('Passos executados pelo agente', []),
+        'bibliotech_tempo_segundos': ('Tempo dos passos por componente', []),
+        'bibliotech_llm_chamadas': ('Chamadas ao LLM', []),
+        'bibliotech_llm_tokens': ('Tokens consumidos', []),
+        'bibliotech_llm_custo_dolares': ('Custo estimado em dólares', []),
+        'bibliotech_llm_latencia_segundos': ('Latência das chamadas ao LLM', []),
+    }
+    if fim_s is not None:
+        familias['bibliotech_execucao_fim_segundos'][1].append((rotulos(execucao=execucao), round(fim_s, 3)))
+    familias['bibliotech_passos'][1].append((rotulos(execucao=execucao), resumo['passos']))
+    for componente in ('llm_s', 'estado_navegador_s', 'acoes_navegador_s', 'outros_s'):
+        familias['bibliotech_tempo_segundos'][1].append(
+            (rotulos(execucao=execucao, componente=componente[:-2]), resumo[componente]))
+    for modelo, dados in resumo['por_modelo'].items():
+        base = dict(execucao=execucao, modelo=modelo, provedor=dados['provedor'])
+        familias['bibliotech_llm_chamadas'][1].append((rotulos(**base), dados['chamadas']))
+        familias['bibliotech_llm_tokens'][1].append((rotulos(**base, tipo='prompt'), dados['tokens_prompt']))
+        familias['bibliotech_llm_tokens'][1].append((rotulos(**base, tipo='resposta'), dados['tokens_resposta']))
+        familias['bibliotech_llm_custo_dolares'][1].append((rotulos(**base), dados['custo']))
+        for quantil, campo in (('0.5', 'latencia_p50_s'), ('0.95', 'latencia_p95_s')):
+            if dados[campo] is not None:
+                familias['bibliotech_llm_latencia_segundos'][1].append((rotulos(**base, quantil=quantil), dados[campo]))
+
+    linhas = []
+    for nome, (ajuda, amostras) in familias.items():
+        linhas += [f"# HELP {nome} {ajuda}", f"# TYPE {nome} gauge"]
+        linhas += [f"{nome}{r} {valor}" for r, valor in amostras]
+    linhas.append('# EOF')
+    return '\n'.join(linhas) + '\n'
@@ -0,0 +1,343 @@
+"""
+Limitador de taxa por provedor de LLM, compartilhado entre todos os agentes do processo
+Baldes de requisições por minuto (RPM) e de tokens por minuto (TPM) reabastecidos continuamente.
+As chamadas esperam em uma fila com prioridade: os passos do agente passam na frente da geração
+de relatórios. Um 429 esvazia o balde do provedor em vez de cada agente repetir a chamada por
+conta própria. Com LIMITE_TAXA_ARQUIVO, o estado dos baldes fica em arquivo e vale entre processos.
+"""
+
+import os
+import json
+import time
+import heapq
+import asyncio
+import itertools
+import contextvars
+from contextlib import contextmanager
+from pathlib import Path
+from dotenv import load_dotenv
+
+from envelope_llm import EnvelopeLLM
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Carrega as variáveis de ambiente do arquivo .env
+load_dotenv()
+load_dotenv('config.env')
+
+# Faixa da chamada em andamento (definida pelo LLMInstrumentado a partir da fase); menor = mais prioritária
+FAIXA = contextvars.ContextVar('faixa_llm', default='agente')
+PRIORIDADES = {'agente': 0, 'relatorio': 1}
+
+# Aproximação usada para estimar os tokens do prompt antes da chamada
+CARACTERES_POR_TOKEN = 4
+TOKENS_POR_IMAGEM = 1000
+
+_limitadores = {}
+
+
+@contextmanager
+def faixa(nome):
+    """
+    Marca as chamadas ao LLM feitas dentro do bloco com a faixa de prioridade informada
+    """
+    token = FAIXA.set(nome)
+    try:
+        yield
+    finally:
+        FAIXA.reset(token)
+
+
+def estimar_tokens(messages):
+    """
+    Tokens aproximados do prompt: texto / CARACTERES_POR_TOKEN e um valor fixo por imagem
+    """
+    caracteres, imagens = 0, 0
+    for mensagem in messages:
+        conteudo = getattr(mensagem, 'content', None)
+        if isinstance(conteudo, str):
+            caracteres += len(conteudo)
+            continue
+        for parte in conteudo or []:
+            if getattr(parte, 'type', None) == 'image_url':
+                imagens += 1
+            else:
+                caracteres += len(getattr(parte, 'text', '') or '')
+    return caracteres // CARACTERES_POR_TOKEN + imagens * TOKENS_POR_IMAGEM
+
+
+def erro_de_limite(erro):
+    if getattr(erro, 'status_code', None) == 429:
+        return True
+    mensagem = str(erro).lower()
+    return any(padrao in mensagem for padrao in ('429', 'rate limit', 'resource exhausted', 'too many requests'))
+
+
+class Baldes:
+    """
+    Baldes de requisições e de tokens de um provedor, na memória do processo.
+    Cada balde começa cheio (um minuto de cota) e volta a encher a limite/60 por segundo.
+    """
+
+    def __init__(self, rpm=None, tpm=None):
+        self.limites = {'requisicoes': rpm, 'tokens': tpm}
+        self._estado = self._novo_estado()
+
+    def _novo_estado(self):
+        estado = {chave: float(limite or 0) for chave, limite in self.limites.items()}
+        estado.update(atualizado=time.time(), bloqueado_ate=0.0)
+        return estado
+
+    def _transacao(self, funcao):
+        return funcao(self._estado)
+
+    def _reabastecer(self, estado, agora):
+        decorrido = max(0.0, agora - estado['atualizado'])
+        for chave, limite in self.limites.items():
+            if limite:
+                estado[chave] = min(float(limite), estado[chave] + decorrido * limite / 60)
+        estado['atualizado'] = agora
+
+    def consumir(self, tokens):
+        """
+        Retira uma requisição e os tokens estimados; se não houver saldo, retorna quantos segundos esperar
+        """
+        pedido = {'requisicoes': 1, 'tokens': tokens}
+
+        def consumir(estado):
+            agora = time.time()
+            self._reabastecer(estado, agora)
+            espera = estado['bloqueado_ate'] - agora
+            for chave, quantidade in pedido.items():
+                limite = self.limites[chave]
+                if limite:
+                    # Um pedido maior que o balde inteiro espera o balde encher
+                    falta = min(quantidade, limite) - estado[chave]
+                    espera = max(espera, falta * 60 / limite)
+            if espera > 0:
+                return espera
+            for chave, quantidade in pedido.items():
+                if self.limites[chave]:
+                    estado[chave] -= min(quantidade, self.limites[chave])
+            return 0.0
+
+        return self._transacao(consumir)
+
+    def ajustar(self, tokens):
+        """
+        Corrige o balde de tokens com a diferença entre o uso real e o estimado (pode ficar negativo)
+        """
+        if not self.limites['tokens'] or not tokens:
+            return
+
+        def ajustar(estado):
+            self._reabastecer(estado, time.time())
+            estado['tokens'] = min(float(self.limites['tokens']), estado['tokens'] - tokens)
+
+        self._transacao(ajustar)
+
+    def pausar(self, segundos):
+        """
+        Depois de um 429: nenhuma chamada por alguns segundos e o balde de requisições vazio,
+        para que as chamadas retidas voltem aos poucos
+        """
+        def pausar(estado):
+            agora = time.time()
+            self._reabastecer(estado, agora)
+            estado['bloqueado_ate'] = max(estado['bloqueado_ate'], agora + segundos)
+            estado['requisicoes'] = min(estado['requisicoes'], 0.0)
+
+        self._transacao(pausar)
+
+
+class BaldesArquivo(Baldes):
+    """
+    Baldes com o estado em um arquivo JSON protegido por lock, compartilhados entre processos
+    """
+
+    def __init__(self, caminho, rpm=None, tpm=None):
+        super().__init__(rpm, tpm)
+        self.caminho = Path(caminho)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+
+    def _transacao(self, funcao):
+        with open(self.caminho.with_suffix('.lock'), 'a+') as trava:
+            fcntl.flock(trava, fcntl.LOCK_EX)
+            try:
+                try:
+                    estado = json.loads(self.caminho.read_text(encoding='utf-8'))
+                except (OSError, ValueError):
+                    estado = self._novo_estado()
+                resultado = funcao(estado)
+                self.caminho.write_text(json.dumps(estado), encoding='utf-8')
+                return resultado
+            finally:
+                fcntl.flock(trava, fcntl.LOCK_UN)
+
+
+class LimitadorTaxa:
+    """
+    Fila de chamadas de um provedor: libera a chamada mais prioritária assim que os baldes permitem
+    """
+
+    def __init__(self, nome, baldes, pausa_s=None):
+        self.nome = nome
+        self.baldes = baldes
+        self.pausa_s = pausa_s or float(os.getenv('LIMITE_TAXA_PAUSA_S', '5'))
+        self._em_arquivo = isinstance(baldes, BaldesArquivo)
+        self._fila = []
+        self._sequencia = itertools.count()
+        self._loop = None
+        self._evento = None
+        self._despachante = None
+        self.erros_429_seguidos = 0
+        self.estatisticas = {'chamadas': 0, 'espera_total_s': 0.0, 'erros_429': 0}
+
+    def _preparar(self):
+        # Cada event loop (asyncio.run) ganha a sua fila; os baldes continuam os mesmos
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._fila = loop, []
+            self._evento = asyncio.Event()
+            self._despachante = loop.create_task(self._despachar())
+
+    async def _consumir(self, tokens):
+        if self._em_arquivo:
+            return await asyncio.to_thread(self.baldes.consumir, tokens)
+        return self.baldes.consumir(tokens)
+
+    async def adquirir(self, tokens, prioridade=0):
+        """
+        Espera a vez da chamada; retorna os segundos de espera
+        """
+        self._preparar()
+        inicio = time.monotonic()
+        futuro = self._loop.create_future()
+        heapq.heappush(self._fila, (prioridade, next(self._sequencia), tokens, futuro))
+        self._evento.set()
+        await futuro
+        espera = time.monotonic() - inicio
+        self.estatisticas['chamadas'] += 1
+        self.estatisticas['espera_total_s'] += espera
+        return espera
+
+    async def _despachar(self):
+        while True:
+            # Chamadas canceladas (por exemplo, o hedge perdedor do roteador) saem da fila
+            while self._fila and self._fila[0][3].done():
+                heapq.heappop(self._fila)
+            if not self._fila:
+                self._evento.clear()
+                await self._evento.wait()
+                continue
+
+            _, _, tokens, futuro = self._fila[0]
+            try:
+                espera = await self._consumir(tokens)
+            except Exception as e:
+                # Sem conseguir ler os baldes, a chamada segue sem limite em vez de travar a fila
+                print(f"⚠️ {self.nome}: erro no limitador de taxa, liberando a chamada: {e}")
+                espera = 0
+            if espera <= 0:
+                heapq.heappop(self._fila)
+                if not futuro.done():
+                    futuro.set_result(None)
+                continue
+
+            # Uma chamada mais prioritária que chegue durante a espera reavalia a fila
+            self._evento.clear()
+            try:
+                await asyncio.wait_for(self._evento.wait(), espera)
+            except asyncio.TimeoutError:
+                pass
+
+    async def ajustar(self, tokens):
+        if self._em_arquivo:
+            await asyncio.to_thread(self.baldes.ajustar, tokens)
+        else:
+            self.baldes.ajustar(tokens)
+
+    async def registrar_429(self):
+        """
+        Pausa o provedor para todas as chamadas, com espera dobrando a cada 429 seguido (até 60s)
+        """
+        self.estatisticas['erros_429'] += 1
+        pausa = min(60.0, self.pausa_s * 2 ** self.erros_429_seguidos)
+        self.erros_429_seguidos += 1
+        print(f"🚦 {self.nome}: limite de taxa atingido; pausando as chamadas por {pausa:.1f}s")
+        if self._em_arquivo:
+            await asyncio.to_thread(self.baldes.pausar, pausa)
+        else:
+            self.baldes.pausar(pausa)
+
+    def registrar_sucesso(self):
+        self.erros_429_seguidos = 0
+
+
+class LLMLimitado(EnvelopeLLM):
+    """
+    Envelope que passa cada chamada pelo limitador do provedor e repete as recusadas com 429
+    """
+
+    def __init__(self, llm, limitador, tokens_resposta=None, tentativas=None):
+        super().__init__(llm)
+        self.limitador = limitador
+        self.tokens_resposta = tokens_resposta or int(os.getenv('LIMITE_TAXA_TOKENS_RESPOSTA', '500'))
+        self.tentativas = int(os.getenv('LIMITE_TAXA_TENTATIVAS', '3')) if tentativas is None else tentativas
+
+    async def ainvoke(self, messages, output_format=None):
+        estimados = estimar_tokens(messages) + self.tokens_resposta
+        prioridade = PRIORIDADES.get(FAIXA.get(), 0)
+        for tentativa in range(self.tentativas + 1):
+            await self.limitador.adquirir(estimados, prioridade)
+            try:
+                resposta = await self.llm.ainvoke(messages, output_format)
+            except Exception as e:
+                # Os tokens de uma chamada recusada voltam ao balde
+                await self.limitador.ajustar(-estimados)
+                if not erro_de_limite(e) or tentativa == self.tentativas:
+                    raise
+                await self.limitador.registrar_429()
+                continue
+            self.limitador.registrar_sucesso()
+            uso = getattr(resposta, 'usage', None)
+            if uso:
+                await self.limitador.ajustar(uso.total_tokens - estimados)
+            return resposta
+
+
+def obter_limitador(provedor):
+    """
+    Limitador compartilhado do provedor ('gemini' ou 'openai'), criado na primeira chamada a partir do .env.
+    Retorna None se o provedor não tiver <PROVEDOR>_RPM nem <PROVEDOR>_TPM.
+    """
+    if provedor not in _limitadores:
+        rpm = int(os.getenv(f"{provedor.upper()}_RPM") or 0) or None
+        tpm = int(os.getenv(f"{provedor.upper()}_TPM") or 0) or None
+        if not rpm and not tpm:
+            _limitadores[provedor] = None
+            return None
+
+        pasta = os.getenv('LIMITE_TAXA_ARQUIVO')
+        if pasta and fcntl is None:
+            print("⚠️ LIMITE_TAXA_ARQUIVO exige fcntl (Linux/Mac); usando o limite só dentro de cada processo")
+            pasta = None
+        if pasta:
+            baldes = BaldesArquivo(Path(pasta) / f"{provedor}.json", rpm, tpm)
+        else:
+            baldes = Baldes(rpm, tpm)
+        _limitadores[provedor] = LimitadorTaxa(provedor, baldes)
+        print(f"🚦 Limite de taxa para {provedor}: {rpm or '∞'} req/min, {tpm or '∞'} tokens/min"
+              + (" (compartilhado entre processos)" if pasta else ""))
+    return _limitadores[provedor]
+
+
+def limitar_taxa(llm, provedor):
+    """
+    Envolve o LLM com o limitador do provedor; sem limites configurados, retorna o próprio LLM
+    """
+    limitador = obter_limitador(provedor) if llm else None
+    return LLMLimitado(llm, limitador) if limitador else llm
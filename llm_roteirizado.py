@@ -0,0 +1,156 @@
+"""
+Modelo de chat determinístico para benchmarks e testes sem API
+Implementa a mesma interface ainvoke dos modelos do Browser Use, mas segue um roteiro fixo:
+a cada passo procura no estado do navegador os elementos do roteiro (pelo id) e, se não
+os encontrar, navega direto pela URL equivalente. O relatório recebe um texto fixo.
+"""
+
+import re
+import asyncio
+from urllib.parse import urlencode
+
+from bibliotech_local import EMAIL_PADRAO, SENHA_PADRAO
+
+# Cada passo: (objetivo, ações na tela, caminho usado se algum elemento não estiver visível).
+# Ações: ('digitar', id, texto) ou ('clicar', id)
+ROTEIRO_BIBLIOTECH = [
+    ("Abrir a tela de login", [], '/login'),
+    ("Fazer login com credenciais válidas",
+     [('digitar', 'email', EMAIL_PADRAO), ('digitar', 'senha', SENHA_PADRAO), ('clicar', 'entrar')],
+     '/login?' + urlencode({'email': EMAIL_PADRAO, 'senha': SENHA_PADRAO})),
+    ("Buscar livros de Machado de Assis", [('digitar', 'busca', 'Machado'), ('clicar', 'buscar')],
+     '/catalogo?busca=Machado'),
+    ("Emprestar Dom Casmurro", [('clicar', 'emprestar-1')], '/emprestar/1'),
+    ("Abrir meus empréstimos", [('clicar', 'menu-emprestimos')], '/emprestimos'),
+    ("Devolver Dom Casmurro", [('clicar', 'devolver-1')], '/devolver/1'),
+    ("Voltar ao catálogo", [('clicar', 'menu-catalogo')], '/catalogo'),
+    ("Reservar Macunaíma, que está indisponível", [('clicar', 'reservar-8')], '/reservar/8'),
+    ("Abrir o perfil", [('clicar', 'menu-perfil')], '/perfil'),
+    ("Editar o telefone do perfil", [('digitar', 'telefone', '11999990000'), ('clicar', 'salvar')],
+     '/perfil?' + urlencode({'nome': 'Leitor Bibliotech', 'telefone': '11999990000'})),
+    ("Fazer logout", [('clicar', 'menu-sair')], '/logout'),
+]
+
+RELATORIO_ROTEIRIZADO = """## Resumo
+Execução roteirizada do Bibliotech local: login, busca, empréstimo, devolução, reserva, perfil e logout.
+
+## Cenários Gherkin
+Cenário: Login com credenciais válidas
+  Dado que estou na tela de login
+  Quando informo email e senha válidos
+  Então vejo o catálogo de livros
+
+## Score geral
+10"""
+
+
+def _texto(mensagem):
+    conteudo = getattr(mensagem, 'content', '') or ''
+    if isinstance(conteudo, str):
+        return conteudo
+    return '\n'.join(getattr(parte, 'text', '') for parte in conteudo)
+
+
+def indice_do_elemento(estado, id_elemento):
+    """
+    Índice interativo do elemento com o id informado no DOM serializado ([12]<input id=email ...)
+    """
+    encontrado = re.search(rf'\[(\d+)\]<\w+[^\n]*?\bid={re.escape(id_elemento)}(?:\s|/|>|$)', estado, re.M)
+    return int(encontrado.group(1)) if encontrado else None
+
+
+def posicao_no_roteiro(estado):
+    """
+    Posição do passo atual a partir do estado do agente ("Step 3. Maximum steps: ..."),
+    para quem atende várias conversas sem guardar estado (servidor_llm_mock.py)
+    """
+    encontrado = re.search(r'Step (\d+)\. Maximum steps', estado)
+    return int(encontrado.group(1)) - 1 if encontrado else 0
+
+
+def saida_do_roteiro(posicao, estado, url_base, roteiro=None):
+    """
+    Saída do agente (dict no formato do AgentOutput) para o passo do roteiro nessa posição
+    """
+    roteiro = roteiro if roteiro is not None else ROTEIRO_BIBLIOTECH
+    if posicao >= len(roteiro):
+        return {'evaluation_previous_goal': 'Roteiro concluído', 'memory': f'{posicao} passos executados',
+                'next_goal': 'Encerrar', 'action': [{'done': {'text': RELATORIO_ROTEIRIZADO, 'success': True}}]}
+
+    objetivo, acoes, alternativa = roteiro[posicao]
+    indices = [indice_do_elemento(estado, acao[1]) for acao in acoes]
+    if not acoes or None in indices:
+        lista = [{'go_to_url': {'url': url_base.rstrip('/') + alternativa, 'new_tab': False}}]
+    else:
+        lista = []
+        for acao, indice in zip(acoes, indices):
+            if acao[0] == 'digitar':
+                lista.append({'input_text': {'index': indice, 'text': acao[2], 'clear_existing': True}})
+            else:
+                lista.append({'click_element_by_index': {'index': indice}})
+    return {'evaluation_previous_goal': 'Passo anterior executado', 'memory': f'Passo {posicao + 1} do roteiro',
+            'next_goal': objetivo, 'action': lista}
+
+
+class ChatRoteirizado:
+    """
+    Substituto do ChatGoogle/ChatOpenAI que não acessa a rede.
+    Use uma instância por agente: a posição no roteiro é guardada na própria instância.
+    latencia_s simula o tempo de resposta do modelo; tokens_por_caractere estima o uso.
+    """
+
+    model = 'roteirizado'
+    _verified_api_keys = True
+
+    def __init__(self, url_base, roteiro=None, latencia_s=0.0, tokens_por_caractere=0.25):
+        self.url_base = url_base.rstrip('/')
+        self.roteiro = roteiro if roteiro is not None else ROTEIRO_BIBLIOTECH
+        self.latencia_s = latencia_s
+        self.tokens_por_caractere = tokens_por_caractere
+        self.posicao = 0
+        self.chamadas = 0
+
+    @property
+    def provider(self):
+        return 'roteirizado'
+
+    @property
+    def name(self):
+        return self.model
+
+    @property
+    def model_name(self):
+        return self.model
+
+    def _uso(self, entrada, saida):
+        from browser_use.llm.views import ChatInvokeUsage
+        prompt = int(len(entrada) * self.tokens_por_caractere)
+        resposta = int(len(saida) * self.tokens_por_caractere)
+        return ChatInvokeUsage(prompt_tokens=prompt, prompt_cached_tokens=None, prompt_cache_creation_tokens=None,
+                               prompt_image_tokens=None, completion_tokens=resposta, total_tokens=prompt + resposta)
+
+    def proxima_saida(self, estado):
+        """
+        Saída do agente para o próximo passo do roteiro desta instância
+        """
+        saida = saida_do_roteiro(self.posicao, estado, self.url_base, self.roteiro)
+        self.posicao += 1
+        return saida
+
+    async def ainvoke(self, messages, output_format=None):
+        from browser_use.llm.views import ChatInvokeCompletion
+        self.chamadas += 1
+        entrada = '\n'.join(_texto(m) for m in messages)
+        if self.latencia_s:
+            await asyncio.sleep(self.latencia_s)
+
+        if output_format is None:
+            return ChatInvokeCompletion(completion=RELATORIO_ROTEIRIZADO,
+                                        usage=self._uso(entrada, RELATORIO_ROTEIRIZADO))
+        if 'action' in output_format.model_fields:
+            saida = self.proxima_saida(_texto(messages[-1]) if messages else '')
+        else:
+            # Outros formatos estruturados (por exemplo, extração de dados): resposta mínima
+            saida = {}
+        completion = output_format.model_validate(saida)
+        return ChatInvokeCompletion(completion=completion, usage=self._uso(entrada, str(saida)))
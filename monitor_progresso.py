@@ -0,0 +1,155 @@
+"""
+Monitor de progresso do agente: detecta ciclos e passos sem mudança na página
+Cada passo vira uma assinatura (estado da página + ações). Quando as últimas assinaturas se repetem
+em ciclo, ou a página fica igual por muitos passos seguidos, o agente recebe uma dica para mudar de
+abordagem; se continuar travado depois de MONITOR_LIMITE_DICAS dicas, a execução é interrompida
+com o status "travado" nas evidências.
+"""
+
+import os
+import json
+import hashlib
+from dotenv import load_dotenv
+
+# Carrega as variáveis de ambiente do arquivo .env
+load_dotenv()
+load_dotenv('config.env')
+
+DICA_CICLO = ("ATENÇÃO: suas últimas {passos} ações repetem o mesmo ciclo ({acoes}) sem progresso. "
+              "Não repita essas ações. Mude de abordagem: use outro elemento, navegue para outra área "
+              "ainda não explorada ou, se o que falta não for possível, finalize com done.")
+DICA_SEM_MUDANCA = ("ATENÇÃO: a página não muda há {passos} passos ({acoes}). "
+                    "Interaja com a página de outra forma ou navegue para outra área ainda não explorada; "
+                    "se a tarefa já estiver concluída, finalize com done.")
+
+
+def monitor_ativo():
+    return os.getenv('MONITOR_PROGRESSO', 'desligado').lower() == 'ligado'
+
+
+def assinatura_da_pagina(resumo):
+    """
+    Hash da página vista pelo agente: URL, título e os elementos interativos com seus atributos
+    """
+    partes = [resumo.url or '', resumo.title or '']
+    for no in resumo.dom_state.selector_map.values():
+        atributos = getattr(no, 'attributes', None) or {}
+        partes.append(f"{getattr(no, 'backend_node_id', '')}:{sorted(atributos.items())}")
+    return hashlib.sha1('\n'.join(partes).encode('utf-8', 'ignore')).hexdigest()[:16]
+
+
+def nome_das_acoes(acoes):
+    return '+'.join(nome for acao in acoes for nome in acao) or 'nenhuma'
+
+
+def periodo_do_ciclo(assinaturas, repeticoes, maior_periodo=3):
+    """
+    Menor período p tal que as últimas p * repeticoes assinaturas são o mesmo bloco de p passos repetido
+    """
+    for periodo in range(1, maior_periodo + 1):
+        janela = assinaturas[-periodo * repeticoes:]
+        if len(janela) == periodo * repeticoes and all(janela[i] == janela[i % periodo] for i in range(len(janela))):
+            return periodo
+    return None
+
+
+class MonitorProgresso:
+    """
+    Hook de passo (on_step_end) que detecta o agente travado, envia dicas e interrompe a execução
+    """
+
+    def __init__(self, gravador=None, ativo=None, repeticoes=None, passos_sem_mudanca=None, limite_dicas=None):
+        self.gravador = gravador
+        self.ativo = monitor_ativo() if ativo is None else ativo
+        self.repeticoes = repeticoes or int(os.getenv('MONITOR_REPETICOES', '3'))
+        self.passos_sem_mudanca = passos_sem_mudanca or int(os.getenv('MONITOR_PASSOS_SEM_MUDANCA', '8'))
+        self.limite_dicas = int(os.getenv('MONITOR_LIMITE_DICAS', '2')) if limite_dicas is None else limite_dicas
+        self.eventos = []
+        self.travado = None
+        self._pagina = None
+        self._assinaturas = []
+        self._acoes = []
+        self._sem_mudanca = 0
+        self._dica_pendente = None
+        self._passos_vistos = 0
+
+    def instalar(self, agent):
+        """
+        Envolve o create_state_messages do agente para ler a página de cada passo e entregar as dicas
+        """
+        if not self.ativo:
+            return agent
+        gerenciador = agent._message_manager
+        original = gerenciador.create_state_messages
+
+        def create_state_messages(*args, **kwargs):
+            resumo = kwargs['browser_state_summary'] if 'browser_state_summary' in kwargs else args[0]
+            pagina = assinatura_da_pagina(resumo)
+            self._sem_mudanca = self._sem_mudanca + 1 if pagina == self._pagina else 0
+            self._pagina = pagina
+            retorno = original(*args, **kwargs)
+            # O create_state_messages limpa as mensagens de contexto; a dica entra depois dele
+            if self._dica_pendente:
+                from browser_use.llm.messages import UserMessage
+                gerenciador._add_context_message(UserMessage(content=self._dica_pendente))
+                self._dica_pendente = None
+            return retorno
+
+        gerenciador.create_state_messages = create_state_messages
+        return agent
+
+    async def registrar_passo(self, agent):
+        """
+        Hook para Agent.run(on_step_end=...): registra a assinatura do passo e reage se o agente estiver travado
+        """
+        historico = agent.history.history
+        novos, self._passos_vistos = historico[self._passos_vistos:], len(historico)
+        if not self.ativo or not novos or agent.history.is_done():
+            return
+
+        item = novos[-1]
+        acoes = [acao.model_dump(exclude_none=True) for acao in item.model_output.action] if item.model_output else []
+        self._acoes.append(nome_das_acoes(acoes))
+        self._assinaturas.append((self._pagina, json.dumps(acoes, sort_keys=True, default=str)))
+
+        periodo = periodo_do_ciclo(self._assinaturas, self.repeticoes)
+        if periodo:
+            passos = periodo * self.repeticoes
+            self._reagir(agent, 'ciclo', passos, DICA_CICLO)
+        elif self._sem_mudanca + 1 >= self.passos_sem_mudanca:
+            self._reagir(agent, 'sem_mudanca', self._sem_mudanca + 1, DICA_SEM_MUDANCA)
+
+    def _reagir(self, agent, motivo, passos, modelo_dica):
+        acoes = ', '.join(self._acoes[-passos:])
+        passo = agent.state.n_steps
+        dicas = sum(1 for e in self.eventos if e['acao'] == 'dica')
+        if dicas < self.limite_dicas:
+            acao = 'dica'
+            self._dica_pendente = modelo_dica.format(passos=passos, acoes=acoes)
+            print(f"🔁 Passo {passo}: agente sem progresso ({motivo}); enviando dica {dicas + 1}/{self.limite_dicas}")
+        else:
+            acao = 'parada'
+            self.travado = {'motivo': motivo, 'passo': passo, 'acoes': acoes}
+            agent.stop()
+            print(f"🛑 Passo {passo}: agente travado ({motivo}) mesmo após {dicas} dica(s); execução interrompida")
+
+        evento = {'tipo': 'progresso', 'passo': passo, 'motivo': motivo, 'acao': acao, 'passos': passos,
+                  'acoes': acoes}
+        self.eventos.append(evento)
+        if self.gravador:
+            self.gravador.registrar(dict(evento))
+        # Cada dica abre uma janela nova de observação
+        self._assinaturas.clear()
+        self._sem_mudanca = 0
+
+    def ajustar_fim(self, registro):
+        """
+        Marca o registro de fim com o status "travado" quando a execução foi interrompida pelo monitor
+        """
+        if self.travado:
+            registro['status'] = 'travado'
+            registro['travamento'] = self.travado
+            registro['resultado_final'] = registro.get('resultado_final') or (
+                f"Execução interrompida no passo {self.travado['passo']}: agente sem progresso "
+                f"({self.travado['motivo']}: {self.travado['acoes']})")
+        return registro
@@ -0,0 +1,262 @@
+"""
+Perfil rápido dos navegadores do executor (opcional, PERFIL_RAPIDO=ligado)
+O agente só precisa do DOM e de um screenshot de vez em quando, mas cada página do Bibliotech
+carrega imagens, fontes, vídeos e scripts de analytics. Neste perfil, esses recursos são bloqueados
+por regras de URL, os arquivos estáticos ficam no cache em disco entre as execuções e as animações
+podem ser desligadas. Ao final de cada cenário, as requisições bloqueadas e os bytes servidos do cache
+vão para as evidências.
+"""
+
+import os
+import json
+from pathlib import Path
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Carrega as variáveis de ambiente do arquivo .env
+load_dotenv()
+load_dotenv('config.env')
+
+# Padrões do Network.setBlockedURLs (* casa qualquer trecho) por tipo de recurso
+REGRAS_POR_TIPO = {
+    'imagem': ['*.png', '*.png?*', '*.jpg', '*.jpg?*', '*.jpeg', '*.jpeg?*', '*.gif', '*.gif?*', '*.webp', '*.webp?*',
+               '*.avif', '*.avif?*', '*.ico', '*.ico?*', '*/_next/image?*'],
+    'fonte': ['*.woff', '*.woff?*', '*.woff2', '*.woff2?*', '*.ttf', '*.ttf?*', '*.otf', '*.otf?*',
+              '*fonts.googleapis.com*', '*fonts.gstatic.com*'],
+    'midia': ['*.mp4', '*.mp4?*', '*.webm', '*.webm?*', '*.mp3', '*.mp3?*', '*.ogg', '*.ogg?*', '*.m3u8*'],
+    'analytics': ['*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*hotjar.com*',
+                  '*segment.io*', '*connect.facebook.net*', '*clarity.ms*', '*/_vercel/insights/*',
+                  '*/_vercel/speed-insights/*', '*sentry.io*'],
+}
+
+# Injetado em cada documento quando PERFIL_RAPIDO_SEM_ANIMACOES está ligado
+SCRIPT_SEM_ANIMACOES = """
+(() => {
+  const aplicar = () => {
+    const estilo = document.createElement('style');
+    estilo.textContent = '*, *::before, *::after { animation: none !important; transition: none !important; ' +
+                         'scroll-behavior: auto !important; caret-color: auto !important; }';
+    (document.head || document.documentElement).appendChild(estilo);
+  };
+  if (document.documentElement) aplicar(); else document.addEventListener('DOMContentLoaded', aplicar);
+})();
+"""
+
+
+def perfil_rapido_ativo():
+    return os.getenv('PERFIL_RAPIDO', 'desligado').lower() == 'ligado'
+
+
+def _lista(valor):
+    return [item.strip() for item in (valor or '').split(',') if item.strip()]
+
+
+def _casa(padrao, url):
+    """
+    Mesmo casamento do setBlockedURLs: o padrão inteiro com * como curinga
+    """
+    partes = padrao.split('*')
+    if not url.startswith(partes[0]):
+        return False
+    posicao = len(partes[0])
+    for parte in partes[1:-1]:
+        posicao = url.find(parte, posicao)
+        if posicao < 0:
+            return False
+        posicao += len(parte)
+    return url[posicao:].endswith(partes[-1]) if len(partes) > 1 else url == padrao
+
+
+class PerfilRapido:
+    """
+    Configuração de uma sessão de navegador: argumentos do Chromium, regras aplicadas em cada aba
+    pelo CDP e contagem dos bytes transferidos, servidos do cache e bloqueados
+    """
+
+    def __init__(self, ativo=None, tipos=None, urls=None, pasta_cache=None, sem_animacoes=None):
+        self.ativo = perfil_rapido_ativo() if ativo is None else ativo
+        tipos = tipos if tipos is not None else _lista(os.getenv('PERFIL_RAPIDO_BLOQUEAR_TIPOS',
+                                                                 'imagem,fonte,midia,analytics'))
+        self.regras = {tipo: REGRAS_POR_TIPO[tipo] for tipo in tipos if tipo in REGRAS_POR_TIPO}
+        urls = urls if urls is not None else _lista(os.getenv('PERFIL_RAPIDO_BLOQUEAR_URLS'))
+        if urls:
+            self.regras['personalizado'] = urls
+        self.pasta_cache = Path(pasta_cache or os.getenv('PERFIL_RAPIDO_CACHE_DIR', '.cache/navegador'))
+        self.sem_animacoes = (os.getenv('PERFIL_RAPIDO_SEM_ANIMACOES', 'ligado').lower() == 'ligado'
+                              if sem_animacoes is None else sem_animacoes)
+        self._sessoes_aplicadas = set()
+        self._trava = None
+        # Tamanho já visto de cada URL, para estimar o que deixou de ser baixado
+        self._arquivo_tamanhos = self.pasta_cache / 'tamanhos.json'
+        self._tamanhos = {}
+        if self.ativo and self._arquivo_tamanhos.exists():
+            try:
+                self._tamanhos = json.loads(self._arquivo_tamanhos.read_text(encoding='utf-8'))
+            except ValueError:
+                self._tamanhos = {}
+        self.zerar()
+
+    def zerar(self):
+        """
+        Recomeça a contagem (a sessão do pool passa para outro cenário)
+        """
+        self._urls = {}
+        self._do_cache = set()
+        self.contagem = {'requisicoes': 0, 'bytes_transferidos': 0, 'bytes_do_cache': 0,
+                         'bloqueadas': {}, 'bytes_bloqueados_conhecidos': 0}
+
+    def argumentos(self):
+        """
+        Argumentos do BrowserSession: cache em disco compartilhado entre execuções e menos movimento na página
+        """
+        if not self.ativo:
+            return {}
+        args = [f"--disk-cache-dir={self._reservar_cache_em_disco().resolve()}", '--disk-cache-size=536870912']
+        if self.sem_animacoes:
+            args.append('--force-prefers-reduced-motion')
+        return {'args': args}
+
+    def _reservar_cache_em_disco(self):
+        """
+        Dois Chromium não podem usar a mesma pasta de cache ao mesmo tempo: cada sessão reserva com um
+        lock a primeira pasta livre (disco_0, disco_1...), que as próximas execuções reaproveitam
+        """
+        self.pasta_cache.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            return self.pasta_cache / f"disco_{os.getpid()}_{id(self)}"
+        for posicao in range(256):
+            trava = open(self.pasta_cache / f"disco_{posicao}.lock", 'a+')
+            try:
+                fcntl.flock(trava, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                trava.close()
+                continue
+            self._trava = trava
+            return self.pasta_cache / f"disco_{posicao}"
+        return self.pasta_cache / f"disco_{os.getpid()}_{id(self)}"
+
+    def liberar(self):
+        """
+        Libera a pasta de cache reservada (chamado ao fechar o navegador)
+        """
+        if self._trava:
+            self._trava.close()
+            self._trava = None
+
+    def _padroes(self):
+        return [padrao for padroes in self.regras.values() for padrao in padroes]
+
+    def _tipo_bloqueado(self, url):
+        return next((tipo for tipo, padroes in self.regras.items() if any(_casa(p, url) for p in padroes)), 'outro')
+
+    async def aplicar(self, browser_session):
+        """
+        Aplica as regras nas abas ainda sem elas. Abas novas recebem as regras no próximo passo.
+        """
+        if not self.ativo:
+            return
+        try:
+            alvos = await browser_session.cdp_client.send.Target.getTargets()
+            for alvo in alvos['targetInfos']:
+                if alvo.get('type') != 'page' or alvo['targetId'] in self._sessoes_aplicadas:
+                    continue
+                cdp = await browser_session.get_or_create_cdp_session(alvo['targetId'], focus=False)
+                await self._aplicar_na_aba(cdp)
+                self._sessoes_aplicadas.add(alvo['targetId'])
+        except Exception as e:
+            print(f"⚠️ Não foi possível aplicar o perfil rápido: {e}")
+
+    async def _aplicar_na_aba(self, cdp):
+        cliente, sessao = cdp.cdp_client, cdp.session_id
+        registro = cliente.register.Network
+        registro.requestWillBeSent(self._ao_enviar)
+        registro.responseReceived(self._ao_receber)
+        registro.loadingFinished(self._ao_terminar)
+        registro.loadingFailed(self._ao_falhar)
+        await cliente.send.Network.enable(session_id=sessao)
+        await cliente.send.Network.setBlockedURLs(params={'urls': self._padroes()}, session_id=sessao)
+        if self.sem_animacoes:
+            await cliente.send.Page.addScriptToEvaluateOnNewDocument(params={'source': SCRIPT_SEM_ANIMACOES},
+                                                                     session_id=sessao)
+
+    async def registrar_passo(self, agent):
+        """
+        Hook para Agent.run(on_step_start=...): aplica as regras em abas abertas no passo anterior
+        """
+        await self.aplicar(agent.browser_session)
+
+    def _ao_enviar(self, evento, session_id=None):
+        self.contagem['requisicoes'] += 1
+        self._urls[evento['requestId']] = evento['request']['url']
+
+    def _ao_receber(self, evento, session_id=None):
+        resposta = evento['response']
+        if resposta.get('fromDiskCache') or resposta.get('fromPrefetchCache'):
+            self._do_cache.add(evento['requestId'])
+            tamanho = self._tamanhos.get(resposta['url'])
+            if tamanho is None:
+                cabecalhos = {k.lower(): v for k, v in (resposta.get('headers') or {}).items()}
+                tamanho = int(cabecalhos.get('content-length') or 0)
+            self.contagem['bytes_do_cache'] += tamanho
+
+    def _ao_terminar(self, evento, session_id=None):
+        url = self._urls.pop(evento['requestId'], None)
+        if evento['requestId'] in self._do_cache:
+            self._do_cache.discard(evento['requestId'])
+            return
+        tamanho = int(evento.get('encodedDataLength') or 0)
+        self.contagem['bytes_transferidos'] += tamanho
+        if url and tamanho:
+            self._tamanhos[url] = tamanho
+
+    def _ao_falhar(self, evento, session_id=None):
+        url = self._urls.pop(evento['requestId'], None)
+        self._do_cache.discard(evento['requestId'])
+        if not evento.get('blockedReason') or not url:
+            return
+        tipo = self._tipo_bloqueado(url)
+        self.contagem['bloqueadas'][tipo] = self.contagem['bloqueadas'].get(tipo, 0) + 1
+        # Recurso bloqueado não é baixado: só se sabe o tamanho se ele já foi baixado antes sem o bloqueio
+        self.contagem['bytes_bloqueados_conhecidos'] += self._tamanhos.get(url, 0)
+
+    def _salvar_tamanhos(self):
+        """
+        Junta os tamanhos desta sessão aos do arquivo com um lock, já que as sessões do pool e os
+        processos do executor gravam o mesmo tamanhos.json
+        """
+        self.pasta_cache.mkdir(parents=True, exist_ok=True)
+        with open(self.pasta_cache / 'tamanhos.json.lock', 'a+') as trava:
+            if fcntl is not None:
+                fcntl.flock(trava, fcntl.LOCK_EX)
+            tamanhos = {}
+            if self._arquivo_tamanhos.exists():
+                try:
+                    tamanhos = json.loads(self._arquivo_tamanhos.read_text(encoding='utf-8'))
+                except ValueError:
+                    tamanhos = {}
+            tamanhos.update(self._tamanhos)
+            self._tamanhos = tamanhos
+            temporario = self._arquivo_tamanhos.with_name(f"tamanhos.json.{os.getpid()}.tmp")
+            temporario.write_text(json.dumps(tamanhos), encoding='utf-8')
+            os.replace(temporario, self._arquivo_tamanhos)
+
+    def registro(self):
+        """
+        Registro para o stream de evidências com as requisições bloqueadas e os bytes servidos do cache.
+        Os bytes das requisições bloqueadas não são medidos (o recurso nunca é baixado): só entram em
+        bytes_bloqueados_conhecidos os de URLs já baixadas antes sem o bloqueio.
+        """
+        try:
+            self._salvar_tamanhos()
+        except OSError as e:
+            print(f"⚠️ Não foi possível salvar os tamanhos dos recursos: {e}")
+
+        bloqueadas = sum(self.contagem['bloqueadas'].values())
+        print(f"⚡ Perfil rápido: {bloqueadas} requisições bloqueadas, "
+              f"{self.contagem['bytes_transferidos'] / 1024:.0f} KB baixados, "
+              f"{self.contagem['bytes_do_cache'] / 1024:.0f} KB do cache em disco")
+        return {'tipo': 'perfil_rapido', **self.contagem}
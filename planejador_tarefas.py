@@ -0,0 +1,175 @@
+"""
+Planejador de tarefas: divide uma tarefa de exploração em subtarefas por funcionalidade
+Uma chamada ao LLM quebra a tarefa monolítica (explorar tudo e gerar Gherkin de cada feature)
+em subtarefas independentes, que rodam em paralelo pelo executor_cenarios.py. Os relatórios
+de cada subtarefa são combinados em um relatório único no formato pedido pelo agente.
+"""
+
+import os
+import re
+import json
+import time
+import unicodedata
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Carrega as variáveis de ambiente do arquivo .env
+load_dotenv()
+load_dotenv('config.env')
+
+PROMPT_PLANEJADOR = """Você vai dividir uma tarefa de exploração de uma aplicação web entre vários agentes
+que rodam em paralelo, cada um em seu próprio navegador.
+
+TAREFA ORIGINAL:
+{tarefa}
+
+Divida a tarefa em no máximo {maximo} subtarefas independentes, uma por funcionalidade
+(por exemplo: Login, Busca, Empréstimo, Devolução, Reserva, Perfil). Cada subtarefa deve:
+- Ser executável sozinha: repita a URL de acesso e, se a funcionalidade exigir, as credenciais de login da tarefa original
+- Cobrir apenas a sua funcionalidade, com os testes da tarefa original que se aplicam a ela
+- Pedir os cenários Gherkin (Given-When-Then) positivos e negativos dessa funcionalidade
+
+Responda somente com JSON, sem texto antes ou depois, no formato:
+{{"subtarefas": [{{"nome": "login", "tarefa": "..."}}, {{"nome": "busca", "tarefa": "..."}}]}}"""
+
+PROMPT_CONSOLIDAR = """{prompt_relatorio}
+
+A exploração foi dividida em subtarefas por funcionalidade, executadas em paralelo.
+DADOS DA EXECUÇÃO:
+- Tarefa original: {tarefa}
+- Subtarefas: {subtarefas}
+- Passos executados (somados): {passos}
+
+RELATÓRIOS DAS SUBTAREFAS:
+{relatorios}
+
+Por favor, gere um relatório completo e único baseado nos relatórios acima, sem repetir informações."""
+
+
+def planejamento_ativo():
+    return os.getenv('PLANEJADOR_TAREFAS', 'desligado').lower() == 'ligado'
+
+
+def nome_da_subtarefa(nome):
+    """
+    'Empréstimo de Livros' -> 'emprestimo_de_livros' (usado na pasta cenario_<nome>)
+    """
+    nome = unicodedata.normalize('NFKD', str(nome)).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z0-9]+', '_', nome.lower()).strip('_') or 'subtarefa'
+
+
+def interpretar_plano(texto, maximo):
+    """
+    Lê o JSON do planejador (com ou sem cercas de código) e retorna {nome: tarefa}
+    """
+    inicio, fim = texto.find('{'), texto.rfind('}')
+    if inicio < 0 or fim < inicio:
+        raise ValueError("resposta do planejador sem JSON")
+    dados = json.loads(texto[inicio:fim + 1])
+
+    subtarefas = {}
+    for item in dados.get('subtarefas') or []:
+        tarefa = str(item.get('tarefa') or '').strip()
+        if not tarefa:
+            continue
+        nome = base = nome_da_subtarefa(item.get('nome') or f"subtarefa_{len(subtarefas) + 1}")
+        contador = 2
+        while nome in subtarefas:
+            nome, contador = f"{base}_{contador}", contador + 1
+        subtarefas[nome] = tarefa
+    if not subtarefas:
+        raise ValueError("planejador não retornou subtarefas")
+    return dict(list(subtarefas.items())[:maximo])
+
+
+async def planejar_subtarefas(llm, tarefa, maximo=None):
+    """
+    Divide a tarefa em subtarefas por funcionalidade com uma única chamada ao LLM.
+    Se o plano não puder ser gerado, retorna a tarefa original como subtarefa única.
+    """
+    from browser_use.llm.messages import UserMessage
+    from cache_llm import CacheMissError
+
+    maximo = maximo or int(os.getenv('PLANEJADOR_MAX_SUBTAREFAS', '6'))
+    try:
+        resposta = await llm.ainvoke([UserMessage(content=PROMPT_PLANEJADOR.format(tarefa=tarefa, maximo=maximo))])
+        subtarefas = interpretar_plano(resposta.completion, maximo)
+    except CacheMissError:
+        raise
+    except Exception as e:
+        print(f"⚠️ Não foi possível dividir a tarefa, seguindo com um único agente: {e}")
+        return {'exploracao': tarefa}
+
+    print(f"🗂️  Tarefa dividida em {len(subtarefas)} subtarefas: {', '.join(subtarefas)}")
+    return subtarefas
+
+
+async def consolidar_relatorios(llm, pasta_suite, resultados, tarefa, prompt_relatorio):
+    """
+    Combina os relatórios das subtarefas em um relatório único (relatorio_consolidado.txt na pasta da suíte)
+    """
+    from browser_use.llm.messages import UserMessage
+    from cache_llm import CacheMissError
+
+    relatorios, passos = [], 0
+    for status in resultados:
+        arquivo = Path(status.get('pasta', '')) / f"relatorio_detalhado_{status['cenario']}.txt"
+        texto = arquivo.read_text(encoding='utf-8').strip() if arquivo.exists() else \
+            f"Subtarefa não concluída: {status.get('erro', status['status'])}"
+        relatorios.append(f"### {status['cenario']} ({status['status']})\n{texto}")
+        passos += status.get('passos') or 0
+
+    prompt = PROMPT_CONSOLIDAR.format(
+        prompt_relatorio=prompt_relatorio.strip(), tarefa=tarefa, passos=passos,
+        subtarefas=', '.join(f"{s['cenario']} ({s['status']})" for s in resultados),
+        relatorios='\n\n'.join(relatorios),
+    )
+    try:
+        resposta = await llm.ainvoke([UserMessage(content=prompt)])
+        relatorio = resposta.completion
+    except CacheMissError:
+        raise
+    except Exception as e:
+        # Sem o LLM, o relatório único é a junção dos relatórios das subtarefas
+        print(f"⚠️ Não foi possível consolidar os relatórios com o LLM: {e}")
+        relatorio = '\n\n'.join(relatorios)
+
+    arquivo_consolidado = Path(pasta_suite) / "relatorio_consolidado.txt"
+    arquivo_consolidado.write_text(relatorio, encoding='utf-8')
+    return arquivo_consolidado
+
+
+async def explorar_em_paralelo(tarefa, llm, prompt_relatorio, concorrencia=None, max_passos=None, headless=None,
+                               processos=None, criar_llm=None):
+    """
+    Planeja as subtarefas, executa todas em paralelo como cenários de uma suíte e consolida os relatórios.
+    Com vários processos, cada um recria o LLM com criar_llm (função de módulo que devolve o mesmo LLM
+    de quem chamou); sem ela, tudo roda em um processo para não trocar de provedor.
+    Retorna a pasta da suíte (ou None se nada foi executado).
+    """
+    # Importado aqui para que os agentes só carreguem o executor quando o planejador estiver ligado
+    from executor_cenarios import executar_cenarios
+
+    processos = processos or int(os.getenv('PROCESSOS', '1')) or os.cpu_count() or 1
+    if processos > 1 and criar_llm is None:
+        processos = 1
+    inicio = time.monotonic()
+    subtarefas = await planejar_subtarefas(llm, tarefa)
+    pasta_suite, resultados = await executar_cenarios(
+        subtarefas, llm,
+        concorrencia=concorrencia or int(os.getenv('MAX_CONCORRENCIA', '3')),
+        max_passos=max_passos or int(os.getenv('MAX_PASSOS', '100')),
+        headless=headless,
+        processos=processos,
+        criar_llm=criar_llm,
+    )
+    if not pasta_suite:
+        return None
+
+    with open(Path(pasta_suite) / "plano.json", 'w', encoding='utf-8') as f:
+        json.dump({'tarefa': tarefa, 'subtarefas': subtarefas}, f, ensure_ascii=False, indent=2)
+
+    print("\nConsolidando os relatórios das subtarefas...")
+    arquivo = await consolidar_relatorios(llm, pasta_suite, resultados, tarefa, prompt_relatorio)
+    print(f"\nExploração concluída em {time.monotonic() - inicio:.1f}s! Relatório único: {arquivo}")
+    return pasta_suite
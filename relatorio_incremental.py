@@ -0,0 +1,116 @@
+"""
+Geração incremental do relatório durante a execução do agente
+Os passos concluídos chegam pelo hook on_step_end; quando o agente sai de uma
+funcionalidade com pelo menos RELATORIO_MIN_PASSOS passos acumulados, o resumo dela
+(com os cenários Gherkin) é gerado em segundo plano; visitas curtas esperam a próxima.
+Ao fim da execução só falta resumir a última área visitada e montar o relatório final.
+"""
+
+import os
+import asyncio
+import time
+from dotenv import load_dotenv
+
+from evidencias_stream import registro_do_passo
+from relatorio_mapreduce import (classificar_passo, resumir_funcionalidade, combinar_resumos,
+                                 reduzir_relatorio, dados_da_execucao, gerar_relatorio_mapreduce)
+
+# Carrega as variáveis de ambiente do arquivo .env
+load_dotenv()
+load_dotenv('config.env')
+
+
+def incremental_ativo():
+    return os.getenv('RELATORIO_INCREMENTAL', 'desligado').lower() in ('ligado', 'sim', 'true', '1')
+
+
+class RelatorioIncremental:
+    """
+    Acompanha os passos do agente e adianta os resumos por funcionalidade.
+    Com o modo desligado (RELATORIO_INCREMENTAL), registrar_passo não faz nada e
+    gerar() produz o relatório em map-reduce só depois da execução.
+    """
+
+    def __init__(self, llm, tarefa, ativo=None, concorrencia=None, min_passos=None):
+        self.llm = llm
+        self.tarefa = tarefa
+        self.ativo = incremental_ativo() if ativo is None else ativo
+        concorrencia = concorrencia or int(os.getenv('RELATORIO_CONCORRENCIA', '4'))
+        self._semaforo = asyncio.Semaphore(max(1, concorrencia))
+        # Passos mínimos de um trecho antes de resumi-lo: idas e voltas rápidas entre áreas
+        # (por exemplo, um passo de "Navegação Geral") não disparam uma chamada ao LLM cada
+        self.min_passos = max(1, min_passos or int(os.getenv('RELATORIO_MIN_PASSOS', '3')))
+        self._passos_vistos = 0
+        self._funcionalidade_atual = None
+        # Passos de cada funcionalidade ainda não resumidos
+        self._pendentes = {}
+        # Tarefas de resumo de cada funcionalidade, na ordem em que as áreas foram visitadas
+        self._resumos = {}
+
+    async def registrar_passo(self, agent):
+        """
+        Hook para Agent.run(on_step_end=...): classifica os passos novos e, ao mudar
+        de funcionalidade, dispara o resumo da área anterior em segundo plano
+        se ela já acumulou min_passos passos
+        """
+        if self.ativo:
+            self._acompanhar(agent.history.history)
+
+    def _acompanhar(self, historico):
+        for posicao in range(self._passos_vistos, len(historico)):
+            registro = registro_do_passo(historico[posicao], posicao)
+            funcionalidade = classificar_passo(registro)
+            if funcionalidade != self._funcionalidade_atual:
+                self._resumir_trecho(self._funcionalidade_atual, self.min_passos)
+                self._funcionalidade_atual = funcionalidade
+                self._resumos.setdefault(funcionalidade, [])
+            self._pendentes.setdefault(funcionalidade, []).append(registro)
+        self._passos_vistos = len(historico)
+
+    def _resumir_trecho(self, funcionalidade, minimo):
+        trecho = self._pendentes.get(funcionalidade, [])
+        if not trecho or len(trecho) < minimo:
+            return
+        del self._pendentes[funcionalidade]
+        print(f"📝 Resumindo '{funcionalidade}' em segundo plano ({len(trecho)} passos)")
+        tarefa = asyncio.create_task(
+            resumir_funcionalidade(self.llm, funcionalidade, trecho, self.tarefa, self._semaforo)
+        )
+        self._resumos.setdefault(funcionalidade, []).append(tarefa)
+
+    def cancelar(self):
+        """
+        Cancela os resumos pendentes (por exemplo, quando a execução do agente falha)
+        """
+        for tarefas in self._resumos.values():
+            for tarefa in tarefas:
+                tarefa.cancel()
+        self._resumos.clear()
+        self._pendentes.clear()
+
+    async def gerar(self, resultado, prompt_relatorio):
+        """
+        Conclui os resumos pendentes e monta o relatório final
+        """
+        if not self.ativo:
+            return await gerar_relatorio_mapreduce(self.llm, resultado, self.tarefa, prompt_relatorio)
+
+        # Passos que o hook ainda não viu e os trechos ainda não resumidos, mesmo os curtos
+        self._acompanhar(resultado.history)
+        for funcionalidade in list(self._pendentes):
+            self._resumir_trecho(funcionalidade, 1)
+
+        inicio = time.monotonic()
+        funcionalidades = list(self._resumos)
+        try:
+            parciais = await asyncio.gather(*[asyncio.gather(*self._resumos[f]) for f in funcionalidades])
+        except BaseException:
+            self.cancelar()
+            raise
+        resumos = await asyncio.gather(*[
+            combinar_resumos(self.llm, f, p, self._semaforo) for f, p in zip(funcionalidades, parciais)
+        ])
+        relatorio = await reduzir_relatorio(self.llm, dict(zip(funcionalidades, resumos)), self.tarefa,
+                                            prompt_relatorio, dados_da_execucao(resultado))
+        print(f"📝 Relatório finalizado {time.monotonic() - inicio:.1f}s após o fim da execução")
+        return relatorio
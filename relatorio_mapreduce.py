@@ -0,0 +1,239 @@
+"""
+Geração do relatório em map-reduce a partir do histórico do agente
+Os passos são compactados em resumos por funcionalidade, resumidos em paralelo (map)
+e combinados em uma chamada final (reduce) que monta o relatório e os cenários Gherkin.
+O tamanho de cada chamada fica limitado, independente da duração da exploração.
+"""
+
+import os
+import asyncio
+from dotenv import load_dotenv
+
+from evidencias_stream import registro_do_passo, registro_de_fim
+
+# Carrega as variáveis de ambiente do arquivo .env
+load_dotenv()
+load_dotenv('config.env')
+
+# Palavras-chave (na URL, no objetivo ou nas ações) que identificam cada funcionalidade
+FUNCIONALIDADES = {
+    'Login': ('login', 'logout', 'senha', 'password', 'entrar', 'sair', 'auth', 'sign'),
+    'Busca de Livros': ('busca', 'buscar', 'search', 'pesquis', 'filtr', 'ordena', 'pagina', 'catalog'),
+    'Empréstimo': ('emprest', 'loan', 'borrow'),
+    'Devolução': ('devolu', 'devolv', 'return'),
+    'Reserva': ('reserv', 'booking'),
+    'Perfil': ('perfil', 'profile', 'conta', 'account', 'usuario', 'usuário'),
+}
+FUNCIONALIDADE_PADRAO = 'Navegação Geral'
+
+# Tamanho máximo de cada trecho enviado ao LLM
+LIMITE_TEXTO_CAMPO = 200
+
+PROMPT_MAP = """Você está analisando parte de uma exploração automatizada da aplicação Bibliotech.
+Funcionalidade: {funcionalidade}
+Tarefa do agente: {tarefa}
+
+Passos executados (P<n> [ok|erro] url | objetivo | ações | resultado):
+{passos}
+
+Resuma em no máximo 250 palavras:
+- Ações realizadas e status (sucesso/falha)
+- Comportamentos e fluxos observados
+- Problemas ou erros encontrados
+- Cenários Gherkin (Given-When-Then) positivos e negativos sugeridos por esses passos"""
+
+PROMPT_COMBINAR = """Combine os resumos parciais abaixo sobre a funcionalidade '{funcionalidade}' da aplicação Bibliotech
+em um único resumo de no máximo 350 palavras, sem repetir informações e mantendo os cenários Gherkin sugeridos:
+
+{resumos}"""
+
+PROMPT_REDUCE = """{prompt_relatorio}
+
+DADOS DA EXECUÇÃO:
+- Tarefa: {tarefa}
+- Status: {status}
+- Passos executados: {passos}
+- Duração: {duracao}s
+- Resultado final: {resultado_final}
+- Erros: {erros}
+
+RESUMO POR FUNCIONALIDADE:
+{resumos}
+
+Por favor, gere um relatório completo baseado nos dados acima."""
+
+
+def _limitar(texto, limite=LIMITE_TEXTO_CAMPO):
+    texto = ' '.join(str(texto).split())
+    return texto if len(texto) <= limite else texto[:limite - 3] + '...'
+
+
+def registros_do_historico(resultado):
+    """
+    Registros de passo (mesmo formato do passos.jsonl) a partir do AgentHistoryList
+    """
+    return [registro_do_passo(item, posicao) for posicao, item in enumerate(resultado.history)]
+
+
+def classificar_passo(registro):
+    """
+    Funcionalidade do passo pelas palavras-chave da URL, do objetivo e das ações
+    """
+    texto = ' '.join([registro.get('url') or '', registro.get('objetivo') or '',
+                      str(registro.get('acoes', ''))]).lower()
+    for funcionalidade, palavras in FUNCIONALIDADES.items():
+        if any(p in texto for p in palavras):
+            return funcionalidade
+    return FUNCIONALIDADE_PADRAO
+
+
+def agrupar_por_funcionalidade(registros):
+    """
+    Agrupa os passos por funcionalidade, na ordem em que foram visitadas
+    """
+    grupos = {}
+    for r in registros:
+        if r.get('tipo', 'passo') == 'passo':
+            grupos.setdefault(classificar_passo(r), []).append(r)
+    return grupos
+
+
+def resumo_do_passo(registro):
+    """
+    Uma linha compacta por passo: número, status, URL, objetivo, ações e resultado
+    """
+    erros = [res['error'] for res in registro.get('resultados', []) if res.get('error')]
+    conteudos = [res['extracted_content'] for res in registro.get('resultados', []) if res.get('extracted_content')]
+    acoes = ', '.join(f"{nome}({_limitar(parametros, 60)})"
+                      for acao in registro.get('acoes', []) for nome, parametros in acao.items())
+    resultado = _limitar(erros[0]) if erros else _limitar(conteudos[-1]) if conteudos else ''
+    return (f"P{registro.get('passo')} [{'erro' if erros else 'ok'}] {registro.get('url') or ''} | "
+            f"{_limitar(registro.get('objetivo') or '')} | {acoes} | {resultado}")
+
+
+def dividir_em_blocos(linhas, limite_caracteres):
+    """
+    Divide as linhas em blocos de até limite_caracteres (uma linha nunca é partida)
+    """
+    blocos, atual, tamanho = [], [], 0
+    for linha in linhas:
+        if atual and tamanho + len(linha) > limite_caracteres:
+            blocos.append(atual)
+            atual, tamanho = [], 0
+        atual.append(linha)
+        tamanho += len(linha) + 1
+    if atual:
+        blocos.append(atual)
+    return blocos
+
+
+async def _chamar_llm(llm, prompt, semaforo):
+    from browser_use.llm.messages import UserMessage
+
+    async with semaforo:
+        resposta = await llm.ainvoke([UserMessage(content=prompt)])
+    return resposta.completion
+
+
+async def combinar_resumos(llm, funcionalidade, resumos, semaforo, limite_caracteres=None):
+    """
+    Combina resumos parciais de uma funcionalidade até sobrar um só
+    """
+    limite_caracteres = limite_caracteres or int(os.getenv('RELATORIO_BLOCO_CARACTERES', '6000'))
+
+    async def combinar(grupo):
+        if len(grupo) == 1:
+            return grupo[0]
+        return await _chamar_llm(llm, PROMPT_COMBINAR.format(funcionalidade=funcionalidade,
+                                                             resumos='\n\n'.join(grupo)), semaforo)
+
+    resumos = list(resumos)
+    while len(resumos) > 1:
+        grupos = dividir_em_blocos(resumos, limite_caracteres)
+        if len(grupos) == len(resumos):
+            # Cada resumo já ocupa um bloco inteiro; combina de dois em dois
+            grupos = [resumos[i:i + 2] for i in range(0, len(resumos), 2)]
+        resumos = await asyncio.gather(*[combinar(g) for g in grupos])
+    return resumos[0] if resumos else ''
+
+
+async def resumir_funcionalidade(llm, funcionalidade, registros, tarefa, semaforo, limite_caracteres=None):
+    """
+    Map: resume os passos de uma funcionalidade em blocos paralelos e combina os
+    resumos parciais até caberem em uma única chamada
+    """
+    from cache_llm import CacheMissError
+
+    limite_caracteres = limite_caracteres or int(os.getenv('RELATORIO_BLOCO_CARACTERES', '6000'))
+    blocos = dividir_em_blocos([resumo_do_passo(r) for r in registros], limite_caracteres)
+
+    async def resumir_bloco(linhas):
+        try:
+            return await _chamar_llm(llm, PROMPT_MAP.format(funcionalidade=funcionalidade, tarefa=_limitar(tarefa, 500),
+                                                            passos='\n'.join(linhas)), semaforo)
+        except CacheMissError:
+            raise
+        except Exception as e:
+            # Sem o resumo, o reduce recebe as primeiras linhas do bloco
+            print(f"⚠️ Falha ao resumir passos de '{funcionalidade}': {e}")
+            return '\n'.join(linhas[:10])
+
+    resumos = await asyncio.gather(*[resumir_bloco(b) for b in blocos])
+    return await combinar_resumos(llm, funcionalidade, resumos, semaforo, limite_caracteres)
+
+
+async def reduzir_relatorio(llm, resumos, tarefa, prompt_relatorio, dados):
+    """
+    Reduce: monta o relatório final a partir dos resumos por funcionalidade
+    """
+    from browser_use.llm.messages import UserMessage
+
+    texto_resumos = '\n\n'.join(f"### {funcionalidade}\n{resumo}" for funcionalidade, resumo in resumos.items())
+    prompt = PROMPT_REDUCE.format(
+        prompt_relatorio=prompt_relatorio.strip(), tarefa=tarefa, resumos=texto_resumos,
+        status=dados.get('status'), passos=dados.get('passos'), duracao=dados.get('duracao_s'),
+        resultado_final=_limitar(dados.get('resultado_final') or '', 1000),
+        erros='; '.join(_limitar(e) for e in (dados.get('erros') or [])[:10]) or 'nenhum',
+    )
+    resposta = await llm.ainvoke([UserMessage(content=prompt)])
+    return resposta.completion
+
+
+def dados_da_execucao(resultado):
+    """
+    Dados gerais da execução para o reduce: o registro de fim do stream de evidências, sem o tipo
+    """
+    dados = registro_de_fim(resultado)
+    del dados['tipo']
+    return dados
+
+
+async def gerar_relatorio_mapreduce(llm, resultado, tarefa, prompt_relatorio, concorrencia=None):
+    """
+    Gera o relatório detalhado do AgentHistoryList em map-reduce.
+    As exceções do reduce são propagadas para o tratamento de erro de quem chama.
+    """
+    concorrencia = concorrencia or int(os.getenv('RELATORIO_CONCORRENCIA', '4'))
+    semaforo = asyncio.Semaphore(max(1, concorrencia))
+    grupos = agrupar_por_funcionalidade(registros_do_historico(resultado))
+    print(f"📝 Resumindo {sum(len(g) for g in grupos.values())} passos em {len(grupos)} funcionalidades...")
+
+    resumos = await asyncio.gather(*[
+        resumir_funcionalidade(llm, funcionalidade, registros, tarefa, semaforo)
+        for funcionalidade, registros in grupos.items()
+    ])
+    return await reduzir_relatorio(llm, dict(zip(grupos, resumos)), tarefa, prompt_relatorio,
+                                   dados_da_execucao(resultado))
+
+
+def dados_compactos(resultado, tarefa, limite_caracteres=8000):
+    """
+    Texto curto com os dados da execução, para prompts de uma única chamada
+    """
+    dados = dados_da_execucao(resultado)
+    linhas = [resumo_do_passo(r) for r in registros_do_historico(resultado)]
+    passos = '\n'.join(linhas)
+    if len(passos) > limite_caracteres:
+        passos = passos[:limite_caracteres] + f"\n... ({len(linhas)} passos no total)"
+    return (f"- Tarefa: {tarefa}\n- Status: {dados['status']}\n- Passos: {dados['passos']}\n"
+            f"- Resultado final: {_limitar(dados['resultado_final'] or '', 1000)}\n\nPASSOS:\n{passos}")
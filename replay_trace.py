@@ -0,0 +1,149 @@
+"""
+Gravação e reexecução de traces de ações do agente
+Exporta o AgentHistoryList de uma exploração bem-sucedida e reexecuta as mesmas ações
+no navegador sem chamar o LLM; o LLM só é acionado quando um passo falha
+"""
+
+import os
+import json
+import argparse
+from dotenv import load_dotenv
+import asyncio
+import datetime
+import time
+from pathlib import Path
+
+# Carrega as variáveis de ambiente do arquivo .env
+load_dotenv()
+load_dotenv('config.env')
+
+# Ações que só mexem no sistema de arquivos do agente (anotações do LLM) e não precisam ser reexecutadas
+ACOES_SEM_NAVEGADOR = {'write_file', 'replace_file_str', 'read_file'}
+
+
+def exportar_trace(resultado, caminho, tarefa):
+    """
+    Salva o histórico do agente em um arquivo de trace reexecutável
+    """
+    caminho = Path(caminho)
+    os.makedirs(caminho.parent, exist_ok=True)
+    dados = {
+        'tarefa': tarefa,
+        'sucesso': resultado.is_successful(),
+        'gerado_em': datetime.datetime.now().isoformat(timespec='seconds'),
+    }
+    # Um passo por vez: com o histórico em disco (historico_em_disco.py), o trace não é montado inteiro na memória
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write('{\n  "history": [')
+        for posicao, item in enumerate(resultado.history):
+            f.write(',' if posicao else '')
+            f.write('\n    ' + json.dumps(item.model_dump(), ensure_ascii=False))
+        f.write('\n  ],\n')
+        f.write(',\n'.join(f"  {json.dumps(chave)}: {json.dumps(valor, ensure_ascii=False)}"
+                           for chave, valor in dados.items()))
+        f.write('\n}\n')
+    print(f"Trace salvo: {caminho}")
+    return caminho
+
+
+def _nomes_acoes(item):
+    return [nome for acao in item.model_output.action for nome in acao.model_dump(exclude_none=True)]
+
+
+def _objetivos_restantes(historico, inicio):
+    objetivos = []
+    for item in historico[inicio:]:
+        if item.model_output and item.model_output.next_goal:
+            objetivos.append(item.model_output.next_goal)
+    return objetivos
+
+
+async def reexecutar_trace(caminho, llm, headless=None, atraso=0.5, max_passos_llm=30):
+    """
+    Reexecuta o trace no navegador. Se um passo falhar (por exemplo, o elemento não
+    é mais encontrado), um agente com LLM continua a tarefa a partir daquele ponto.
+    Retorna um dicionário com o resumo da reexecução.
+    """
+    from browser_use import Agent, BrowserSession
+    from browser_use.agent.views import AgentHistoryList
+
+    with open(caminho, encoding='utf-8') as f:
+        tarefa = json.load(f).get('tarefa', '')
+
+    navegador = BrowserSession(headless=headless, keep_alive=True)
+    # O Agent só é usado para executar as ações do trace; nenhum passo chama o LLM
+    agent = Agent(task=tarefa, llm=llm, browser_session=navegador, directly_open_url=False)
+    historico = AgentHistoryList.load_from_file(caminho, agent.AgentOutput).history
+
+    resumo = {'trace': str(caminho), 'passos_trace': len(historico), 'passos_reexecutados': 0,
+              'modo': 'replay', 'sucesso': None}
+    inicio = time.monotonic()
+    try:
+        await navegador.start()
+        for i, item in enumerate(historico):
+            if not item.model_output or not item.model_output.action:
+                continue
+            if set(_nomes_acoes(item)) <= ACOES_SEM_NAVEGADOR:
+                continue
+
+            try:
+                # O rerun_history público reexecuta o histórico inteiro e fecha o agente no fim, sem dizer em que
+                # passo parou; aqui cada passo roda sozinho para entregar ao LLM a partir do primeiro que falhar.
+                # API interna do browser-use 0.7.x (versão fixada no requirements.txt)
+                resultados = await agent._execute_history_step(item, atraso)
+                erros = [r.error for r in resultados if r.error]
+                if erros:
+                    raise RuntimeError(erros[0])
+            except Exception as e:
+                print(f"⚠️ Passo {i} do trace falhou ({e}); acionando o LLM para continuar")
+                resumo.update(modo='replay+llm', passo_falha=i, erro=str(e))
+                objetivos = '; '.join(_objetivos_restantes(historico, i)) or 'concluir a tarefa'
+                tarefa_recuperacao = (f"{tarefa}\n\nA reexecução automática parou no passo {i}: {e}. "
+                                      "Continue a partir do estado atual da página, sem repetir o que já foi feito. "
+                                      f"Próximos objetivos: {objetivos}")
+                recuperacao = Agent(task=tarefa_recuperacao, llm=llm, browser_session=navegador,
+                                    directly_open_url=False)
+                resultado_llm = await recuperacao.run(max_steps=max_passos_llm)
+                resumo.update(passos_llm=resultado_llm.number_of_steps(), sucesso=resultado_llm.is_successful())
+                break
+
+            resumo['passos_reexecutados'] += 1
+            if any(r.is_done for r in resultados):
+                resumo['sucesso'] = all(r.success is not False for r in resultados if r.is_done)
+                break
+        else:
+            # Trace inteiro reexecutado sem falhas
+            resumo['sucesso'] = True
+    finally:
+        await navegador.kill()
+
+    resumo['duracao_s'] = round(time.monotonic() - inicio, 2)
+    return resumo
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Reexecuta um trace de ações do agente sem o LLM")
+    parser.add_argument('trace', help="Arquivo trace_*.json gerado por uma exploração")
+    parser.add_argument('--headless', action='store_true', help="Executa o navegador sem interface")
+    parser.add_argument('--atraso', type=float, default=0.5, help="Espera em segundos entre os passos")
+    args = parser.parse_args()
+
+    from agentUniversal import configurar_llm, salvar_evidencia
+
+    # O LLM só é chamado se algum passo do trace falhar
+    llm = configurar_llm()
+    if not llm:
+        print("❌ Não foi possível configurar nenhum modelo de IA")
+        return
+
+    resumo = await reexecutar_trace(args.trace, llm, headless=True if args.headless else None, atraso=args.atraso)
+
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    evidencias_dir = f"evidencias/replay_{timestamp}"
+    os.makedirs(evidencias_dir, exist_ok=True)
+    salvar_evidencia(evidencias_dir, json.dumps(resumo, ensure_ascii=False, indent=2), f"resumo_replay_{timestamp}")
+
+    print(f"\nReexecução concluída em {resumo['duracao_s']}s ({resumo['modo']}) - Evidências: {evidencias_dir}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
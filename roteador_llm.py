@@ -0,0 +1,186 @@
+"""
+Roteador de provedores de LLM com hedging e disjuntor (circuit breaker)
+Mantém o Gemini e o OpenAI ao mesmo tempo: se o provedor principal demora mais que
+o p95 das suas respostas, a mesma chamada é disparada no outro provedor e vale a
+primeira resposta. Provedores com falhas seguidas ficam fora do rodízio por um tempo.
+"""
+
+import os
+import time
+import asyncio
+from collections import deque
+
+from envelope_llm import EnvelopeLLM
+
+
+class Disjuntor:
+    """
+    Disjuntor de um provedor: abre após limite_falhas erros ou timeouts seguidos e,
+    passado o tempo de espera, libera uma chamada de teste (meio-aberto). Enquanto ela
+    não termina, as outras chamadas não usam o provedor.
+    """
+
+    def __init__(self, limite_falhas=3, espera_s=30.0):
+        self.limite_falhas = limite_falhas
+        self.espera_s = espera_s
+        self.falhas_seguidas = 0
+        self.aberto_em = None
+        self.testando = False
+
+    @property
+    def estado(self):
+        if self.aberto_em is None:
+            return 'fechado'
+        if time.monotonic() - self.aberto_em >= self.espera_s:
+            return 'meio-aberto'
+        return 'aberto'
+
+    def disponivel(self):
+        estado = self.estado
+        return estado == 'fechado' or (estado == 'meio-aberto' and not self.testando)
+
+    def iniciar_chamada(self):
+        """
+        Chamado ao disparar uma chamada; retorna True se ela for a chamada de teste do meio-aberto
+        """
+        if self.estado == 'meio-aberto' and not self.testando:
+            self.testando = True
+            return True
+        return False
+
+    def liberar_teste(self):
+        """
+        A chamada de teste foi cancelada sem resultado: a próxima chamada testa de novo
+        """
+        self.testando = False
+
+    def registrar_sucesso(self):
+        self.falhas_seguidas = 0
+        self.aberto_em = None
+        self.testando = False
+
+    def registrar_falha(self):
+        self.falhas_seguidas += 1
+        if self.falhas_seguidas >= self.limite_falhas or self.estado == 'meio-aberto':
+            self.aberto_em = time.monotonic()
+        self.testando = False
+
+
+class Provedor:
+    """
+    Um LLM do roteador com seu disjuntor e as latências recentes
+    """
+
+    def __init__(self, nome, llm, limite_falhas=3, espera_s=30.0, janela=100):
+        self.nome = nome
+        self.llm = llm
+        self.disjuntor = Disjuntor(limite_falhas, espera_s)
+        self.latencias = deque(maxlen=janela)
+
+    def p95(self):
+        if not self.latencias:
+            return None
+        ordenadas = sorted(self.latencias)
+        return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * 0.95))]
+
+
+class RoteadorLLM(EnvelopeLLM):
+    """
+    Envelope com vários provedores, na ordem de preferência.
+    Os atributos (model, provider, name...) são os do primeiro provedor.
+    """
+
+    def __init__(self, provedores, atraso_hedge_s=None, timeout_s=None, amostras_minimas=20):
+        super().__init__(provedores[0].llm)
+        self.provedores = provedores
+        # Atraso fixo do hedge; sem ele, usa o p95 do provedor depois de amostras_minimas respostas
+        self.atraso_hedge_s = atraso_hedge_s
+        self.atraso_inicial_s = float(os.getenv('ROTEADOR_HEDGE_INICIAL_S', '10'))
+        self.timeout_s = timeout_s or float(os.getenv('ROTEADOR_TIMEOUT_S', '60'))
+        self.amostras_minimas = amostras_minimas
+        self.hedges = 0
+
+    def _atraso_hedge(self, provedor):
+        if self.atraso_hedge_s is not None:
+            return self.atraso_hedge_s
+        if len(provedor.latencias) < self.amostras_minimas:
+            return self.atraso_inicial_s
+        return provedor.p95()
+
+    def _disponiveis(self):
+        disponiveis = [p for p in self.provedores if p.disjuntor.disponivel()]
+        # Com todos os disjuntores abertos, tenta mesmo assim o que abriu há mais tempo
+        return disponiveis or sorted(self.provedores, key=lambda p: p.disjuntor.aberto_em)[:1]
+
+    def _disparar(self, provedor, messages, output_format):
+        # A chamada de teste é marcada antes de criar a tarefa, sem await no meio: outra chamada
+        # concorrente já vê o provedor ocupado em _disponiveis()
+        teste = provedor.disjuntor.iniciar_chamada()
+        return asyncio.create_task(self._chamar(provedor, messages, output_format, teste))
+
+    async def _chamar(self, provedor, messages, output_format, teste=False):
+        inicio = time.monotonic()
+        try:
+            resposta = await asyncio.wait_for(provedor.llm.ainvoke(messages, output_format), self.timeout_s)
+        except asyncio.CancelledError:
+            # Perdeu o hedge para o outro provedor; não conta como falha
+            if teste:
+                provedor.disjuntor.liberar_teste()
+            raise
+        except Exception as e:
+            provedor.disjuntor.registrar_falha()
+            if provedor.disjuntor.estado == 'aberto':
+                print(f"⚡ Disjuntor aberto para {provedor.nome} ({type(e).__name__}: {e})")
+            raise
+        provedor.latencias.append(time.monotonic() - inicio)
+        provedor.disjuntor.registrar_sucesso()
+        return resposta
+
+    async def ainvoke(self, messages, output_format=None):
+        disponiveis = self._disponiveis()
+        principal, reservas = disponiveis[0], disponiveis[1:]
+        tarefas = {self._disparar(principal, messages, output_format): principal}
+        erro = None
+        try:
+            pendentes = set(tarefas)
+            espera = self._atraso_hedge(principal) if reservas else None
+            while pendentes:
+                prontas, pendentes = await asyncio.wait(pendentes, timeout=espera,
+                                                        return_when=asyncio.FIRST_COMPLETED)
+                for tarefa in prontas:
+                    if tarefa.exception() is None:
+                        return tarefa.result()
+                    erro = tarefa.exception()
+                # Principal lento ou com erro: dispara a mesma chamada no próximo provedor
+                if reservas:
+                    reserva = reservas.pop(0)
+                    if not prontas:
+                        self.hedges += 1
+                        print(f"🔀 {principal.nome} sem resposta em {espera:.1f}s; disparando também em {reserva.nome}")
+                    tarefa = self._disparar(reserva, messages, output_format)
+                    tarefas[tarefa] = reserva
+                    pendentes.add(tarefa)
+                    espera = self._atraso_hedge(reserva) if reservas else None
+                elif not prontas:
+                    espera = None
+            raise erro
+        finally:
+            for tarefa in tarefas:
+                tarefa.cancel()
+
+
+def criar_roteador(llms):
+    """
+    Monta o roteador a partir de [(nome, llm), ...] na ordem de preferência.
+    Com um único LLM disponível, retorna o próprio LLM.
+    """
+    llms = [(nome, llm) for nome, llm in llms if llm]
+    if len(llms) < 2:
+        return llms[0][1] if llms else None
+
+    atraso = os.getenv('ROTEADOR_HEDGE_S')
+    limite_falhas = int(os.getenv('ROTEADOR_LIMITE_FALHAS', '3'))
+    espera_s = float(os.getenv('ROTEADOR_ESPERA_S', '30'))
+    provedores = [Provedor(nome, llm, limite_falhas, espera_s) for nome, llm in llms]
+    print(f"🔀 Roteador de LLM ativo: {' -> '.join(nome for nome, _ in llms)}")
+    return RoteadorLLM(provedores, atraso_hedge_s=float(atraso) if atraso else None)
@@ -0,0 +1,180 @@
+"""
+Pipeline dos screenshots de cada passo do agente para a pasta de evidências
+A leitura, a recompressão (WebP/JPEG, se o Pillow estiver instalado) e o hash perceptual
+rodam em um pool de threads, fora do event loop. Quadros quase idênticos ao anterior
+não são gravados de novo; o manifesto indica de qual quadro cada passo repetido é cópia.
+"""
+
+import os
+import json
+import base64
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from dotenv import load_dotenv
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Carrega as variáveis de ambiente do arquivo .env
+load_dotenv()
+load_dotenv('config.env')
+
+FORMATOS = {'png': 'PNG', 'webp': 'WEBP', 'jpeg': 'JPEG'}
+
+
+def _dhash(imagem, tamanho=8):
+    """
+    Hash de diferença (dHash) de 64 bits: compara pixels vizinhos da imagem reduzida em tons de cinza
+    """
+    reduzida = imagem.convert('L').resize((tamanho + 1, tamanho))
+    pixels = list(reduzida.getdata())
+    valor = 0
+    for linha in range(tamanho):
+        for coluna in range(tamanho):
+            esquerda = pixels[linha * (tamanho + 1) + coluna]
+            direita = pixels[linha * (tamanho + 1) + coluna + 1]
+            valor = (valor << 1) | (esquerda > direita)
+    return valor
+
+
+def distancia_hash(a, b):
+    if isinstance(a, str) or isinstance(b, str):
+        # Sem Pillow o hash é do conteúdo: só arquivos idênticos são duplicados
+        return 0 if a == b else 64
+    return bin(a ^ b).count('1')
+
+
+def processar_screenshot(origem, formato, qualidade):
+    """
+    Executado no pool: lê o PNG (caminho ou base64), calcula o hash e recomprime.
+    Retorna (hash, bytes convertidos, tamanho original, extensão).
+    """
+    if isinstance(origem, Path) or (isinstance(origem, str) and os.path.exists(origem)):
+        bruto = Path(origem).read_bytes()
+    else:
+        bruto = base64.b64decode(origem.split(',', 1)[-1])
+
+    if Image is None:
+        return hashlib.sha1(bruto).hexdigest(), bruto, len(bruto), 'png'
+
+    with Image.open(BytesIO(bruto)) as imagem:
+        imagem.load()
+        hash_imagem = _dhash(imagem)
+        if formato == 'png':
+            return hash_imagem, bruto, len(bruto), 'png'
+        saida = BytesIO()
+        opcoes = {'quality': qualidade}
+        if formato == 'jpeg':
+            imagem = imagem.convert('RGB')
+            opcoes['optimize'] = True
+        else:
+            opcoes['method'] = 4
+        imagem.save(saida, FORMATOS[formato], **opcoes)
+    return hash_imagem, saida.getvalue(), len(bruto), formato
+
+
+class PipelineScreenshots:
+    """
+    Hook para Agent.run(on_step_end=...) que salva os screenshots em <evidencias_dir>/screenshots.
+    O processamento é feito em paralelo e a comparação com o quadro anterior, na ordem dos passos.
+    """
+
+    def __init__(self, evidencias_dir, gravador=None, formato=None, qualidade=None, limiar_hash=None,
+                 trabalhadores=None):
+        self.pasta = Path(evidencias_dir) / 'screenshots'
+        self.gravador = gravador
+        formato = (formato or os.getenv('SCREENSHOT_FORMATO', 'webp')).lower()
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato de screenshot inválido: {formato} (use {', '.join(FORMATOS)})")
+        if Image is None and formato != 'png':
+            print("⚠️ Pillow não instalado; screenshots serão salvos em PNG, sem recompressão")
+            formato = 'png'
+        self.formato = formato
+        self.qualidade = qualidade or int(os.getenv('SCREENSHOT_QUALIDADE', '80'))
+        self.limiar_hash = int(os.getenv('SCREENSHOT_LIMIAR_HASH', '4')) if limiar_hash is None else limiar_hash
+        self._executor = ThreadPoolExecutor(max_workers=trabalhadores or min(4, os.cpu_count() or 1),
+                                            thread_name_prefix='screenshots')
+        self._fila = asyncio.Queue()
+        self._tarefa = None
+        self._passos_vistos = 0
+        self._ultimo = None
+        self.manifesto = []
+
+    def iniciar(self):
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        if self._tarefa is None:
+            self._tarefa = asyncio.create_task(self._consumir())
+
+    def adicionar(self, passo, origem):
+        """
+        Envia um screenshot (caminho do PNG ou base64) para o pool
+        """
+        if self._tarefa is None:
+            self.iniciar()
+        loop = asyncio.get_running_loop()
+        futuro = loop.run_in_executor(self._executor, processar_screenshot, origem, self.formato, self.qualidade)
+        self._fila.put_nowait((passo, futuro))
+
+    async def registrar_passo(self, agent):
+        historico = agent.history.history
+        for posicao in range(self._passos_vistos, len(historico)):
+            item = historico[posicao]
+            if item.state.screenshot_path:
+                passo = item.metadata.step_number if item.metadata else posicao
+                self.adicionar(passo, item.state.screenshot_path)
+        self._passos_vistos = len(historico)
+
+    async def _consumir(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            entrada = await self._fila.get()
+            if entrada is None:
+                break
+            passo, futuro = entrada
+            try:
+                hash_imagem, conteudo, tamanho_original, extensao = await futuro
+            except Exception as e:
+                print(f"⚠️ Não foi possível processar o screenshot do passo {passo}: {e}")
+                continue
+
+            registro = {'passo': passo, 'bytes_original': tamanho_original}
+            if self._ultimo and distancia_hash(hash_imagem, self._ultimo[0]) <= self.limiar_hash:
+                registro.update(duplicado_de=self._ultimo[1], bytes_salvo=0)
+            else:
+                arquivo = self.pasta / f"passo_{passo:03d}.{extensao}"
+                await loop.run_in_executor(self._executor, arquivo.write_bytes, conteudo)
+                self._ultimo = (hash_imagem, arquivo.name)
+                registro.update(arquivo=arquivo.name, bytes_salvo=len(conteudo))
+            self.manifesto.append(registro)
+            if self.gravador:
+                self.gravador.registrar({'tipo': 'screenshot', **registro})
+
+    async def fechar(self):
+        """
+        Aguarda os screenshots pendentes, grava o manifesto e retorna o resumo
+        """
+        if self._tarefa is not None:
+            self._fila.put_nowait(None)
+            await self._tarefa
+            self._tarefa = None
+        self._executor.shutdown(wait=True)
+        if not self.manifesto:
+            return None
+
+        resumo = {
+            'formato': self.formato,
+            'capturas': len(self.manifesto),
+            'salvas': sum(1 for r in self.manifesto if 'arquivo' in r),
+            'bytes_original': sum(r['bytes_original'] for r in self.manifesto),
+            'bytes_salvo': sum(r['bytes_salvo'] for r in self.manifesto),
+        }
+        with open(self.pasta / 'manifesto.json', 'w', encoding='utf-8') as f:
+            json.dump({**resumo, 'passos': self.manifesto}, f, ensure_ascii=False, indent=2)
+        print(f"📸 {resumo['salvas']} de {resumo['capturas']} screenshots salvos em {self.pasta} "
+              f"({resumo['bytes_salvo'] / 1024:.0f} KB de {resumo['bytes_original'] / 1024:.0f} KB)")
+        return resumo
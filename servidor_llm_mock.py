@@ -0,0 +1,274 @@
+"""
+Servidor local que imita as APIs do OpenAI (chat completions) e do Gemini (generateContent)
+Serve para testes de carga do agentUniversal.py sem gastar com as APIs: a latência segue uma
+distribuição configurável e uma fração das chamadas falha com 429 (limite de taxa) ou 5xx.
+As respostas seguem o roteiro do Bibliotech local (llm_roteirizado.py), sem guardar estado:
+o passo é lido do próprio prompt do agente.
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from collections import Counter, deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from llm_roteirizado import RELATORIO_ROTEIRIZADO, posicao_no_roteiro, saida_do_roteiro
+
+# Corpo de erro de cada API para os status simulados
+STATUS_GEMINI = {429: 'RESOURCE_EXHAUSTED', 500: 'INTERNAL', 503: 'UNAVAILABLE'}
+TIPOS_OPENAI = {429: 'rate_limit_exceeded', 500: 'server_error', 503: 'service_unavailable'}
+
+
+def amostrador_latencia(especificacao, aleatorio):
+    """
+    Converte 'fixa:0.5', 'uniforme:0.2,1.5', 'normal:1.0,0.3', 'lognormal:0,0.5' ou 'exponencial:1.0'
+    em uma função que sorteia a latência em segundos
+    """
+    nome, _, valores = especificacao.partition(':')
+    parametros = [float(v) for v in valores.split(',') if v]
+    distribuicoes = {
+        'fixa': lambda a: a,
+        'uniforme': aleatorio.uniform,
+        'normal': aleatorio.gauss,
+        'lognormal': aleatorio.lognormvariate,
+        'exponencial': lambda media: aleatorio.expovariate(1 / media),
+    }
+    if nome not in distribuicoes:
+        raise ValueError(f"Distribuição de latência inválida: {nome} (use {', '.join(distribuicoes)})")
+    return lambda: max(0.0, distribuicoes[nome](*parametros))
+
+
+class EstadoMock:
+    """
+    Configuração e estatísticas compartilhadas pelas threads do servidor
+    """
+
+    def __init__(self, latencia='fixa:0', taxa_erro=0.0, taxa_429=0.0, rpm=None, retry_after_s=1,
+                 semente=None, url_bibliotech='http://127.0.0.1:8765'):
+        self.aleatorio = random.Random(semente)
+        self.latencia = amostrador_latencia(latencia, self.aleatorio)
+        self.taxa_erro = taxa_erro
+        self.taxa_429 = taxa_429
+        self.rpm = rpm
+        self.retry_after_s = retry_after_s
+        self.url_bibliotech = url_bibliotech
+        self.trava = threading.Lock()
+        self._janela = deque()
+        self.por_status = Counter()
+        self.por_api = Counter()
+        self.latencias = []
+
+    def sortear(self):
+        """
+        Decide o destino da chamada: (status, latência). 429 responde na hora; os demais esperam a latência.
+        """
+        with self.trava:
+            agora = time.monotonic()
+            while self._janela and agora - self._janela[0] > 60:
+                self._janela.popleft()
+            if self.rpm and len(self._janela) >= self.rpm:
+                return 429, 0.0
+            self._janela.append(agora)
+            sorteio = self.aleatorio.random()
+            latencia = self.latencia()
+        if sorteio < self.taxa_429:
+            return 429, 0.0
+        if sorteio < self.taxa_429 + self.taxa_erro:
+            return (503 if sorteio < self.taxa_429 + self.taxa_erro / 2 else 500), latencia
+        return 200, latencia
+
+    def contabilizar(self, api, status, latencia):
+        with self.trava:
+            self.por_api[api] += 1
+            self.por_status[status] += 1
+            if status == 200:
+                self.latencias.append(latencia)
+
+    def estatisticas(self):
+        with self.trava:
+            latencias = sorted(self.latencias)
+        percentil = (lambda p: round(latencias[min(len(latencias) - 1, int(p * len(latencias)))], 3)
+                     if latencias else None)
+        return {
+            'requisicoes': sum(self.por_status.values()),
+            'por_api': dict(self.por_api),
+            'por_status': {str(k): v for k, v in self.por_status.items()},
+            'latencia_p50_s': percentil(0.5),
+            'latencia_p95_s': percentil(0.95),
+        }
+
+
+def conteudo_da_resposta(estado_agente, quer_json, schema, url_bibliotech):
+    """
+    Texto devolvido pelo modelo: o próximo passo do roteiro para o agente, um JSON vazio para
+    outras saídas estruturadas e o relatório fixo para as chamadas de texto
+    """
+    if quer_json and '"action"' in json.dumps(schema or {}):
+        return json.dumps(saida_do_roteiro(posicao_no_roteiro(estado_agente), estado_agente, url_bibliotech),
+                          ensure_ascii=False)
+    if quer_json:
+        return '{}'
+    return RELATORIO_ROTEIRIZADO
+
+
+def _texto_openai(mensagem):
+    conteudo = mensagem.get('content') or ''
+    if isinstance(conteudo, str):
+        return conteudo
+    return '\n'.join(parte.get('text', '') for parte in conteudo if isinstance(parte, dict))
+
+
+def _texto_gemini(conteudo):
+    return '\n'.join(parte.get('text', '') for parte in conteudo.get('parts', []))
+
+
+class ManipuladorMock(BaseHTTPRequestHandler):
+    """
+    POST /v1/chat/completions (OpenAI), POST /v1beta/models/<modelo>:generateContent (Gemini)
+    e GET /estatisticas
+    """
+
+    estado = None
+    server_version = "LLMMock/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, dados, status=200, cabecalhos=None):
+        corpo = json.dumps(dados, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/estatisticas':
+            return self._json(self.estado.estatisticas())
+        self._json({'error': {'message': 'Não encontrado'}}, 404)
+
+    def do_POST(self):
+        caminho = self.path.split('?', 1)[0]
+        tamanho = int(self.headers.get('Content-Length') or 0)
+        try:
+            corpo = json.loads(self.rfile.read(tamanho) or b'{}')
+        except json.JSONDecodeError:
+            return self._json({'error': {'message': 'JSON inválido'}}, 400)
+
+        if caminho.endswith('/chat/completions'):
+            api = 'openai'
+        elif ':generateContent' in caminho:
+            api = 'gemini'
+        else:
+            return self._json({'error': {'message': f'Rota não suportada: {caminho}'}}, 404)
+
+        status, latencia = self.estado.sortear()
+        if latencia:
+            time.sleep(latencia)
+        self.estado.contabilizar(api, status, latencia)
+        if status != 200:
+            return self._erro(api, status)
+        if api == 'openai':
+            return self._openai(corpo)
+        return self._gemini(corpo, caminho.rsplit('/', 1)[-1].split(':')[0])
+
+    def _erro(self, api, status):
+        cabecalhos = {'Retry-After': str(self.estado.retry_after_s)} if status == 429 else None
+        mensagem = 'Limite de requisições simulado' if status == 429 else 'Falha simulada do servidor'
+        if api == 'openai':
+            dados = {'error': {'message': mensagem, 'type': TIPOS_OPENAI[status], 'code': TIPOS_OPENAI[status]}}
+        else:
+            dados = {'error': {'code': status, 'message': mensagem, 'status': STATUS_GEMINI[status]}}
+        self._json(dados, status, cabecalhos)
+
+    def _openai(self, corpo):
+        mensagens = corpo.get('messages', [])
+        usuario = [m for m in mensagens if m.get('role') == 'user']
+        formato = corpo.get('response_format') or {}
+        texto = conteudo_da_resposta(_texto_openai(usuario[-1]) if usuario else '',
+                                     formato.get('type') in ('json_schema', 'json_object'),
+                                     formato.get('json_schema'), self.estado.url_bibliotech)
+        tokens_prompt = sum(len(_texto_openai(m)) for m in mensagens) // 4
+        tokens_resposta = len(texto) // 4
+        self._json({
+            'id': f"chatcmpl-mock-{time.time_ns()}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': corpo.get('model', 'mock'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': texto}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': tokens_prompt, 'completion_tokens': tokens_resposta,
+                      'total_tokens': tokens_prompt + tokens_resposta},
+        })
+
+    def _gemini(self, corpo, modelo):
+        conteudos = corpo.get('contents', [])
+        usuario = [c for c in conteudos if c.get('role', 'user') == 'user']
+        configuracao = corpo.get('generationConfig') or corpo.get('generation_config') or {}
+        quer_json = (configuracao.get('responseMimeType') or configuracao.get('response_mime_type')) == 'application/json'
+        texto = conteudo_da_resposta(_texto_gemini(usuario[-1]) if usuario else '', quer_json, configuracao,
+                                     self.estado.url_bibliotech)
+        tokens_prompt = sum(len(_texto_gemini(c)) for c in conteudos) // 4
+        tokens_resposta = len(texto) // 4
+        self._json({
+            'candidates': [{'content': {'parts': [{'text': texto}], 'role': 'model'},
+                            'finishReason': 'STOP', 'index': 0}],
+            'usageMetadata': {'promptTokenCount': tokens_prompt, 'candidatesTokenCount': tokens_resposta,
+                              'totalTokenCount': tokens_prompt + tokens_resposta},
+            'modelVersion': modelo,
+        })
+
+
+def iniciar_servidor_mock(host='127.0.0.1', porta=0, **configuracao):
+    """
+    Sobe o servidor em uma thread; os argumentos nomeados vão para o EstadoMock.
+    Retorna (servidor, url_base); encerre com servidor.shutdown().
+    """
+    manipulador = type('Manipulador', (ManipuladorMock,), {'estado': EstadoMock(**configuracao)})
+    servidor = ThreadingHTTPServer((host, porta), manipulador)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name='llm-mock', daemon=True).start()
+    return servidor, f"http://{host}:{servidor.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local compatível com as APIs do OpenAI e do Gemini")
+    parser.add_argument('--porta', type=int, default=8090)
+    parser.add_argument('--latencia', default='fixa:0.5',
+                        help="fixa:S, uniforme:MIN,MAX, normal:MEDIA,DESVIO, lognormal:MU,SIGMA ou exponencial:MEDIA")
+    parser.add_argument('--taxa-erro', type=float, default=0.0, help="Fração das chamadas que falham com 500/503")
+    parser.add_argument('--taxa-429', type=float, default=0.0, help="Fração das chamadas recusadas com 429")
+    parser.add_argument('--rpm', type=int, default=None, help="Limite de requisições por minuto (acima dele, 429)")
+    parser.add_argument('--retry-after', type=int, default=1, help="Valor do cabeçalho Retry-After dos 429")
+    parser.add_argument('--semente', type=int, default=None, help="Semente para sorteios reproduzíveis")
+    parser.add_argument('--bibliotech-url', default=None,
+                        help="URL do Bibliotech usado pelo roteiro (padrão: sobe o bibliotech_local.py)")
+    args = parser.parse_args()
+
+    servidor_bibliotech = None
+    url_bibliotech = args.bibliotech_url
+    if not url_bibliotech:
+        from bibliotech_local import iniciar_servidor
+        servidor_bibliotech, url_bibliotech = iniciar_servidor(porta=8765)
+
+    servidor, url = iniciar_servidor_mock(porta=args.porta, latencia=args.latencia, taxa_erro=args.taxa_erro,
+                                          taxa_429=args.taxa_429, rpm=args.rpm, retry_after_s=args.retry_after,
+                                          semente=args.semente, url_bibliotech=url_bibliotech)
+    print(f"🧪 LLM mock em {url} (roteiro no Bibliotech {url_bibliotech})")
+    print(f"   OPENAI_BASE_URL={url}/v1")
+    print(f"   GEMINI_BASE_URL={url}")
+    print(f"   Estatísticas: {url}/estatisticas")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
+        if servidor_bibliotech:
+            servidor_bibliotech.shutdown()
+        print(json.dumps(servidor.RequestHandlerClass.estado.estatisticas(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Reaproveitamento da sessão autenticada entre agentes
+Faz o login uma única vez, guarda o storage state (cookies + localStorage) em disco
+e permite que os próximos agentes já comecem autenticados enquanto o snapshot for válido
+"""
+
+import os
+import json
+import time
+import hashlib
+from pathlib import Path
+
+DIR_SESSOES = Path(os.getenv('SESSAO_DIR', '.cache/sessoes'))
+
+
+def ttl_padrao():
+    """TTL do snapshot em minutos, configurável por SESSAO_TTL_MINUTOS"""
+    return float(os.getenv('SESSAO_TTL_MINUTOS', '60'))
+
+
+def caminho_snapshot(url, email):
+    """
+    Caminho do snapshot para a combinação aplicação + usuário
+    """
+    chave = hashlib.sha256(f"{url}|{email}".encode('utf-8')).hexdigest()[:16]
+    return DIR_SESSOES / f"storage_state_{chave}.json"
+
+
+def snapshot_valido(caminho, ttl_minutos=None):
+    """
+    Verifica se o snapshot existe, está dentro do TTL e não tem cookies expirados
+    """
+    caminho = Path(caminho)
+    if not caminho.exists():
+        return False
+
+    ttl_minutos = ttl_padrao() if ttl_minutos is None else ttl_minutos
+    idade_s = time.time() - caminho.stat().st_mtime
+    if idade_s > ttl_minutos * 60:
+        return False
+
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            estado = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return False
+
+    cookies = estado.get('cookies', [])
+    if not cookies and not estado.get('origins'):
+        return False
+    agora = time.time()
+    # Cookies de sessão têm expires = -1 e valem enquanto o snapshot estiver no TTL
+    return not any(0 < c.get('expires', -1) < agora for c in cookies)
+
+
+async def capturar_snapshot(llm, url, email, senha, caminho, headless=None, max_passos=10):
+    """
+    Realiza o login com um agente e salva o storage state da sessão autenticada.
+    Retorna True se o login foi concluído e o snapshot gravado.
+    """
+    from browser_use import Agent, BrowserSession
+    from browser_use.browser.events import SaveStorageStateEvent
+
+    caminho = Path(caminho)
+    os.makedirs(caminho.parent, exist_ok=True)
+    # O watchdog do browser_use mescla com o arquivo existente; um snapshot vencido não deve ser mesclado
+    if caminho.exists():
+        caminho.unlink()
+
+    navegador = BrowserSession(headless=headless, keep_alive=True)
+    tarefa = (f"Acesse {url} e realize login com email: {email} e senha: {senha} "
+              "Quando a página inicial autenticada for exibida, finalize a tarefa com sucesso. "
+              "Não explore nenhuma outra funcionalidade.")
+    try:
+        agent = Agent(task=tarefa, llm=llm, browser_session=navegador)
+        resultado = await agent.run(max_steps=max_passos)
+        if not resultado.is_successful():
+            print("❌ Não foi possível realizar o login para capturar a sessão")
+            return False
+
+        await navegador.event_bus.dispatch(SaveStorageStateEvent(path=str(caminho)))
+    finally:
+        await navegador.kill()
+
+    if not caminho.exists():
+        print("❌ O storage state da sessão não foi gravado")
+        return False
+    print(f"🔐 Sessão autenticada salva em: {caminho}")
+    return True
+
+
+async def obter_snapshot(llm, url, email, senha, ttl_minutos=None, headless=None, forcar=False):
+    """
+    Retorna o caminho de um snapshot autenticado válido, fazendo um login novo
+    quando não há snapshot ou ele expirou. Retorna None se o login falhar.
+    """
+    caminho = caminho_snapshot(url, email)
+    if not forcar and snapshot_valido(caminho, ttl_minutos):
+        print(f"🔐 Reaproveitando sessão autenticada: {caminho}")
+        return caminho
+
+    print("🔑 Snapshot de sessão ausente ou expirado, realizando login...")
+    if await capturar_snapshot(llm, url, email, senha, caminho, headless=headless):
+        return caminho
+    return None
+
+
+async def aplicar_snapshot(navegador, caminho):
+    """
+    Carrega cookies e localStorage do snapshot em uma sessão de navegador já iniciada.
+    O snapshot é só lido: a sessão não grava de volta nele.
+    """
+    from browser_use.browser.events import LoadStorageStateEvent
+
+    await navegador.start()
+    await navegador.event_bus.dispatch(LoadStorageStateEvent(path=str(caminho)))
@@ -2,14 +2,15 @@
 Teste direto da API REST do Google Gemini
 """
 
-import requests
-import json
 import os
+import asyncio
 from dotenv import load_dotenv
 
+from cliente_gemini_async import ClienteGeminiAsync, ErroGeminiREST
+
 load_dotenv()
 
-def testar_gemini_rest():
+async def testar_gemini_rest():
     """Testa a API REST do Google Gemini diretamente"""
     
     # Pega a chave da API do arquivo .env
@@ -20,51 +21,27 @@ def testar_gemini_rest():
     
     print(f"🔑 Testando chave: {api_key[:10]}...")
     
-    # URL da API
-    url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
-    
-    # Headers
-    headers = {
-        'Content-Type': 'application/json',
-        'X-goog-api-key': api_key
-    }
-    
-    # Dados da requisição
-    data = {
-        "contents": [
-            {
-                "parts": [
-                    {
-                        "text": "Explique como a IA funciona em poucas palavras"
-                    }
-                ]
-            }
-        ]
-    }
-    
     try:
         print("🚀 Enviando requisição para a API...")
-        response = requests.post(url, headers=headers, json=data)
-        
-        print(f"📊 Status Code: {response.status_code}")
+        async with ClienteGeminiAsync(api_key=api_key, modelo='gemini-2.0-flash') as cliente:
+            texto = await cliente.gerar_texto("Explique como a IA funciona em poucas palavras")
         
-        if response.status_code == 200:
-            result = response.json()
-            print("✅ API funcionando corretamente!")
-            print(f"📝 Resposta: {result['candidates'][0]['content']['parts'][0]['text']}")
-            return True
-        else:
-            print(f"❌ Erro na API: {response.status_code}")
-            print(f"📄 Resposta: {response.text}")
-            return False
+        print("✅ API funcionando corretamente!")
+        print(f"📝 Resposta: {texto}")
+        return True
             
+    except ErroGeminiREST as e:
+        print(f"❌ {e}")
+        if e.resposta:
+            print(f"📄 Resposta: {e.resposta}")
+        return False
     except Exception as e:
         print(f"❌ Erro na requisição: {e}")
         return False
 
 if __name__ == "__main__":
     print("🧪 Testando API REST do Google Gemini...\n")
-    sucesso = testar_gemini_rest()
+    sucesso = asyncio.run(testar_gemini_rest())
     
     if sucesso:
         print("\n🎉 Sua chave da API está funcionando!")
@@ -0,0 +1,76 @@
+import asyncio
+import os
+
+import pytest
+
+from cache_llm import CacheMissError, LLMComCache
+
+
+class LLMFalso:
+    model = 'modelo-teste'
+    temperature = 0.7
+
+    def __init__(self):
+        self.chamadas = 0
+
+    async def ainvoke(self, messages, output_format=None):
+        self.chamadas += 1
+        raise AssertionError("O modo replay não pode chamar o LLM")
+
+
+def test_chave_estavel_e_sensivel_ao_modelo_e_as_mensagens(tmp_path):
+    cache = LLMComCache(LLMFalso(), diretorio=tmp_path)
+    assert cache.chave('Olá') == LLMComCache(LLMFalso(), diretorio=tmp_path / 'outro').chave('Olá')
+    assert cache.chave('Olá') != cache.chave('Olá!')
+
+    outro_modelo = LLMFalso()
+    outro_modelo.model = 'outro-modelo'
+    assert LLMComCache(outro_modelo, diretorio=tmp_path).chave('Olá') != cache.chave('Olá')
+
+
+def _gravar_entrada(cache, nome, tamanho, mtime):
+    caminho = cache._caminho(nome)
+    os.makedirs(caminho.parent, exist_ok=True)
+    caminho.write_bytes(b'x' * tamanho)
+    os.utime(caminho, (mtime, mtime))
+    return caminho
+
+
+def test_evictar_remove_as_menos_usadas_ate_90_por_cento_do_limite(tmp_path):
+    cache = LLMComCache(LLMFalso(), diretorio=tmp_path, limite_mb=4000 / (1024 * 1024))
+    entradas = [_gravar_entrada(cache, f"{i:02d}entrada", 1000, 1_000_000 + i) for i in range(5)]
+    # Leitura recente protege a entrada mais antiga da remoção
+    os.utime(entradas[0], (1_000_100, 1_000_100))
+
+    cache.evictar()
+
+    # 5000 bytes com limite de 4000: fica em no máximo 3600 removendo as usadas há mais tempo
+    assert [p.exists() for p in entradas] == [True, False, False, True, True]
+    assert cache._tamanho_total == 3000
+
+
+def test_gravar_acima_do_limite_dispara_a_remocao(tmp_path):
+    cache = LLMComCache(LLMFalso(), diretorio=tmp_path, limite_mb=2500 / (1024 * 1024))
+    antiga = _gravar_entrada(cache, '00antiga', 1000, 1_000_000)
+    _gravar_entrada(cache, '01recente', 1000, 1_000_001)
+    nova = _gravar_entrada(cache, '02nova', 1000, 1_000_002)
+
+    cache._registrar_tamanho(nova.stat().st_size)
+
+    assert not antiga.exists()
+    assert cache._tamanho_total == 2000
+
+
+def test_replay_sem_resposta_no_cache_levanta_cache_miss(tmp_path):
+    llm = LLMFalso()
+    cache = LLMComCache(llm, diretorio=tmp_path, modo='replay')
+
+    with pytest.raises(CacheMissError, match=cache.chave('Olá')):
+        asyncio.run(cache.ainvoke('Olá'))
+    assert llm.chamadas == 0
+    assert cache.faltas == 1 and cache.acertos == 0
+
+
+def test_modo_invalido_e_recusado(tmp_path):
+    with pytest.raises(ValueError, match='Modo de cache inválido'):
+        LLMComCache(LLMFalso(), diretorio=tmp_path, modo='sempre')
@@ -0,0 +1,42 @@
+import asyncio
+
+import httpx
+
+import cliente_gemini_async
+from cliente_gemini_async import ClienteGeminiAsync, fechar_cliente_compartilhado, gerar_texto_gemini
+
+
+def test_chamadas_avulsas_reaproveitam_o_cliente_do_event_loop(monkeypatch):
+    monkeypatch.setenv('GEMINI_API_KEY', 'teste')
+    caminhos = []
+    clientes = []
+
+    def responder(requisicao):
+        caminhos.append(requisicao.url.path)
+        return httpx.Response(200, json={'candidates': [{'content': {'parts': [{'text': 'ok'}]}}]})
+
+    init_original = ClienteGeminiAsync.__init__
+
+    def init_com_transporte(self, *args, **kwargs):
+        init_original(self, *args, **kwargs)
+        self._cliente = httpx.AsyncClient(base_url=cliente_gemini_async.URL_BASE_GEMINI,
+                                          transport=httpx.MockTransport(responder))
+        clientes.append(self)
+
+    monkeypatch.setattr(ClienteGeminiAsync, '__init__', init_com_transporte)
+
+    async def executar():
+        textos = [await gerar_texto_gemini('a'), await gerar_texto_gemini('b', modelo='gemini-2.0-flash')]
+        compartilhado = clientes[0]
+        await fechar_cliente_compartilhado()
+        return textos, compartilhado.fechado
+
+    textos, fechado = asyncio.run(executar())
+    assert textos == ['ok', 'ok']
+    assert len(clientes) == 1 and fechado
+    assert caminhos[0].endswith('/models/gemini-1.5-flash:generateContent')
+    assert caminhos[1].endswith('/models/gemini-2.0-flash:generateContent')
+
+    # Um novo event loop abre o seu próprio cliente
+    asyncio.run(gerar_texto_gemini('c'))
+    assert len(clientes) == 2
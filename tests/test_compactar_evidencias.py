@@ -0,0 +1,83 @@
+import os
+import json
+import time
+import sqlite3
+
+import pytest
+
+import indice_evidencias
+import compactar_evidencias as ce
+
+
+@pytest.fixture(autouse=True)
+def indice_temporario(tmp_path, monkeypatch):
+    monkeypatch.setattr(indice_evidencias, 'CAMINHO_INDICE', tmp_path / 'indice.sqlite3')
+
+
+def criar_execucao(raiz, nome, idade_dias, tamanho_screenshot):
+    pasta = raiz / nome
+    (pasta / 'screenshots').mkdir(parents=True)
+    (pasta / 'passos.jsonl').write_text(json.dumps({'tipo': 'inicio', 'tarefa': nome}) + '\n', encoding='utf-8')
+    # Bytes aleatórios: o blob não se deduplica nem comprime entre execuções
+    (pasta / 'screenshots' / 'passo_1.png').write_bytes(os.urandom(tamanho_screenshot))
+    mtime = time.time() - idade_dias * 86400
+    for arquivo in pasta.rglob('*'):
+        os.utime(arquivo, (mtime, mtime))
+    return pasta
+
+
+def test_limite_de_tamanho_conta_os_blobs_das_execucoes_compactadas(tmp_path):
+    raiz = tmp_path / 'evidencias'
+    armazem = ce.ArmazemBlobs(raiz)
+    pastas = [criar_execucao(raiz, f"teste_{i:02d}", 30 - i, 1_000_000) for i in range(10)]
+    for pasta in pastas:
+        ce.compactar_execucao(pasta, armazem)
+
+    resumo = ce.aplicar_politica(raiz, compactar_apos_dias=1000, limite_mb=5)
+
+    # ~10 MB em blobs: saem só as 5 mais antigas, não todas
+    assert resumo['removidas'] == [str(p) for p in pastas[:5]]
+    assert all(ce.compactada(p) for p in pastas[5:])
+    assert resumo['blobs_liberados'] >= 5_000_000
+    restante = sum(c.stat().st_size for c in armazem.pasta.glob('*/*'))
+    assert 4_000_000 < restante <= 5 * 1024 * 1024
+
+
+def test_blob_compartilhado_so_sai_do_total_com_a_ultima_execucao(tmp_path):
+    raiz = tmp_path / 'evidencias'
+    armazem = ce.ArmazemBlobs(raiz)
+    comum = os.urandom(1_000_000)
+    pastas = []
+    for i in range(3):
+        pasta = criar_execucao(raiz, f"teste_{i}", 30 - i, 10)
+        (pasta / 'screenshots' / 'passo_1.png').write_bytes(comum)
+        ce.compactar_execucao(pasta, armazem)
+        pastas.append(pasta)
+
+    # O blob de 1 MB é de todas: remover execuções não o libera, então todas acabariam removidas
+    resumo = ce.aplicar_politica(raiz, compactar_apos_dias=1000, limite_mb=0.5, simular=True)
+    assert resumo['removidas'] == [str(p) for p in pastas]
+
+    resumo = ce.aplicar_politica(raiz, compactar_apos_dias=1000, limite_mb=2, simular=True)
+    assert resumo['removidas'] == []
+
+
+def test_remover_execucoes_fecha_as_conexoes_do_indice(tmp_path, monkeypatch):
+    raiz = tmp_path / 'evidencias'
+    for i in range(4):
+        criar_execucao(raiz, f"teste_{i:02d}", 30 - i, 1000)
+    conexoes = []
+    conectar = indice_evidencias.conectar
+
+    def conectar_registrando(*args, **kwargs):
+        conexoes.append(conectar(*args, **kwargs))
+        return conexoes[-1]
+
+    monkeypatch.setattr(indice_evidencias, 'conectar', conectar_registrando)
+    resumo = ce.aplicar_politica(raiz, compactar_apos_dias=1000, manter_dias=10)
+
+    assert len(resumo['removidas']) == 4 and len(conexoes) == 4
+    for conexao in conexoes:
+        # Conexão fechada não aceita mais comandos
+        with pytest.raises(sqlite3.ProgrammingError):
+            conexao.execute("SELECT 1")
@@ -0,0 +1,51 @@
+import asyncio
+import json
+
+import pytest
+
+from daemon_agentes import DaemonAgentes, validar_pedido
+
+
+@pytest.mark.parametrize('pedido', [
+    {}, {'tarefa': ''}, {'tarefa': '   '}, {'tarefa': 42}, {'tarefa': ['a']},
+    {'tarefa': 'ok', 'nome': 7}, {'tarefa': 'ok', 'max_passos': '10'}, {'tarefa': 'ok', 'max_passos': 0},
+    {'tarefa': 'ok', 'max_passos': True}, ['tarefa'],
+])
+def test_validar_pedido_recusa_pedidos_malformados(pedido):
+    assert validar_pedido(pedido)
+
+
+def test_validar_pedido_aceita_tarefa_em_texto():
+    assert validar_pedido({'tarefa': 'Acesse o catálogo', 'nome': 'catalogo', 'max_passos': 5}) is None
+
+
+class EscritorFalso:
+    def __init__(self):
+        self.linhas = []
+
+    def write(self, dados):
+        self.linhas.append(json.loads(dados))
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_pedido_malformado_recebe_erro_sem_derrubar_a_conexao(tmp_path):
+    async def atender():
+        daemon = DaemonAgentes(navegadores=1, caminho_socket=tmp_path / 'sock', pasta_spool=tmp_path / 'spool')
+        leitor = asyncio.StreamReader()
+        for pedido in ({'nome': 'sem tarefa'}, {'tarefa': 5}, {'tarefa': 'x', 'esperar': False}):
+            leitor.feed_data(json.dumps(pedido).encode('utf-8') + b'\n')
+        leitor.feed_data(b'[1, 2]\n{"acao": "estado"}\n')
+        leitor.feed_eof()
+        escritor = EscritorFalso()
+        await daemon._atender(leitor, escritor)
+        return escritor.linhas
+
+    respostas = asyncio.run(atender())
+    assert [r.get('status') for r in respostas[:4]] == ['erro', 'erro', 'na_fila', 'erro']
+    assert respostas[2]['id'] == '0001_x'
+    assert respostas[4]['na_fila'] == 1
@@ -0,0 +1,93 @@
+import json
+
+from diff_execucoes import comparar, impressao_digital, normalizar_erro, normalizar_url
+from indice_evidencias import conectar, indexar_execucao
+
+
+def _registros(urls, status='sucesso', erros=(), indice=0, tarefa='Explorar o Bibliotech'):
+    registros = [{'tipo': 'inicio', 'titulo': 'TESTE BIBLIOTECH', 'tarefa': tarefa}]
+    for passo, url in enumerate(urls, start=1):
+        registros.append({'tipo': 'passo', 'passo': passo, 'url': url, 'resultados': [{'error': None}],
+                          'acoes': [{'go_to_url': {'url': url}}, {'click_element_by_index': {'index': indice + passo}}]})
+    registros.append({'tipo': 'fim', 'status': status, 'erros': list(erros)})
+    return registros
+
+
+def _indexar(conexao, raiz, nome, urls, inicio, **kwargs):
+    registros = _registros(urls, **kwargs)
+    registros[0]['registrado_em'] = inicio
+    pasta = raiz / 'evidencias' / nome
+    pasta.mkdir(parents=True)
+    (pasta / 'passos.jsonl').write_text(''.join(json.dumps(r) + '\n' for r in registros), encoding='utf-8')
+    return indexar_execucao(pasta / 'passos.jsonl', conexao)
+
+
+def test_normalizar_url_troca_ids_e_descarta_query():
+    assert normalizar_url('https://Bib.exemplo.com/livros/123/editar?pagina=2#topo') == 'bib.exemplo.com/livros/:id/editar'
+    assert normalizar_url('https://bib.exemplo.com/reservas/3f2b8c1e-9a4d-4e2b-8f00-1234567890ab') == 'bib.exemplo.com/reservas/:id'
+    assert normalizar_url('https://bib.exemplo.com/') == 'bib.exemplo.com/'
+    assert normalizar_url('about:blank') is None
+    assert normalizar_url(None) is None
+
+
+def test_normalizar_erro_casa_o_mesmo_erro_entre_execucoes():
+    primeiro = normalizar_erro('Element with index 12 not found: "Entrar"\nTraceback (most recent call last): ...')
+    segundo = normalizar_erro("Element with index 7 not found: 'Sair'")
+    assert primeiro == segundo == 'Element with index N not found: …'
+    assert normalizar_erro('') == ''
+    assert len(normalizar_erro('x' * 500)) == 160
+
+
+def test_impressao_digital_ignora_indices_e_ids_mas_nao_o_status():
+    urls = ['https://bib.exemplo.com/login', 'https://bib.exemplo.com/livros/10']
+    base = impressao_digital(_registros(urls))
+    outra_execucao = impressao_digital(_registros(['https://bib.exemplo.com/login?next=1',
+                                                   'https://bib.exemplo.com/livros/99'], indice=40))
+    assert outra_execucao == base
+    assert base['paginas'] == ['bib.exemplo.com/livros/:id', 'bib.exemplo.com/login']
+    assert base['acoes'][:2] == ['go_to_url bib.exemplo.com/login', 'click_element_by_index']
+
+    assert impressao_digital(_registros(urls, status='falha'))['assinatura'] != base['assinatura']
+    assert impressao_digital(_registros(urls, erros=['Timeout 30000ms']))['erros'] == ['Timeout Nms']
+    assert impressao_digital(_registros(urls, tarefa='Outra tarefa'))['chave'] != base['chave']
+
+
+def test_comparar_so_aponta_inflacao_de_passos_acima_da_tolerancia(tmp_path):
+    conexao = conectar(tmp_path / 'indice.sqlite3')
+    paginas = [f'https://bib.exemplo.com/{p}' for p in ('login', 'catalogo', 'livros/1', 'emprestimos')]
+    _indexar(conexao, tmp_path, 'verde', paginas, '2025-09-20T10:00:00')
+    _indexar(conexao, tmp_path, 'um_a_mais', paginas + paginas[1:2], '2025-09-21T10:00:00')
+    _indexar(conexao, tmp_path, 'dois_a_mais', paginas + paginas[1:3], '2025-09-21T11:00:00')
+
+    # +1 passo fica abaixo de MINIMO_PASSOS_A_MAIS
+    um_a_mais = comparar('um_a_mais', base='verde', conexao=conexao)
+    assert not um_a_mais['identica'] and not um_a_mais['regressao'] and um_a_mais['alertas'] == []
+
+    # 4 -> 6 passos (+50%) passa da tolerância padrão de 25%, mas não de 60%
+    dois_a_mais = comparar('dois_a_mais', base='verde', tolerancia_passos=0.25, conexao=conexao)
+    assert dois_a_mais['regressao'] and dois_a_mais['alertas'] == ['passos: 4 -> 6 (+50%)']
+    assert not comparar('dois_a_mais', base='verde', tolerancia_passos=0.6, conexao=conexao)['regressao']
+
+    # Sem base explícita, a comparação é com a última execução verde da mesma tarefa
+    assert comparar('dois_a_mais', tolerancia_passos=0.25, conexao=conexao)['base'] == 'um_a_mais'
+    conexao.close()
+
+
+def test_comparar_separa_paginas_novas_de_paginas_ausentes(tmp_path):
+    conexao = conectar(tmp_path / 'indice.sqlite3')
+    paginas = ['https://bib.exemplo.com/login', 'https://bib.exemplo.com/catalogo']
+    _indexar(conexao, tmp_path, 'verde', paginas, '2025-09-20T10:00:00')
+    _indexar(conexao, tmp_path, 'com_pagina_nova', paginas + ['https://bib.exemplo.com/relatorios'],
+             '2025-09-21T10:00:00')
+    _indexar(conexao, tmp_path, 'sem_catalogo', paginas[:1] + ['https://bib.exemplo.com/relatorios'],
+             '2025-09-21T11:00:00')
+
+    nova = comparar('com_pagina_nova', base='verde', conexao=conexao)
+    assert nova['paginas_novas'] == ['bib.exemplo.com/relatorios'] and nova['paginas_ausentes'] == []
+    # Página nova aparece nos alertas, mas não é regressão
+    assert not nova['regressao'] and nova['alertas'] == ['1 páginas novas']
+
+    ausente = comparar('sem_catalogo', base='verde', conexao=conexao)
+    assert ausente['paginas_ausentes'] == ['bib.exemplo.com/catalogo']
+    assert ausente['regressao'] and ausente['alertas'] == ['1 páginas não visitadas', '1 páginas novas']
+    conexao.close()
@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+from dom_incremental import DomIncremental, dividir_em_blocos, referencia_curta
+
+URL = 'https://bib.exemplo.com/catalogo'
+
+
+def _pagina(livros, deslocamento=0):
+    """
+    DOM serializado com um elemento por livro; o backend_node_id vem do livro, o índice da posição
+    """
+    linhas, selector_map = ['Catálogo do Bibliotech'], {}
+    for posicao, (livro, texto) in enumerate(livros, start=1 + deslocamento):
+        linhas += [f"[{posicao}]<a href=/livros/{livro} class=link-livro title=Abrir o livro {livro} />", f"\t{texto}"]
+        selector_map[posicao] = SimpleNamespace(backend_node_id=1000 + livro)
+    return '\n'.join(linhas), selector_map
+
+
+def test_dividir_em_blocos_agrupa_cada_elemento_com_as_linhas_seguintes():
+    texto = '\n'.join(['Bibliotech', '[1]<a href=/inicio />', '\tInício', '\t*[2]<button aria-label=Salvar />',
+                       '|SCROLL+3]<div class=lista />', '|SHADOW(open)|[4]<input name=busca />'])
+    selector_map = {1: SimpleNamespace(backend_node_id=501), 2: SimpleNamespace(backend_node_id=502)}
+    blocos = dividir_em_blocos(texto, selector_map)
+    assert [(chave, indice, len(linhas)) for chave, indice, linhas in blocos] == [
+        ('inicio', None, 1), (501, 1, 2), (502, 2, 1), ('div class=lista />', 3, 1), ('input name=busca />', 4, 1)]
+    assert blocos[1][2] == ['[1]<a href=/inicio />', '\tInício']
+
+
+def test_referencia_curta_usa_o_texto_ou_o_rotulo():
+    assert referencia_curta(1, ['[1]<a href=/inicio />', '\tInício']) == '[1]<a> Início'
+    assert referencia_curta(2, ['\t*[2]<button aria-label=Salvar />']) == '\t[2]<button> Salvar'
+    longo = referencia_curta(3, ['[3]<a />', 'x' * 100], limite=10)
+    assert longo == '[3]<a> ' + 'x' * 9 + '…'
+
+
+def test_representar_envia_so_o_que_mudou_na_mesma_pagina():
+    dom = DomIncremental(ativo=True, completo_a_cada=8)
+    livros = [(n, f"Livro {n} disponível") for n in range(1, 21)]
+    texto, selector_map = _pagina(livros)
+    assert dom.representar('aba', URL, texto, selector_map) == texto
+
+    # Livro 1 sai, o 2 muda de texto e entra o 21; os demais só mudam de índice
+    seguintes = [(2, 'Livro 2 emprestado')] + livros[2:] + [(21, 'Livro 21 disponível')]
+    texto, selector_map = _pagina(seguintes, deslocamento=5)
+    incremental = dom.representar('aba', URL, texto, selector_map)
+    cabecalho, *corpo = incremental.split('\n')
+    assert 'Novos: [25]' in cabecalho and 'Alterados: [6]' in cabecalho
+    assert 'Removidos: [1]<a> Livro 1 disponível' in cabecalho
+    assert '[7]<a> Livro 3 disponível' in corpo and '\tLivro 2 emprestado' in corpo
+    assert len(incremental) < len(texto)
+    assert (dom.passos_completos, dom.passos_incrementais) == (1, 1)
+
+
+def test_representar_volta_ao_dom_completo():
+    livros = [(n, f"Livro {n} disponível") for n in range(1, 21)]
+    texto, selector_map = _pagina(livros)
+
+    # Outra URL na mesma aba
+    dom = DomIncremental(ativo=True, completo_a_cada=8)
+    dom.representar('aba', URL, texto, selector_map)
+    assert dom.representar('aba', URL + '?pagina=2', texto, selector_map) == texto
+
+    # A cada completo_a_cada passos
+    dom = DomIncremental(ativo=True, completo_a_cada=2)
+    enviados = [dom.representar('aba', URL, texto, selector_map) for _ in range(4)]
+    assert [e == texto for e in enviados] == [True, False, True, False]
+
+    # Quando a versão incremental não economiza ao menos economia_minima
+    dom = DomIncremental(ativo=True, economia_minima=0.2)
+    curto, mapa_curto = _pagina([(1, 'A')])
+    dom.representar('aba', URL, curto, mapa_curto)
+    assert dom.representar('aba', URL, curto, mapa_curto) == curto
+    assert dom.registro()['passos_incrementais'] == 0
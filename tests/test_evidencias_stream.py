@@ -0,0 +1,78 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from cache_llm import CacheMissError
+from evidencias_stream import ExecucaoComEvidencias, ler_stream
+
+
+class AgenteFalso:
+    def __init__(self, erro=None):
+        self.erro = erro
+        self.state = SimpleNamespace(n_steps=1)
+        self.history = SimpleNamespace(history=[])
+        self.hooks = None
+
+    async def _prepare_context(self, *args, **kwargs):
+        return None
+
+    async def multi_act(self, *args, **kwargs):
+        return []
+
+    async def run(self, on_step_start=None, on_step_end=None, **kwargs):
+        self.hooks = (on_step_start, on_step_end, kwargs)
+        if self.erro:
+            raise self.erro
+        return SimpleNamespace(is_successful=lambda: True, number_of_steps=lambda: 0,
+                               total_duration_seconds=lambda: 1.5, final_result=lambda: 'ok', errors=lambda: [])
+
+
+@pytest.fixture
+def pasta(tmp_path, monkeypatch):
+    # O índice das evidências (caminho relativo) fica dentro da pasta temporária
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('METRICAS_PROMETHEUS_DIR', '')
+    return tmp_path / 'evidencias' / 'teste'
+
+
+def _executar(pasta, agente, depois=None):
+    async def executar():
+        async with ExecucaoComEvidencias(pasta, llm=object(), tarefa='Emprestar um livro', nome_evidencia='evidencias',
+                                         nome_relatorio='relatorio', execucao='teste', titulo='TESTE') as execucao:
+            resultado = await execucao.executar(agente, max_steps=5)
+            execucao.relatorio_detalhado = 'relatório'
+            if depois:
+                raise depois
+            return resultado
+    return asyncio.run(executar())
+
+
+def test_execucao_concluida_grava_fim_relatorio_e_metricas(pasta):
+    agente = AgenteFalso()
+    _executar(pasta, agente)
+
+    tipos = [r['tipo'] for r in ler_stream(pasta / 'passos.jsonl')]
+    assert tipos == ['inicio', 'fim', 'relatorio', 'metricas']
+    assert agente.hooks[2] == {'max_steps': 5}
+    assert (pasta / 'evidencias.txt').exists() and (pasta / 'relatorio.txt').read_text(encoding='utf-8') == 'relatório'
+
+
+def test_falha_no_agente_fecha_o_stream_com_o_erro(pasta):
+    with pytest.raises(RuntimeError):
+        _executar(pasta, AgenteFalso(erro=RuntimeError('navegador caiu')))
+
+    registros = ler_stream(pasta / 'passos.jsonl')
+    assert [r['tipo'] for r in registros] == ['inicio', 'fim', 'metricas']
+    assert registros[1]['status'] == 'erro' and 'navegador caiu' in registros[1]['resultado_final']
+    assert 'Status final: erro' in (pasta / 'evidencias.txt').read_text(encoding='utf-8')
+
+
+def test_erro_depois_do_fim_nao_grava_outro_fim(pasta):
+    # Por exemplo, uma resposta ausente do cache no modo replay durante o relatório
+    with pytest.raises(CacheMissError):
+        _executar(pasta, AgenteFalso(), depois=CacheMissError('sem resposta gravada'))
+
+    registros = ler_stream(pasta / 'passos.jsonl')
+    assert [r['tipo'] for r in registros] == ['inicio', 'fim', 'relatorio', 'metricas']
+    assert registros[1]['status'] == 'sucesso'
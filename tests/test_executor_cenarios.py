@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from cache_llm import CacheMissError
+from executor_cenarios import dividir_em_shards, gerar_relatorio, repartir_concorrencia
+
+CENARIOS = {f"cenario_{i}": f"tarefa {i}" for i in range(10)}
+
+
+@pytest.mark.parametrize('processos, concorrencia', [(16, 3), (2, 3), (3, 3), (4, 10), (1, 5), (8, 1)])
+def test_total_de_navegadores_e_a_concorrencia(processos, concorrencia):
+    shards = dividir_em_shards(CENARIOS, processos, concorrencia)
+    navegadores = repartir_concorrencia(concorrencia, shards)
+
+    assert len(shards) <= min(processos, concorrencia)
+    assert sum(navegadores) == concorrencia
+    assert all(n >= 1 for n in navegadores)
+
+
+def test_shards_mantem_todos_os_cenarios_em_ordem():
+    shards = dividir_em_shards(CENARIOS, 3, 3)
+
+    assert sorted(nome for shard in shards for nome in shard) == sorted(CENARIOS)
+    assert list(shards[0]) == ['cenario_0', 'cenario_3', 'cenario_6', 'cenario_9']
+    # O shard com mais cenários fica com o navegador que sobra
+    assert repartir_concorrencia(4, shards) == [2, 1, 1]
+
+
+class RelatorioComErro:
+    def __init__(self, erro):
+        self.erro = erro
+
+    async def gerar(self, resultado, prompt):
+        raise self.erro
+
+
+def test_gerar_relatorio_nao_engole_falta_no_cache_do_replay():
+    assert asyncio.run(gerar_relatorio(RelatorioComErro(RuntimeError('timeout')), None, '')) == \
+        "Erro ao gerar relatório: timeout"
+    with pytest.raises(CacheMissError):
+        asyncio.run(gerar_relatorio(RelatorioComErro(CacheMissError('sem resposta gravada')), None, ''))
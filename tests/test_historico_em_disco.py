@@ -0,0 +1,89 @@
+import pytest
+
+import historico_em_disco
+from historico_em_disco import ListaEmDisco, HistoricoEmDisco
+
+
+class Passo:
+    """Item mínimo com a interface usada pela ListaEmDisco (model_dump e model_output)"""
+
+    model_output = None
+
+    def __init__(self, numero):
+        self.numero = numero
+
+    def model_dump(self):
+        return {'numero': self.numero}
+
+    def __eq__(self, outro):
+        return isinstance(outro, Passo) and outro.numero == self.numero
+
+
+@pytest.fixture
+def lista(tmp_path, monkeypatch):
+    monkeypatch.setattr(historico_em_disco, '_reconstruir', lambda dados, modelo: Passo(dados['numero']))
+    lista = ListaEmDisco(tmp_path / 'historico_agente.jsonl', janela=3)
+    lista.extend(Passo(n) for n in range(10))
+    return lista
+
+
+def test_despeja_os_antigos_e_rele_por_indice_fatia_e_iteracao(lista):
+    assert len(lista) == 10
+    assert len(lista._em_disco) == 7
+    assert list.__getitem__(lista, 0) is None
+    assert lista[0] == Passo(0)
+    assert lista[-1] == Passo(9)
+    assert lista[-10] == Passo(0)
+    assert lista[2:5] == [Passo(2), Passo(3), Passo(4)]
+    assert lista[8:] == [Passo(8), Passo(9)]
+    assert list(lista) == [Passo(n) for n in range(10)]
+    assert list(reversed(lista)) == [Passo(n) for n in reversed(range(10))]
+
+
+def test_operacoes_que_deslocam_posicoes_sao_recusadas(lista):
+    for operacao in (lambda: lista.pop(), lambda: lista.insert(0, Passo(99)), lambda: lista.remove(Passo(9)),
+                     lambda: lista.__delitem__(0), lambda: lista.sort(), lambda: lista.reverse()):
+        with pytest.raises(TypeError):
+            operacao()
+    assert list(lista) == [Passo(n) for n in range(10)]
+
+
+def test_troca_por_indice_e_clear(lista):
+    lista[0] = Passo(100)
+    assert lista[0] == Passo(100)
+    lista.clear()
+    assert len(lista) == 0 and not lista._em_disco and lista.bytes_em_disco == 0
+    lista += [Passo(n) for n in range(5)]
+    assert list(lista) == [Passo(n) for n in range(5)]
+
+
+def test_roundtrip_de_agent_history(tmp_path):
+    pytest.importorskip('browser_use')
+    from browser_use.tools.service import Tools
+    from browser_use.agent.views import AgentHistory, AgentHistoryList, AgentOutput, ActionResult, StepMetadata
+    from browser_use.browser.views import BrowserStateHistory
+
+    saida = AgentOutput.type_with_custom_actions(Tools().registry.create_action_model())
+
+    def passo(n):
+        return AgentHistory(
+            model_output=saida.model_validate({'evaluation_previous_goal': 'ok', 'memory': '', 'next_goal': f"p{n}",
+                                               'action': [{'go_to_url': {'url': f"https://x.app/{n}"}}]}),
+            result=[ActionResult(extracted_content=f"resultado {n}", error='falhou' if n == 2 else None)],
+            state=BrowserStateHistory(url=f"https://x.app/{n}", title='t', tabs=[], interacted_element=[None]),
+            metadata=StepMetadata(step_start_time=n, step_end_time=n + 1, step_number=n))
+
+    class Agente:
+        history = AgentHistoryList(history=[], usage=None)
+
+    historico = HistoricoEmDisco(tmp_path, ativo=True, janela=2)
+    historico.instalar(Agente)
+    referencia = AgentHistoryList(history=[])
+    for n in range(1, 8):
+        Agente.history.add_item(passo(n))
+        referencia.add_item(passo(n))
+
+    assert isinstance(Agente.history.history, ListaEmDisco)
+    assert Agente.history.model_dump() == referencia.model_dump()
+    assert Agente.history.errors() == referencia.errors()
+    assert historico.registro()['passos_em_disco'] == 5
@@ -0,0 +1,80 @@
+import json
+
+from indice_evidencias import CONSULTAS, atualizar_indice, conectar, consultar, indexar_execucao
+
+
+def _gravar_stream(pasta, registros):
+    pasta.mkdir(parents=True, exist_ok=True)
+    caminho = pasta / 'passos.jsonl'
+    caminho.write_text(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in registros), encoding='utf-8')
+    return caminho
+
+
+REGISTROS = [
+    {'tipo': 'inicio', 'titulo': 'TESTE BIBLIOTECH', 'tarefa': 'Emprestar um livro', 'registrado_em': '2025-09-21T10:00:00'},
+    {'tipo': 'passo', 'passo': 1, 'url': 'https://bib.exemplo.com/login', 'duracao_s': 2.5, 'tokens': 900,
+     'acoes': [{'input_text': {'index': 3, 'text': 'ana'}}, {'input_text': {'index': 4, 'text': '***'}},
+               {'click_element_by_index': {'index': 5}}],
+     'resultados': [{'error': None}]},
+    {'tipo': 'passo', 'passo': 2, 'url': 'https://bib.exemplo.com/livros/7', 'duracao_s': 4.0,
+     'acoes': [{'click_element_by_index': {'index': 9}}],
+     'resultados': [{'error': 'Element with index 9 not found'}, {'error': 'segundo erro'}]},
+    {'tipo': 'passo', 'passo': 3, 'url': 'https://bib.exemplo.com/livros/7', 'acoes': [], 'resultados': []},
+    {'tipo': 'fim', 'status': 'falha', 'duracao_s': 12.3, 'erros': ['Element with index 9 not found'],
+     'registrado_em': '2025-09-21T10:00:12'},
+    {'tipo': 'metricas', 'tokens_prompt': 2000, 'tokens_resposta': 300, 'custo': 0.01,
+     'passos_metricas': [{'passo': 1, 'tokens': 1}, {'passo': 2, 'tokens': 1100}]},
+]
+
+
+def test_indexar_execucao_grava_execucao_passos_e_impressao(tmp_path):
+    conexao = conectar(tmp_path / 'indice.sqlite3')
+    caminho = _gravar_stream(tmp_path / 'evidencias' / 'suite_1' / 'emprestimo', REGISTROS)
+
+    assert indexar_execucao(caminho, conexao) == 'suite_1/emprestimo'
+
+    execucao = conexao.execute("SELECT titulo, tarefa, status, passos, duracao_s, inicio, fim, tokens_prompt, "
+                               "tokens_resposta, custo, tamanho_stream FROM execucoes").fetchone()
+    assert execucao == ('TESTE BIBLIOTECH', 'Emprestar um livro', 'falha', 3, 12.3, '2025-09-21T10:00:00',
+                        '2025-09-21T10:00:12', 2000, 300, 0.01, caminho.stat().st_size)
+
+    # Uma linha por ação distinta do passo; o primeiro erro do passo; tokens do passo ou das métricas
+    passos = conexao.execute("SELECT passo, acao, erro, duracao_s, tokens FROM passos ORDER BY passo, acao").fetchall()
+    assert passos == [(1, 'click_element_by_index', None, 2.5, 900), (1, 'input_text', None, 2.5, 900),
+                      (2, 'click_element_by_index', 'Element with index 9 not found', 4.0, 1100),
+                      (3, None, None, None, None)]
+
+    acoes, paginas = conexao.execute("SELECT acoes, paginas FROM impressoes").fetchone()
+    assert json.loads(acoes) == ['input_text', 'input_text', 'click_element_by_index', 'click_element_by_index']
+    assert json.loads(paginas) == ['bib.exemplo.com/livros/:id', 'bib.exemplo.com/login']
+    conexao.close()
+
+
+def test_reindexar_substitui_as_linhas_da_execucao(tmp_path):
+    conexao = conectar(tmp_path / 'indice.sqlite3')
+    pasta = tmp_path / 'evidencias' / 'teste_1'
+    indexar_execucao(_gravar_stream(pasta, REGISTROS), conexao)
+
+    # O stream foi reescrito só com o primeiro passo (por exemplo, execução repetida na mesma pasta)
+    indexar_execucao(_gravar_stream(pasta, REGISTROS[:2] + REGISTROS[4:]), conexao)
+    assert conexao.execute("SELECT COUNT(*), MAX(passo) FROM passos").fetchone() == (2, 1)
+    assert conexao.execute("SELECT COUNT(*) FROM execucoes").fetchone() == (1,)
+    assert conexao.execute("SELECT COUNT(*) FROM impressoes").fetchone() == (1,)
+    conexao.close()
+
+
+def test_atualizar_indice_so_reindexa_streams_novos_ou_alterados(tmp_path):
+    conexao = conectar(tmp_path / 'indice.sqlite3')
+    raiz = tmp_path / 'evidencias'
+    primeiro = _gravar_stream(raiz / 'teste_1', REGISTROS)
+    _gravar_stream(raiz / 'teste_2', REGISTROS[:2] + REGISTROS[4:])
+
+    assert atualizar_indice(raiz, conexao) == 2
+    assert atualizar_indice(raiz, conexao) == 0
+    with open(primeiro, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'tipo': 'relatorio', 'texto': 'ok'}) + '\n')
+    assert atualizar_indice(raiz, conexao) == 1
+
+    colunas, linhas = consultar(CONSULTAS['falhas'].format(filtro=''), conexao=conexao)
+    assert colunas[:2] == ['execucao', 'status'] and len(linhas) == 2
+    conexao.close()
@@ -0,0 +1,29 @@
+from instrumentacao import MetricasExecucao
+
+
+def test_cada_cenario_grava_seu_arquivo_no_textfile_collector(tmp_path, monkeypatch):
+    pasta_prometheus = tmp_path / 'textfile'
+    monkeypatch.setenv('METRICAS_PROMETHEUS_DIR', str(pasta_prometheus))
+    # O executor passa o nome do cenário; as pastas das evidências ficam dentro da suíte
+    for execucao in ('login', 'busca'):
+        evidencias = tmp_path / 'suite_1' / f"cenario_{execucao}"
+        evidencias.mkdir(parents=True)
+        MetricasExecucao().salvar(evidencias, execucao=execucao)
+
+    arquivos = sorted(p.name for p in pasta_prometheus.iterdir())
+    assert arquivos == ['bibliotech_agente_busca.prom', 'bibliotech_agente_login.prom']
+    assert 'bibliotech_passos{execucao="login"} 0' in (pasta_prometheus / arquivos[1]).read_text(encoding='utf-8')
+
+
+def test_execucoes_do_mesmo_script_substituem_o_arquivo(tmp_path, monkeypatch):
+    pasta_prometheus = tmp_path / 'textfile'
+    monkeypatch.setenv('METRICAS_PROMETHEUS_DIR', str(pasta_prometheus))
+    for timestamp, fim in (('20250921_101010', 1000.0), ('20250921_111111', 2000.0)):
+        monkeypatch.setattr('instrumentacao.time.time', lambda: fim)
+        evidencias = tmp_path / f"teste_{timestamp}"
+        evidencias.mkdir()
+        MetricasExecucao().salvar(evidencias, execucao='agent')
+
+    assert [p.name for p in pasta_prometheus.iterdir()] == ['bibliotech_agente_agent.prom']
+    texto = (pasta_prometheus / 'bibliotech_agente_agent.prom').read_text(encoding='utf-8')
+    assert 'bibliotech_execucao_fim_segundos{execucao="agent"} 2000.0' in texto
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+import limitador_taxa
+from limitador_taxa import Baldes, BaldesArquivo, LimitadorTaxa
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    agora = [1_000_000.0]
+    monkeypatch.setattr(limitador_taxa.time, 'time', lambda: agora[0])
+    return agora
+
+
+def test_consumir_espera_o_balde_de_requisicoes_reabastecer(relogio):
+    baldes = Baldes(rpm=2)
+    assert baldes.consumir(0) == 0 and baldes.consumir(0) == 0
+    # Sem saldo: 1 requisição a 2 por minuto
+    assert baldes.consumir(0) == pytest.approx(30)
+    relogio[0] += 30
+    assert baldes.consumir(0) == 0
+
+
+def test_consumir_desconta_tokens_e_aceita_pedido_maior_que_o_balde(relogio):
+    baldes = Baldes(tpm=600)
+    assert baldes.consumir(500) == 0
+    # Restam 100 tokens; faltam 100 a 10 por segundo
+    assert baldes.consumir(200) == pytest.approx(10)
+    relogio[0] += 60
+    # Um pedido maior que o balde inteiro passa com o balde cheio, em vez de esperar para sempre
+    assert baldes.consumir(1000) == 0
+    assert baldes._estado['tokens'] == 0
+
+
+def test_ajustar_corrige_o_balde_com_o_uso_real(relogio):
+    baldes = Baldes(tpm=600)
+    baldes.consumir(100)
+    baldes.ajustar(400)
+    assert baldes._estado['tokens'] == 100
+    baldes.ajustar(700)
+    assert baldes._estado['tokens'] == -600
+    assert baldes.consumir(10) == pytest.approx(61)
+    # Tokens devolvidos (chamada recusada) não passam do limite do balde
+    baldes.ajustar(-5000)
+    assert baldes._estado['tokens'] == 600
+
+
+def test_pausar_bloqueia_as_chamadas_e_esvazia_as_requisicoes(relogio):
+    baldes = Baldes(rpm=60, tpm=6000)
+    baldes.pausar(5)
+    assert baldes._estado['requisicoes'] == 0
+    assert baldes.consumir(10) == pytest.approx(5)
+    relogio[0] += 5
+    assert baldes.consumir(10) == 0
+
+
+@pytest.mark.skipif(limitador_taxa.fcntl is None, reason="BaldesArquivo exige fcntl")
+def test_baldes_em_arquivo_compartilham_o_saldo(tmp_path, relogio):
+    primeiro = BaldesArquivo(tmp_path / 'gemini.json', rpm=1)
+    segundo = BaldesArquivo(tmp_path / 'gemini.json', rpm=1)
+    assert primeiro.consumir(0) == 0
+    assert segundo.consumir(0) == pytest.approx(60)
+
+
+class BaldesControlados(Baldes):
+    def __init__(self):
+        super().__init__(rpm=1)
+        self.saldo = 0
+
+    def consumir(self, tokens):
+        if self.saldo <= 0:
+            return 0.01
+        self.saldo -= 1
+        return 0.0
+
+
+def test_limitador_libera_os_passos_do_agente_antes_do_relatorio():
+    async def executar():
+        baldes = BaldesControlados()
+        limitador = LimitadorTaxa('teste', baldes, pausa_s=1)
+        ordem = []
+
+        async def chamar(nome, prioridade):
+            await limitador.adquirir(10, prioridade)
+            ordem.append(nome)
+
+        tarefas = []
+        for nome, prioridade in (('relatorio 1', 1), ('agente 1', 0), ('relatorio 2', 1), ('agente 2', 0)):
+            tarefas.append(asyncio.create_task(chamar(nome, prioridade)))
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.05)
+        assert ordem == []
+        baldes.saldo = 4
+        await asyncio.gather(*tarefas)
+        limitador._despachante.cancel()
+        return ordem, limitador.estatisticas['chamadas']
+
+    ordem, chamadas = asyncio.run(executar())
+    assert ordem == ['agente 1', 'agente 2', 'relatorio 1', 'relatorio 2']
+    assert chamadas == 4
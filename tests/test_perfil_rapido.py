@@ -0,0 +1,34 @@
+import json
+
+from perfil_rapido import PerfilRapido, _casa
+
+
+def test_casa_como_o_set_blocked_urls():
+    assert _casa('*.png?*', 'https://x.app/capa.png?w=200')
+    assert _casa('*fonts.gstatic.com*', 'https://fonts.gstatic.com/s/roboto.woff2')
+    assert not _casa('*.png', 'https://x.app/capa.png?w=200')
+
+
+def test_bloqueio_sem_tamanho_conhecido_nao_conta_bytes(tmp_path):
+    perfil = PerfilRapido(ativo=True, tipos=['imagem'], urls=[], pasta_cache=tmp_path)
+    perfil._ao_enviar({'requestId': '1', 'request': {'url': 'https://x.app/capa.png'}})
+    perfil._ao_falhar({'requestId': '1', 'blockedReason': 'inspector'})
+
+    registro = perfil.registro()
+    assert registro['bloqueadas'] == {'imagem': 1}
+    assert registro['bytes_bloqueados_conhecidos'] == 0
+    assert 'bytes_economizados' not in registro
+
+
+def test_sessoes_juntam_os_tamanhos_no_mesmo_arquivo(tmp_path):
+    primeira = PerfilRapido(ativo=True, pasta_cache=tmp_path)
+    segunda = PerfilRapido(ativo=True, pasta_cache=tmp_path)
+    for perfil, url, tamanho in ((primeira, 'https://x.app/a.js', 100), (segunda, 'https://x.app/b.js', 200)):
+        perfil._ao_enviar({'requestId': url, 'request': {'url': url}})
+        perfil._ao_terminar({'requestId': url, 'encodedDataLength': tamanho})
+
+    primeira.registro()
+    segunda.registro()
+
+    tamanhos = json.loads((tmp_path / 'tamanhos.json').read_text(encoding='utf-8'))
+    assert tamanhos == {'https://x.app/a.js': 100, 'https://x.app/b.js': 200}
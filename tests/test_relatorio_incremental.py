@@ -0,0 +1,37 @@
+import asyncio
+
+import relatorio_incremental
+from relatorio_incremental import RelatorioIncremental
+
+
+def test_trocas_rapidas_de_funcionalidade_nao_disparam_um_resumo_cada(monkeypatch):
+    chamadas = []
+
+    async def resumir(llm, funcionalidade, registros, tarefa, semaforo):
+        chamadas.append((funcionalidade, [r['passo'] for r in registros]))
+        return funcionalidade
+
+    monkeypatch.setattr(relatorio_incremental, 'registro_do_passo', lambda item, posicao: {'passo': posicao, 'f': item})
+    monkeypatch.setattr(relatorio_incremental, 'classificar_passo', lambda registro: registro['f'])
+    monkeypatch.setattr(relatorio_incremental, 'resumir_funcionalidade', resumir)
+
+    # Catálogo com idas e voltas de um passo à navegação geral, depois o empréstimo
+    historico = ['Catálogo', 'Navegação Geral', 'Catálogo', 'Navegação Geral', 'Catálogo', 'Catálogo',
+                 'Empréstimos', 'Empréstimos', 'Empréstimos', 'Catálogo']
+
+    async def executar():
+        relatorio = RelatorioIncremental(llm=None, tarefa='t', ativo=True, min_passos=3)
+        for fim in range(1, len(historico) + 1):
+            relatorio._acompanhar(historico[:fim])
+        await asyncio.sleep(0)
+        durante = list(chamadas)
+        for funcionalidade in list(relatorio._pendentes):
+            relatorio._resumir_trecho(funcionalidade, 1)
+        await asyncio.gather(*[t for tarefas in relatorio._resumos.values() for t in tarefas])
+        return durante, list(relatorio._resumos)
+
+    durante, ordem = asyncio.run(executar())
+    # Durante a execução, só trechos com 3 passos ou mais foram resumidos
+    assert durante == [('Catálogo', [0, 2, 4, 5]), ('Empréstimos', [6, 7, 8])]
+    assert sorted(chamadas[2:]) == [('Catálogo', [9]), ('Navegação Geral', [1, 3])]
+    assert ordem == ['Catálogo', 'Navegação Geral', 'Empréstimos']
@@ -0,0 +1,71 @@
+import asyncio
+
+import roteador_llm
+from roteador_llm import Disjuntor, Provedor, RoteadorLLM
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self):
+        return self.agora
+
+
+def test_meio_aberto_libera_uma_unica_chamada_de_teste(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(roteador_llm.time, 'monotonic', relogio)
+    disjuntor = Disjuntor(limite_falhas=2, espera_s=30)
+    disjuntor.registrar_falha()
+    disjuntor.registrar_falha()
+    assert disjuntor.estado == 'aberto' and not disjuntor.disponivel()
+
+    relogio.agora += 30
+    assert disjuntor.estado == 'meio-aberto' and disjuntor.disponivel()
+    assert disjuntor.iniciar_chamada() is True
+    assert not disjuntor.disponivel()
+    assert disjuntor.iniciar_chamada() is False
+
+    disjuntor.registrar_falha()
+    assert disjuntor.estado == 'aberto'
+    relogio.agora += 30
+    assert disjuntor.iniciar_chamada() is True
+    disjuntor.registrar_sucesso()
+    assert disjuntor.estado == 'fechado' and disjuntor.disponivel()
+
+
+def test_teste_cancelado_libera_o_provedor(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(roteador_llm.time, 'monotonic', relogio)
+    disjuntor = Disjuntor(limite_falhas=1, espera_s=10)
+    disjuntor.registrar_falha()
+    relogio.agora += 10
+    assert disjuntor.iniciar_chamada()
+    disjuntor.liberar_teste()
+    assert disjuntor.disponivel()
+
+
+class LLMFalso:
+    def __init__(self, nome, atraso=0.05):
+        self.nome, self.atraso, self.chamadas = nome, atraso, 0
+
+    async def ainvoke(self, messages, output_format=None):
+        self.chamadas += 1
+        await asyncio.sleep(self.atraso)
+        return self.nome
+
+
+def test_chamadas_concorrentes_no_meio_aberto_vao_uma_ao_provedor_em_teste():
+    recuperando, reserva = LLMFalso('principal'), LLMFalso('reserva', atraso=0)
+    provedores = [Provedor('principal', recuperando, limite_falhas=1, espera_s=0),
+                  Provedor('reserva', reserva, limite_falhas=1, espera_s=0)]
+    provedores[0].disjuntor.registrar_falha()
+    roteador = RoteadorLLM(provedores, atraso_hedge_s=10)
+
+    async def cinco_chamadas():
+        return await asyncio.gather(*[roteador.ainvoke([]) for _ in range(5)])
+
+    respostas = asyncio.run(cinco_chamadas())
+    assert recuperando.chamadas == 1
+    assert sorted(respostas) == ['principal'] + ['reserva'] * 4
+    assert provedores[0].disjuntor.estado == 'fechado'